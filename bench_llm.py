@@ -0,0 +1,84 @@
+# bench_llm.py
+import argparse
+import asyncio
+import time
+
+from llm import AsyncOpenAIClient, OpenAIClient, gather_bounded
+from llm_backends import FakeTransport
+from llm_cache import LLMCache
+from llm_guard import CircuitBreaker, LLMGuard, RateLimiter
+
+
+def _guard() -> LLMGuard:
+    # Budgets high enough never to throttle the benchmark
+    return LLMGuard(RateLimiter(1e9, 1e12), CircuitBreaker())
+
+
+def _mistakes(count: int) -> list:
+    return [(f"Question {i}?", f"answer {i}") for i in range(count)]
+
+
+def run(mistakes: int = 5, median: float = 0.5, sigma: float = 0.4, seed: int = 0):
+    """
+    Wall time of explaining `mistakes` wrong answers against a fake API
+    with lognormal latency, for each strategy the tutor supports.
+    """
+    latency = ("lognormal", median, sigma)
+    batch = _mistakes(mistakes)
+    results = []
+
+    transport = FakeTransport(latency, seed)
+    client = OpenAIClient(client=transport, guard=_guard())
+    start = time.perf_counter()
+    for question, answer in batch:
+        client.explain_mistake(question, answer)
+    results.append(("sequential", time.perf_counter() - start, transport.calls))
+
+    transport = FakeTransport(latency, seed)
+    client = AsyncOpenAIClient(client=transport.async_client, guard=_guard())
+    start = time.perf_counter()
+    asyncio.run(gather_bounded(
+        (client.explain_mistake(question, answer) for question, answer in batch),
+        limit=mistakes
+    ))
+    results.append(("concurrent", time.perf_counter() - start, transport.calls))
+
+    transport = FakeTransport(latency, seed)
+    client = OpenAIClient(client=transport, guard=_guard(), cache=LLMCache(None))
+    start = time.perf_counter()
+    client.explain_mistakes(batch)
+    results.append(("batched", time.perf_counter() - start, transport.calls))
+
+    start = time.perf_counter()
+    client.explain_mistakes(batch)
+    results.append(("batched, cached", time.perf_counter() - start, 0))
+
+    transport = FakeTransport(latency, seed)
+    client = OpenAIClient(client=transport, guard=_guard())
+    start = time.perf_counter()
+    stream = client.generate("Support Vector Machines", stream=True)
+    next(stream)
+    first = time.perf_counter() - start
+    for _ in stream:
+        pass
+    results.append(("explanation, first chunk", first, 1))
+    results.append(("explanation, complete", time.perf_counter() - start, 1))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM call strategies against an offline fake API.")
+    parser.add_argument("--mistakes", type=int, default=5)
+    parser.add_argument("--median", type=float, default=0.5, help="median latency per request (s)")
+    parser.add_argument("--sigma", type=float, default=0.4, help="lognormal spread")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.mistakes} mistakes, latency lognormal(median={args.median}s, sigma={args.sigma})")
+    for name, elapsed, requests in run(args.mistakes, args.median, args.sigma, args.seed):
+        print(f"{name:<26} {elapsed * 1000:9.1f} ms  {requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# bench_models.py
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from models import Flashcard
+
+
+def _card_dict(i: int, created_at: str, due: str) -> dict:
+    # The dict layout the stores kept before models.Flashcard
+    return {
+        "id": f"{i:032x}",
+        "front": f"Question {i}?",
+        "back": f"Answer {i}.",
+        "created_at": created_at,
+        "ease_factor": 2.5,
+        "repetitions": 3,
+        "interval": 6,
+        "due": due,
+        "due_ts": 1_700_000_000 + i,
+    }
+
+
+def _timed(build, repeat: int = 3) -> float:
+    """
+    Best of `repeat` runs, each after a full collection.
+    """
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _measure(build):
+    """
+    (items, bytes allocated, seconds); timed without tracemalloc running.
+    """
+    elapsed = _timed(build)
+
+    tracemalloc.start()
+    items = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, size, elapsed
+
+
+def run(cards: int = 100_000):
+    created_at = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    due = "2026-01-01T00:00:00"
+    # Strings are shared by both layouts, so only the containers are counted
+    dicts = [_card_dict(i, created_at, due) for i in range(cards)]
+    results = []
+
+    _, size, elapsed = _measure(lambda: [dict(card) for card in dicts])
+    results.append(("dict", size, elapsed))
+
+    records, size, elapsed = _measure(lambda: [Flashcard.from_dict(card) for card in dicts])
+    results.append(("Flashcard.from_dict", size, elapsed))
+
+    encoded = [card.to_dict() for card in records]
+    results.append(("Flashcard.to_dict", None, _timed(lambda: [card.to_dict() for card in records])))
+    results.append(("from_dict (canonical)", None, _timed(lambda: [Flashcard.from_dict(card) for card in encoded])))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and codec cost of Flashcard records vs dicts.")
+    parser.add_argument("--cards", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{args.cards} cards")
+    results = run(args.cards)
+    baseline = results[0][2]
+    for name, size, elapsed in results:
+        memory = f"{size / 2**20:8.1f} MiB" if size is not None else " " * 12
+        print(f"{name:<24} {memory} {elapsed * 1000:9.1f} ms {elapsed / baseline:6.1f}x dict")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# bench_persistence.py
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from persistence import DURABILITY_LEVELS, update_json, write_json
+
+
+def _payload(sections: int) -> dict:
+    return {
+        f"Section {i}": {
+            "quiz_attempts": i,
+            "quiz_correct": i // 2,
+            "quiz_incorrect": i - i // 2,
+            "flashcard_reviews": 2 * i,
+            "flashcard_good": i,
+            "flashcard_again": i,
+        }
+        for i in range(sections)
+    }
+
+
+def _in_place(path: str, data: dict):
+    # The pre-atomic behaviour, for comparison
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(data, indent=2))
+
+
+def run(saves: int = 200, sections: int = 100):
+    data = _payload(sections)
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "stats.json")
+
+        cases = [("in-place (old)", lambda: _in_place(path, data))]
+        for level in DURABILITY_LEVELS:
+            cases.append((f"write, {level}", lambda level=level: write_json(path, data, level)))
+            cases.append((
+                f"locked merge, {level}",
+                lambda level=level: update_json(path, lambda current: {**(current or {}), **data}, durability=level)
+            ))
+
+        for name, save in cases:
+            start = time.perf_counter()
+            for _ in range(saves):
+                save()
+            elapsed = time.perf_counter() - start
+            results.append((name, elapsed / saves * 1000))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of each durability level per save.")
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{args.saves} saves of a {args.sections}-section stats file")
+    for name, ms in run(args.saves, args.sections):
+        print(f"{name:<24} {ms:8.3f} ms/save")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_serialization.py
+import argparse
+import time
+
+from models import Flashcard
+from serialization import FORMATS, dumps, loads
+
+
+def _deck(cards: int) -> list:
+    return [
+        Flashcard(
+            id=f"{i:032x}",
+            front=f"What is concept {i}?",
+            back=f"Concept {i} is the {i % 7}th idea of the section.",
+            created_ts=1_700_000_000,
+            ease_factor=2.5 + (i % 5) / 10,
+            repetitions=i % 6,
+            interval_days=1 + i % 30,
+            due_ts=1_700_000_000 + 86_400 * (i % 30),
+            last_reviewed_ts=None if i % 3 else 1_699_000_000,
+        )
+        for i in range(cards)
+    ]
+
+
+def run(cards: int = 10_000, rounds: int = 5):
+    deck = _deck(cards)
+    results = []
+
+    for fmt in FORMATS:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            payload = dumps(deck, fmt)
+        dump_ms = (time.perf_counter() - start) / rounds * 1000
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            # What a store does on load: parse, then get Flashcard records
+            loaded = [Flashcard.coerce(card) for card in loads(payload)]
+        load_ms = (time.perf_counter() - start) / rounds * 1000
+
+        assert loaded == deck
+        results.append((fmt, len(payload), dump_ms, load_ms))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size and speed of each state format on one deck.")
+    parser.add_argument("--cards", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.cards}-card deck, mean of {args.rounds} rounds")
+    print(f"{'format':<14} {'size':>10} {'save':>10} {'load':>10}")
+    for fmt, size, dump_ms, load_ms in run(args.cards, args.rounds):
+        print(f"{fmt:<14} {size / 1024:8.0f} KiB {dump_ms:7.1f} ms {load_ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
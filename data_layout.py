@@ -0,0 +1,167 @@
+# data_layout.py
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+from urllib.parse import quote, unquote
+
+# All per-user state lives under one data root:
+#
+#     <root>/users/<h[0:2]>/<h[2:4]>/<quoted user id>/
+#
+# where h is the SHA-1 of the user id. Two levels of 256-way fan-out keep
+# every directory small even with hundreds of thousands of learners. The
+# root is the data_root argument, else $AI_TUTOR_DATA_ROOT, else ./data.
+
+DATA_ROOT_ENV = "AI_TUTOR_DATA_ROOT"
+DEFAULT_DATA_ROOT = "data"
+
+# Shared by every user, directly under the root
+QUESTION_BANK_FILE = "question_bank.json"  # pre-generated quiz questions
+
+# Per-user files and directories, relative to the user's directory
+FLASHCARDS_DIR = "flashcards"
+FLASHCARDS_FILE = "flashcards.json"   # single-file deck, sharded on load
+QUIZZES_DIR = "quizzes"
+QUIZZES_FILE = "quizzes.json"         # single-file history, sharded on load
+QUESTIONS_FILE = "questions.json"     # content-addressed question table
+QUIZ_ARCHIVE_DIR = "quiz_archive"     # compressed segments of old attempts
+STATS_FILE = "stats.json"
+STATS_BUCKETS_FILE = "stats.buckets.json"
+PROGRESS_FILE = "progress.json"
+
+
+def resolve_data_root(data_root: str | None = None) -> str:
+    return data_root or os.environ.get(DATA_ROOT_ENV) or DEFAULT_DATA_ROOT
+
+
+def user_dir(user_id: str, data_root: str | None = None) -> str:
+    """
+    The user's directory (not created).
+    """
+    digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+    return os.path.join(
+        resolve_data_root(data_root), "users", digest[:2], digest[2:4], quote(user_id, safe="")
+    )
+
+
+def user_path(user_id: str, name: str, data_root: str | None = None) -> str:
+    """
+    Path of one of the user's files or directories. Creates the user's
+    directory and moves the file there from its pre-partitioning location
+    the first time it is asked for.
+    """
+    directory = user_dir(user_id, data_root)
+    os.makedirs(directory, exist_ok=True)
+
+    path = os.path.join(directory, name)
+    legacy = legacy_path(user_id, name)
+    if legacy is not None and not os.path.exists(path):
+        shutil.move(legacy, path)
+    return path
+
+
+# -------------------------
+# Legacy layout
+# -------------------------
+
+def _legacy_candidates(user_id: str) -> dict:
+    return {
+        FLASHCARDS_DIR: f"flashcards_{user_id}",
+        FLASHCARDS_FILE: f"flashcards_{user_id}.json",
+        QUIZZES_DIR: os.path.join("data", "quizzes", user_id),
+        QUIZZES_FILE: os.path.join("data", "quizzes", f"{user_id}_quizzes.json"),
+        STATS_FILE: os.path.join("learning_stats", f"{user_id}.json"),
+        STATS_BUCKETS_FILE: os.path.join("learning_stats", f"{user_id}.buckets.json"),
+        PROGRESS_FILE: "progress.json",
+    }
+
+
+def _progress_owner(path: str) -> str | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("user_id", "default")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def legacy_path(user_id: str, name: str) -> str | None:
+    """
+    Pre-partitioning location of a user's file, if it still exists there.
+    The old progress.json was shared, so it only belongs to the user it names.
+    """
+    path = _legacy_candidates(user_id).get(name)
+    if path is None or not os.path.exists(path):
+        return None
+    if name == PROGRESS_FILE and _progress_owner(path) != user_id:
+        return None
+    return path
+
+
+def find_legacy_users() -> set:
+    """
+    User ids that still have files in the pre-partitioning layout.
+    """
+    users = set()
+    for path in glob.glob("flashcards_*"):
+        name = os.path.basename(path)[len("flashcards_"):]
+        users.add(name[:-len(".json")] if name.endswith(".json") else name)
+    for path in glob.glob(os.path.join("data", "quizzes", "*")):
+        name = os.path.basename(path)
+        if name.endswith("_quizzes.json"):
+            users.add(name[:-len("_quizzes.json")])
+        elif os.path.isdir(path):
+            users.add(name)
+    for path in glob.glob(os.path.join("learning_stats", "*.json")):
+        name = os.path.basename(path)[:-len(".json")]
+        users.add(name[:-len(".buckets")] if name.endswith(".buckets") else name)
+    if os.path.exists("progress.json"):
+        owner = _progress_owner("progress.json")
+        if owner:
+            users.add(owner)
+    users.discard("")
+    return {u for u in users if not u.endswith(".migrated")}
+
+
+def migrate_user(user_id: str, data_root: str | None = None) -> list:
+    """
+    Move all of a user's legacy files into the partitioned layout.
+    Returns the (old, new) paths that were moved.
+    """
+    moved = []
+    for name in _legacy_candidates(user_id):
+        legacy = legacy_path(user_id, name)
+        if legacy is None:
+            continue
+        new = user_path(user_id, name, data_root)
+        if not os.path.exists(legacy):
+            moved.append((legacy, new))
+    return moved
+
+
+def user_ids(data_root: str | None = None):
+    """
+    Yield the user ids present under the data root.
+    """
+    for path in glob.glob(os.path.join(resolve_data_root(data_root), "users", "*", "*", "*")):
+        if os.path.isdir(path):
+            yield unquote(os.path.basename(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move AI Tutor files into the per-user data layout."
+    )
+    parser.add_argument("--data-root", default=None, help=f"data root (default: ${DATA_ROOT_ENV} or ./data)")
+    parser.add_argument("--user", action="append", help="user id to migrate (default: all found)")
+    args = parser.parse_args()
+
+    for user_id in sorted(args.user or find_legacy_users()):
+        for old, new in migrate_user(user_id, args.data_root):
+            print(f"{old} -> {new}")
+
+
+if __name__ == "__main__":
+    main()
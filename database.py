@@ -0,0 +1,528 @@
+# database.py
+import argparse
+import json
+import sqlite3
+import threading
+from uuid import uuid4
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS flashcards (
+    card_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    front TEXT NOT NULL,
+    front_key TEXT NOT NULL,
+    back TEXT NOT NULL,
+    created_at TEXT,
+    fields TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_flashcards_user_section
+    ON flashcards (user_id, section);
+CREATE INDEX IF NOT EXISTS idx_flashcards_front_key
+    ON flashcards (user_id, section, front_key);
+
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    attempt_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    questions TEXT NOT NULL,
+    user_answers TEXT NOT NULL,
+    correct TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_section
+    ON quiz_attempts (user_id, section, attempt_id);
+
+CREATE TABLE IF NOT EXISTS questions (
+    user_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+);
+
+CREATE TABLE IF NOT EXISTS section_stats (
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    quiz_attempts INTEGER NOT NULL DEFAULT 0,
+    quiz_correct INTEGER NOT NULL DEFAULT 0,
+    quiz_incorrect INTEGER NOT NULL DEFAULT 0,
+    flashcard_reviews INTEGER NOT NULL DEFAULT 0,
+    flashcard_good INTEGER NOT NULL DEFAULT 0,
+    flashcard_again INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, section)
+);
+
+CREATE TABLE IF NOT EXISTS section_buckets (
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (user_id, section)
+);
+
+CREATE TABLE IF NOT EXISTS section_progress (
+    user_id TEXT NOT NULL,
+    section TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    quiz_score INTEGER,
+    quiz_total INTEGER,
+    last_attempt TEXT,
+    PRIMARY KEY (user_id, section)
+);
+"""
+
+STAT_COLUMNS = (
+    "quiz_attempts",
+    "quiz_correct",
+    "quiz_incorrect",
+    "flashcard_reviews",
+    "flashcard_good",
+    "flashcard_again",
+)
+
+# Card keys that have their own column (models.Flashcard keeps created_at
+# as created_ts); everything else (scheduling metadata) goes into `fields`.
+CARD_COLUMNS = ("id", "front", "back", "created_at", "created_ts")
+
+INSERT_QUIZ_ATTEMPT = """
+INSERT INTO quiz_attempts
+    (user_id, section, timestamp, score, total, questions, user_answers, correct)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class Database:
+    """
+    SQLite storage engine for flashcards, quiz attempts, learning stats
+    and progress.
+
+    Every change touches only the affected rows, so the cost of a save no
+    longer grows with the learner's history. The stores keep their
+    in-memory structures and public APIs; pass `db=Database(...)` to them
+    to use this engine instead of their JSON files.
+    """
+
+    def __init__(self, path: str = "ai_tutor.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+
+        with self._lock, self.conn:
+            self.conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        """
+        Bring databases created by older versions up to the current schema.
+        """
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(quiz_attempts)")}
+        if "correct" not in columns:
+            self.conn.execute("ALTER TABLE quiz_attempts ADD COLUMN correct TEXT")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # -------------------------
+    # Flashcards
+    # -------------------------
+
+    def load_flashcards(self, user_id: str) -> dict:
+        """
+        Return flashcards in the FlashcardStore layout:
+        {"sections": {section: [card, ...]}}
+        """
+        sections = {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM flashcards WHERE user_id = ? ORDER BY rowid",
+                (user_id,)
+            ).fetchall()
+
+        for row in rows:
+            card = {
+                "id": row["card_id"],
+                "front": row["front"],
+                "back": row["back"],
+                "created_at": row["created_at"],
+            }
+            card.update(json.loads(row["fields"]))
+            sections.setdefault(row["section"], []).append(card)
+
+        return {"sections": sections}
+
+    def upsert_flashcards(self, user_id: str, section: str, cards: list):
+        """
+        Insert or update the given cards in a single transaction.
+        Cards without an "id" are given one.
+        """
+        rows = []
+        for card in cards:
+            card.setdefault("id", uuid4().hex)
+            fields = {k: v for k, v in card.items() if k not in CARD_COLUMNS}
+            rows.append((
+                card["id"],
+                user_id,
+                section,
+                card["front"],
+                card["front"].strip().lower(),
+                card["back"],
+                card.get("created_at"),
+                json.dumps(fields),
+            ))
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO flashcards
+                    (card_id, user_id, section, front, front_key, back, created_at, fields)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (card_id) DO UPDATE SET
+                    section = excluded.section,
+                    front = excluded.front,
+                    front_key = excluded.front_key,
+                    back = excluded.back,
+                    created_at = excluded.created_at,
+                    fields = excluded.fields
+                """,
+                rows
+            )
+
+    def delete_flashcards(self, user_id: str, section: str | None = None, card_ids: list | None = None):
+        """
+        Delete flashcards for a user.
+        - card_ids given: only those cards
+        - section given: the whole section
+        - otherwise: every card of the user
+        """
+        with self._lock, self.conn:
+            if card_ids is not None:
+                self.conn.executemany(
+                    "DELETE FROM flashcards WHERE user_id = ? AND card_id = ?",
+                    [(user_id, card_id) for card_id in card_ids]
+                )
+            elif section is not None:
+                self.conn.execute(
+                    "DELETE FROM flashcards WHERE user_id = ? AND section = ?",
+                    (user_id, section)
+                )
+            else:
+                self.conn.execute("DELETE FROM flashcards WHERE user_id = ?", (user_id,))
+
+    # -------------------------
+    # Quiz attempts
+    # -------------------------
+
+    def load_quiz_attempts(self, user_id: str) -> dict:
+        """
+        Return quiz attempts in the QuizStore layout:
+        {section: [attempt, ...]}
+
+        Compact attempts (those with a `correct` column) come back as
+        {"question_ids", "answers", "correct"}; older rows keep their
+        full "questions" / "user_answers" lists.
+        """
+        data = {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM quiz_attempts WHERE user_id = ? ORDER BY attempt_id",
+                (user_id,)
+            ).fetchall()
+
+        for row in rows:
+            attempt = {
+                "timestamp": row["timestamp"],
+                "score": row["score"],
+                "total": row["total"],
+            }
+            if row["correct"] is not None:
+                attempt["question_ids"] = json.loads(row["questions"])
+                attempt["answers"] = json.loads(row["user_answers"])
+                attempt["correct"] = row["correct"]
+            else:
+                attempt["questions"] = json.loads(row["questions"])
+                attempt["user_answers"] = json.loads(row["user_answers"])
+            data.setdefault(row["section"], []).append(attempt)
+
+        return data
+
+    def insert_quiz_attempt(self, user_id: str, section: str, attempt: dict):
+        with self._lock, self.conn:
+            self.conn.execute(INSERT_QUIZ_ATTEMPT, self._attempt_row(user_id, section, attempt))
+
+    def replace_quiz_attempts(self, user_id: str, attempts: dict):
+        """
+        Replace the attempts of the given sections ({section: [attempt, ...]})
+        in one transaction; other sections are left alone.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "DELETE FROM quiz_attempts WHERE user_id = ? AND section = ?",
+                [(user_id, section) for section in attempts]
+            )
+            self.conn.executemany(
+                INSERT_QUIZ_ATTEMPT,
+                [
+                    self._attempt_row(user_id, section, attempt)
+                    for section, section_attempts in attempts.items()
+                    for attempt in section_attempts
+                ]
+            )
+
+    @staticmethod
+    def _attempt_row(user_id: str, section: str, attempt: dict) -> tuple:
+        compact = "question_ids" in attempt
+        return (
+            user_id,
+            section,
+            attempt["timestamp"],
+            attempt["score"],
+            attempt["total"],
+            json.dumps(attempt["question_ids"] if compact else attempt["questions"]),
+            json.dumps(attempt["answers"] if compact else attempt["user_answers"]),
+            attempt["correct"] if compact else None,
+        )
+
+    def load_questions(self, user_id: str) -> dict:
+        """
+        Return the user's question table: {question_id: question}.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT question_id, body FROM questions WHERE user_id = ?",
+                (user_id,)
+            ).fetchall()
+        return {row["question_id"]: json.loads(row["body"]) for row in rows}
+
+    def upsert_questions(self, user_id: str, questions: dict):
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO questions (user_id, question_id, body) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, question_id) DO NOTHING
+                """,
+                [(user_id, qid, json.dumps(question)) for qid, question in questions.items()]
+            )
+
+    def delete_quiz_attempts(self, user_id: str, section: str | None = None):
+        with self._lock, self.conn:
+            if section is not None:
+                self.conn.execute(
+                    "DELETE FROM quiz_attempts WHERE user_id = ? AND section = ?",
+                    (user_id, section)
+                )
+            else:
+                self.conn.execute("DELETE FROM quiz_attempts WHERE user_id = ?", (user_id,))
+
+    # -------------------------
+    # Learning stats
+    # -------------------------
+
+    def load_section_stats(self, user_id: str) -> dict:
+        """
+        Return stats in the LearningStats layout:
+        {section: {"quiz_attempts": ..., ...}}
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM section_stats WHERE user_id = ? ORDER BY rowid",
+                (user_id,)
+            ).fetchall()
+
+        return {
+            row["section"]: {column: row[column] for column in STAT_COLUMNS}
+            for row in rows
+        }
+
+    def increment_section_stats(self, user_id: str, section: str, **deltas):
+        """
+        Add deltas to a section's counters, creating the row if needed.
+        e.g. increment_section_stats(user, "SVM", quiz_attempts=1, quiz_correct=1)
+        """
+        unknown = set(deltas) - set(STAT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown stat columns: {sorted(unknown)}")
+
+        columns = list(deltas)
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in columns)
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"""
+                INSERT INTO section_stats (user_id, section, {", ".join(columns)})
+                VALUES (?, ?, {", ".join("?" for _ in columns)})
+                ON CONFLICT (user_id, section) DO UPDATE SET {updates}
+                """,
+                (user_id, section, *deltas.values())
+            )
+
+    def replace_section_stats(self, user_id: str, stats: dict):
+        """
+        Overwrite all stats rows for a user (used by explicit full saves).
+        """
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM section_stats WHERE user_id = ?", (user_id,))
+            self.conn.executemany(
+                f"""
+                INSERT INTO section_stats (user_id, section, {", ".join(STAT_COLUMNS)})
+                VALUES (?, ?, {", ".join("?" for _ in STAT_COLUMNS)})
+                """,
+                [
+                    (user_id, section, *(data.get(c, 0) for c in STAT_COLUMNS))
+                    for section, data in stats.items()
+                ]
+            )
+
+    def load_section_buckets(self, user_id: str) -> dict:
+        """
+        Return {section: BucketedCounters.to_dict() state} for a user.
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT section, state FROM section_buckets WHERE user_id = ?",
+                (user_id,)
+            ).fetchall()
+        return {row["section"]: json.loads(row["state"]) for row in rows}
+
+    def save_section_buckets(self, user_id: str, section: str, state: dict):
+        with self._lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO section_buckets (user_id, section, state) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, section) DO UPDATE SET state = excluded.state
+                """,
+                (user_id, section, json.dumps(state))
+            )
+
+    # -------------------------
+    # Progress
+    # -------------------------
+
+    def load_progress(self, user_id: str) -> dict:
+        """
+        Return progress in the ProgressManager layout:
+        {"user_id": ..., "sections": {section: {...}}}
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM section_progress WHERE user_id = ? ORDER BY rowid",
+                (user_id,)
+            ).fetchall()
+
+        return {
+            "user_id": user_id,
+            "sections": {
+                row["section"]: {
+                    "completed": bool(row["completed"]),
+                    "quiz_score": row["quiz_score"],
+                    "quiz_total": row["quiz_total"],
+                    "last_attempt": row["last_attempt"],
+                }
+                for row in rows
+            }
+        }
+
+    def upsert_section_progress(self, user_id: str, sections: dict):
+        """
+        Insert or update progress entries: {section: {...}}
+        """
+        with self._lock, self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO section_progress
+                    (user_id, section, completed, quiz_score, quiz_total, last_attempt)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, section) DO UPDATE SET
+                    completed = excluded.completed,
+                    quiz_score = excluded.quiz_score,
+                    quiz_total = excluded.quiz_total,
+                    last_attempt = excluded.last_attempt
+                """,
+                [
+                    (
+                        user_id,
+                        section,
+                        int(bool(entry.get("completed", False))),
+                        entry.get("quiz_score"),
+                        entry.get("quiz_total"),
+                        entry.get("last_attempt"),
+                    )
+                    for section, entry in sections.items()
+                ]
+            )
+
+
+# -------------------------
+# One-shot JSON importer
+# -------------------------
+
+def import_json_files(db: Database, user_id: str = "default", data_root: str | None = None) -> dict:
+    """
+    Copy a user's existing JSON files into the database.
+
+    The files are read through the JSON stores, so both the per-user data
+    layout and the older file locations are understood (see data_layout).
+    Rows already in the database for the sections imported are replaced,
+    so the import can be re-run. Quiz history includes attempts moved to
+    the archive (see QuizStore.archive_older_than). Returns the number of rows imported per table.
+    """
+    # Imported here: the stores themselves accept a Database
+    from flashcard_store import FlashcardStore
+    from learning_stats import LearningStats
+    from progress_manager import ProgressManager
+    from quiz_store import QuizStore
+
+    counts = {"flashcards": 0, "quiz_attempts": 0, "section_stats": 0, "section_progress": 0}
+
+    flashcards = FlashcardStore(user_id=user_id, data_root=data_root)
+    if flashcards.count_flashcards():
+        db.delete_flashcards(user_id)
+        for section, cards in flashcards.get_all_flashcards().items():
+            db.upsert_flashcards(user_id, section, cards)
+            counts["flashcards"] += len(cards)
+
+    quizzes = QuizStore(user_id=user_id, data_root=data_root)
+    attempts = {}
+    for section in quizzes.list_sections():
+        # Archived attempts too, streamed from their segments
+        section_attempts = list(quizzes.iter_stored_attempts(section))
+        if section_attempts:
+            attempts[section] = section_attempts
+    if attempts:
+        db.upsert_questions(user_id, quizzes.questions.questions)
+        db.replace_quiz_attempts(user_id, attempts)
+        counts["quiz_attempts"] = sum(len(section_attempts) for section_attempts in attempts.values())
+
+    stats = LearningStats(user_id=user_id, data_root=data_root).get_all_stats()
+    if stats:
+        db.replace_section_stats(user_id, stats)
+        counts["section_stats"] = len(stats)
+
+    progress = ProgressManager(user_id=user_id, data_root=data_root).progress
+    if progress.get("sections"):
+        db.upsert_section_progress(user_id, progress["sections"])
+        counts["section_progress"] = len(progress["sections"])
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import AI Tutor JSON files into SQLite.")
+    parser.add_argument("--db", default="ai_tutor.db", help="SQLite database path")
+    parser.add_argument("--user", default="default", help="user id to import")
+    parser.add_argument("--data-root", default=None, help="root of the per-user JSON layout")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    counts = import_json_files(db, user_id=args.user, data_root=args.data_root)
+    db.close()
+
+    for table, count in counts.items():
+        print(f"{table}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# due_index.py
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def epoch_from_iso(value: str) -> int:
+    """
+    Convert an ISO date/datetime string (naive values are UTC) to epoch seconds.
+    """
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def card_due_ts(card: dict) -> int:
+    """
+    Return a card's due time as integer epoch seconds.
+
+    Schedulers store it in "due_ts". Older cards only have one of the
+    date fields written by the different schedulers ("due",
+    "next_review", or "last_reviewed" + "interval_days"); it is parsed
+    once and cached on the card. Cards never reviewed are due now (0).
+    """
+    due_ts = card.get("due_ts")
+    if due_ts is not None:
+        return due_ts
+
+    if card.get("due"):
+        due_ts = epoch_from_iso(card["due"])
+    elif card.get("next_review"):
+        due_ts = epoch_from_iso(card["next_review"])
+    elif card.get("last_reviewed"):
+        due_ts = epoch_from_iso(card["last_reviewed"]) + card.get("interval_days", 1) * DAY_SECONDS
+    else:
+        due_ts = 0
+
+    card["due_ts"] = due_ts
+    return due_ts
+
+
+def iso_from_epoch(ts: int) -> str:
+    """
+    Naive UTC ISO string for epoch seconds (the format the stores use).
+    """
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def due_ts_after(days: int, now: datetime | None = None) -> int:
+    """
+    Epoch seconds `days` days after now (UTC).
+    """
+    now = now or datetime.utcnow()
+    return int((now + timedelta(days=days)).replace(tzinfo=timezone.utc).timestamp())
+
+
+class DueIndex:
+    """
+    Priority index of items keyed by integer due time.
+
+    schedule() and remove() are O(log n) (stale heap entries are skipped
+    lazily); fetching the next N due items is O(N log n) with no date
+    parsing.
+    """
+
+    def __init__(self):
+        self._heap = []       # (due_ts, seq, key, item)
+        self._entries = {}    # key -> seq of its live heap entry
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def schedule(self, key, due_ts: int, item):
+        """
+        Add an item or move it to a new due time.
+        """
+        seq = next(self._counter)
+        self._entries[key] = seq
+        heapq.heappush(self._heap, (due_ts, seq, key, item))
+
+        # Keep stale entries from piling up after many reschedules
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._rebuild()
+
+    def remove(self, key):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+
+    def due(self, now: int | None = None, limit: int | None = None) -> list:
+        """
+        Return items due at or before `now` (epoch seconds), earliest first.
+        """
+        now = int(time.time()) if now is None else now
+        taken = []
+        result = []
+
+        while self._heap and (limit is None or len(result) < limit):
+            entry = heapq.heappop(self._heap)
+            due_ts, seq, key, item = entry
+            if self._entries.get(key) != seq:
+                continue  # stale entry
+            if due_ts > now:
+                taken.append(entry)
+                break
+            taken.append(entry)
+            result.append(item)
+
+        for entry in taken:
+            heapq.heappush(self._heap, entry)
+
+        return result
+
+    def next_due_ts(self) -> int | None:
+        """
+        Earliest due time in the index, or None if empty.
+        """
+        while self._heap:
+            due_ts, seq, key, _ = self._heap[0]
+            if self._entries.get(key) == seq:
+                return due_ts
+            heapq.heappop(self._heap)
+        return None
+
+    def _rebuild(self):
+        self._heap = [e for e in self._heap if self._entries.get(e[2]) == e[1]]
+        heapq.heapify(self._heap)
@@ -0,0 +1,168 @@
+# event_log.py
+import json
+import os
+import threading
+import weakref
+from datetime import datetime
+
+from serialization import json_default
+
+
+class EventLog:
+    """
+    Append-only per-user event log.
+
+    Every change to a learner's state (a quiz answer, a saved attempt, a
+    card review, a completed section) is one JSON line appended to
+    `events/{user_id}.jsonl`. Writes are O(1) and a crash can only lose
+    the tail of the log, so progress, stats and quiz history never
+    disagree with each other.
+
+    The stores act as materialized views over the log: they attach to it,
+    rebuild their state from the latest snapshot plus the events after it,
+    and then receive every new event for their view as it is appended.
+    """
+
+    def __init__(self, user_id: str = "default", base_dir: str = "events"):
+        self.user_id = user_id
+        self.base_dir = base_dir
+        os.makedirs(self.base_dir, exist_ok=True)
+        self.path = os.path.join(self.base_dir, f"{user_id}.jsonl")
+        self.snapshot_path = os.path.join(self.base_dir, f"{user_id}.snapshot.json")
+
+        self._lock = threading.RLock()
+        self._views = weakref.WeakSet()
+        self._snapshot = self._load_snapshot()
+        self._seq = self._recover()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+
+    def _load_snapshot(self) -> dict:
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {"seq": 0, "views": {}}
+
+    def _recover(self) -> int:
+        """
+        Drop a partially written last line (crash mid-append) and
+        return the highest sequence number in the log.
+        """
+        last_seq = self._snapshot["seq"]
+        if not os.path.exists(self.path):
+            return last_seq
+
+        valid_bytes = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                last_seq = max(last_seq, event["seq"])
+                valid_bytes += len(line)
+
+        if valid_bytes != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+        return last_seq
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def append(self, view: str, event_type: str, **data) -> dict:
+        """
+        Append one event and apply it to every attached view of that name.
+        """
+        with self._lock:
+            self._seq += 1
+            event = {
+                "seq": self._seq,
+                "view": view,
+                "type": event_type,
+                "ts": datetime.utcnow().isoformat(),
+                **data
+            }
+            self._file.write(json.dumps(event, default=json_default) + "\n")
+            self._file.flush()
+
+            for attached in list(self._views):
+                if attached.VIEW_NAME == view:
+                    attached.apply_event(event)
+
+        return event
+
+    def replay(self, view: str | None = None, after_seq: int = 0):
+        """
+        Yield logged events in order, optionally for one view only.
+        """
+        if not os.path.exists(self.path):
+            return
+
+        with self._lock:
+            self._file.flush()
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                event = json.loads(line)
+                if event["seq"] <= after_seq:
+                    continue
+                if view is None or event["view"] == view:
+                    yield event
+
+    def attach(self, store):
+        """
+        Rebuild a store from the snapshot and the events after it, then
+        keep it up to date with new events.
+
+        The store must provide VIEW_NAME, restore_state(state or None)
+        and apply_event(event).
+        """
+        with self._lock:
+            store.restore_state(self._snapshot["views"].get(store.VIEW_NAME))
+            for event in self.replay(store.VIEW_NAME, after_seq=self._snapshot["seq"]):
+                store.apply_event(event)
+            self._views.add(store)
+
+    def compact(self):
+        """
+        Write a snapshot of the attached views and truncate the log.
+
+        Every view that has state in the log or the previous snapshot must
+        be attached, otherwise its history would be lost.
+        """
+        with self._lock:
+            views = {view.VIEW_NAME: view for view in self._views}
+
+            logged = set(self._snapshot["views"])
+            logged.update(event["view"] for event in self.replay(after_seq=self._snapshot["seq"]))
+            missing = logged - set(views)
+            if missing:
+                raise ValueError(f"Cannot compact: views not attached: {sorted(missing)}")
+
+            snapshot = {
+                "seq": self._seq,
+                "views": {name: view.snapshot_state() for name, view in views.items()}
+            }
+
+            # The snapshot records the last sequence number it covers, so a
+            # crash before the truncate below never applies an event twice.
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, default=json_default)
+            os.replace(tmp_path, self.snapshot_path)
+
+            self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._snapshot = snapshot
+
+    def close(self):
+        with self._lock:
+            self._file.close()
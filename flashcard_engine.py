@@ -1,6 +1,9 @@
 # flashcard_engine.py
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from due_index import iso_from_epoch
+from scheduler import schedule_card
 
 
 class FlashcardEngine:
@@ -74,42 +77,7 @@ class FlashcardEngine:
         """
         Uses LLM to generate flashcards (JSON-only).
         """
-        prompt = f"""
-Generate 3 concise flashcards for revision.
-
-Rules:
-- Beginner-friendly
-- Question-answer format
-- No markdown
-- No explanations
-- STRICT JSON only
-
-FORMAT:
-[{{ "front": "...", "back": "..." }}]
-
-SECTION TITLE:
-{section_title}
-
-SECTION CONTENT:
-{section_content}
-"""
-        response = self.llm.client.chat.completions.create(
-            model=self.llm.model,
-            messages=[
-                {"role": "system", "content": "Return valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
-
-        import json
-        output = response.choices[0].message.content.strip()
-        flashcards = json.loads(output)
-
-        if not isinstance(flashcards, list):
-            raise ValueError("Invalid flashcard format")
-
-        return flashcards
+        return self.llm.generate_flashcards(section_title, section_content)
 
     # -------------------------
     # SM-2 Lite adaptive review
@@ -120,22 +88,11 @@ SECTION CONTENT:
         """
         Update flashcard scheduling using SM-2 Lite.
 
-        response: 'g' (good) or 'a' (again)
+        response: 'g' (good, quality 4) or 'a' (again, quality 1)
         """
-        today = datetime.today().date()
-
-        if response == "a":  # Again
-            card["repetition"] = 0
-            card["interval"] = 1
-        elif response == "g":  # Good
-            card["repetition"] += 1
-            if card["repetition"] == 1:
-                card["interval"] = 1
-            elif card["repetition"] == 2:
-                card["interval"] = 6
-            else:
-                card["interval"] *= 2
+        quality = {"a": 1, "g": 4}[response]
+        schedule_card(card, quality, repetitions_key="repetition")
 
         # Update next review date
-        card["next_review"] = str(today + timedelta(days=card["interval"]))
+        card["next_review"] = iso_from_epoch(card["due_ts"])[:10]
 
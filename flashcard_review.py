@@ -1,6 +1,10 @@
 from flashcard_store import FlashcardStore
 from learning_stats import LearningStats
+from store_registry import default_registry
+from due_index import card_due_ts
+from scheduler import schedule_card
 import datetime
+import time
 
 
 class FlashcardReview:
@@ -9,9 +13,12 @@ class FlashcardReview:
     Adds due-card status, quiz mistakes integration, and spaced repetition.
     """
 
-    def __init__(self, user_id="default"):
-        self.store = FlashcardStore(user_id=user_id)
-        self.stats = LearningStats(user_id=user_id)
+    MAX_INTERVAL_DAYS = 30
+
+    def __init__(self, user_id="default", registry=None):
+        self.registry = registry or default_registry
+        self.store = self.registry.get(FlashcardStore, user_id)
+        self.stats = self.registry.get(LearningStats, user_id)
 
     # -------------------------
     # Single section review
@@ -29,9 +36,11 @@ class FlashcardReview:
             print(f"No flashcards available for section '{section_title}'.")
             return []
 
+        now = int(time.time())
+
         # Filter by due status if needed
         if review_mode == "due":
-            flashcards = [card for card in flashcards if self.is_due(card)]
+            flashcards = [card for card in flashcards if self.is_due(card, now)]
             if not flashcards:
                 print(f"No due flashcards in section '{section_title}'.")
                 return []
@@ -40,14 +49,15 @@ class FlashcardReview:
             flashcards = flashcards[:limit]
 
         # Count due cards upfront
-        due_count = sum(1 for c in flashcards if self.is_due(c))
+        due_count = sum(1 for c in flashcards if self.is_due(c, now))
         total_due = due_count
         print(f"\n--- Section: {section_title} ---")
         print(f"Total flashcards: {len(flashcards)} | Due: {total_due}")
 
+        good_count = 0
         for idx, card in enumerate(flashcards, start=1):
             interval = card.get("interval_days", 1)
-            due_label = " (Due)" if self.is_due(card) else ""
+            due_label = " (Due)" if self.is_due(card, now) else ""
             print(f"\nFlashcard {idx}/{len(flashcards)}{due_label} [Interval: {interval}d]")
             print(f"Q: {card['front']}")
             input("Press Enter to reveal the answer...")
@@ -61,17 +71,18 @@ class FlashcardReview:
                 print("Please enter 'a' for again or 'g' for good.")
 
             self.record_review(card, success=(choice == "g"))
+            good_count += choice == "g"
             self.stats.record_flashcard_result(
                 section=section_title,
                 success=(choice == "g")
             )
 
         # Save updated timestamps
-        self.store._save()
+        self.store.save_cards(section_title, flashcards)
+        self.registry.flush()  # end of review session
 
         # Section summary
-        again_count = sum(1 for c in flashcards if c.get("interval_days", 1) == 1)
-        good_count = len(flashcards) - again_count
+        again_count = len(flashcards) - good_count
         print(f"\nReview summary for '{section_title}': {good_count} good, {again_count} again.")
 
         return flashcards
@@ -93,28 +104,27 @@ class FlashcardReview:
     # -------------------------
     # Helpers
     # -------------------------
-    def is_due(self, card) -> bool:
-        last_reviewed = card.get("last_reviewed")
-        interval_days = card.get("interval_days", 1)
-        if not last_reviewed:
-            return True
-        last = datetime.datetime.fromisoformat(last_reviewed)
-        days_since = (datetime.datetime.utcnow() - last).days
-        return days_since >= interval_days
+    def is_due(self, card, now: int | None = None) -> bool:
+        """
+        Compare the card's cached integer due time with now (epoch seconds).
+        """
+        now = int(time.time()) if now is None else now
+        return card_due_ts(card) <= now
 
     def record_review(self, card, success: bool):
         """
-        Updates review data using a simple spaced repetition rule.
+        Updates review data with SM-2 (good = quality 4, again = 1),
+        capping the interval at MAX_INTERVAL_DAYS.
         """
-        if success:
-            # Double interval, max 30 days
-            current_interval = card.get("interval_days", 1)
-            card["interval_days"] = min(current_interval * 2, 30)
-            card["last_reviewed"] = datetime.datetime.utcnow().isoformat()
-        else:
-            # Reset interval
-            card["interval_days"] = 1
-            card["last_reviewed"] = datetime.datetime.utcnow().isoformat()
+        now = datetime.datetime.utcnow()
+        schedule_card(
+            card,
+            4 if success else 1,
+            interval_key="interval_days",
+            now=int(now.replace(tzinfo=datetime.timezone.utc).timestamp()),
+            max_interval=self.MAX_INTERVAL_DAYS
+        )
+        card["last_reviewed"] = now.isoformat()
 
     # -------------------------
     # Interactive loop
@@ -1,34 +1,179 @@
 # flashcard_store.py
-import json
 import os
-from datetime import datetime, timedelta
+import time
+from contextlib import nullcontext
+from uuid import uuid4
+
+import data_layout
+from due_index import DueIndex, card_due_ts
+from models import Flashcard
+from persistence import read_json
+from scheduler import schedule_card
+from sharded_storage import ShardedSections
 
 
 class FlashcardStore:
     """
     Persistent storage for flashcards.
     Flashcards are grouped by section and stored per user.
+
+    Cards are models.Flashcard records with a stable "id". In-memory
+    indexes give O(1) lookup by id, O(1) duplicate checks per section and
+    the next due cards.
+
+    Without a database or event log, each section is kept in its own file
+    in the user's flashcards/ directory (see data_layout) and loaded on
+    first use (see ShardedSections).
+    The manifest records each section's earliest due time, so due-card
+    queries only load sections that have something due.
     """
 
-    def __init__(self, user_id: str = "default"):
+    VIEW_NAME = "flashcards"  # event log view
+    RATING_QUALITY = {1: 1, 2: 4, 3: 5}  # update_review rating -> SM-2 quality
+
+    def __init__(
+        self,
+        user_id: str = "default",
+        db=None,
+        event_log=None,
+        write_behind=None,
+        data_root: str | None = None
+    ):
         self.user_id = user_id
-        self.file_path = f"flashcards_{user_id}.json"
-        self._load()
+        self.data_root = data_root
+        self.db = db  # optional database.Database
+        self.event_log = event_log  # optional event_log.EventLog
+        self.write_behind = write_behind  # optional persistence.WriteBehindQueue
+        self.due_index = DueIndex()  # (section, card) by due time
+        self._cards_by_id = {}       # card id -> (section, card)
+        self._front_keys = {}        # section -> set of normalized fronts
+        if self.event_log is not None:
+            self.event_log.attach(self)
+        else:
+            self._load()
 
     # -------------------------
     # Internal helpers
     # -------------------------
 
     def _load(self):
-        if os.path.exists(self.file_path):
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                self.data = json.load(f)
+        if self.db is not None:
+            self.data = self.db.load_flashcards(self.user_id)
+            for cards in self.data["sections"].values():
+                self._to_models(cards)
+            self._reindex()
+            return
+
+        self.file_path = data_layout.user_path(self.user_id, data_layout.FLASHCARDS_FILE, self.data_root)
+        self.shard_dir = data_layout.user_path(self.user_id, data_layout.FLASHCARDS_DIR, self.data_root)
+        sections = ShardedSections(
+            self.shard_dir,
+            summarize=self._summarize_shard,
+            on_load=self._on_shard_load
+        )
+        self.data = {"sections": sections}
+
+        if not len(sections) and os.path.exists(self.file_path):
+            self._migrate_legacy_file(sections)
+
+    def _migrate_legacy_file(self, sections: ShardedSections):
+        """
+        Split an old single-file deck into per-section shards.
+        """
+        legacy = read_json(self.file_path)
+        for cards in legacy.get("sections", {}).values():
+            self._to_models(cards)
+        sections.import_sections(legacy.get("sections", {}))
+        self._reindex()  # also gives older cards an id
+        sections.save()
+        os.replace(self.file_path, self.file_path + ".migrated")
+
+    def _summarize_shard(self, section: str, cards: list) -> dict:
+        return {"next_due_ts": min((card_due_ts(card) for card in cards), default=None)}
+
+    @staticmethod
+    def _to_models(cards: list) -> list:
+        """
+        Convert stored card dicts to Flashcard records in place.
+        """
+        cards[:] = [Flashcard.coerce(card) for card in cards]
+        return cards
+
+    def _on_shard_load(self, section: str, cards: list):
+        self._to_models(cards)
+        missing_ids = any(card.id is None for card in cards)
+        self._index_cards(section, cards)
+        if missing_ids:
+            self._save(section)  # persist ids given to older cards
+
+    def _loaded_sections(self) -> dict:
+        sections = self.data["sections"]
+        if isinstance(sections, ShardedSections):
+            return sections.loaded()
+        return sections
+
+    @staticmethod
+    def _front_key(front: str) -> str:
+        return front.strip().lower()
+
+    def _reindex(self) -> int:
+        """
+        Rebuild the indexes of all loaded sections.
+        Returns how many cards were given an id.
+        """
+        self.due_index.clear()
+        self._cards_by_id.clear()
+        self._front_keys.clear()
+
+        assigned = 0
+        for section, cards in self._loaded_sections().items():
+            assigned += sum(1 for card in cards if card.id is None)
+            self._index_cards(section, cards)
+        return assigned
+
+    def _index_cards(self, section: str, cards: list):
+        keys = self._front_keys.setdefault(section, set())
+        for card in cards:
+            card_id = card.id
+            if card_id is None:
+                card_id = card.id = uuid4().hex
+            self._cards_by_id[card_id] = (section, card)
+            keys.add(self._front_key(card.front))
+            self.due_index.schedule(card_id, card_due_ts(card), (section, card))
+
+    def _save(self, *sections):
+        """
+        Persist changes to the given sections (only their shards are rewritten).
+        """
+        for section in sections:
+            self.data["sections"].mark_dirty(section)
+        if self.write_behind is not None:
+            self.write_behind.mark_dirty(self)
         else:
-            self.data = {"sections": {}}
+            self.flush()
+
+    def _data_lock(self):
+        """
+        Lock of the sharded deck (see ShardedSections.lock), so the
+        write-behind thread never snapshots a half-applied change.
+        """
+        sections = self.data["sections"]
+        if isinstance(sections, ShardedSections):
+            return sections.lock
+        return nullcontext()
 
-    def _save(self):
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=2)
+    def _load_all_sections(self):
+        for section in self.data["sections"]:
+            self.data["sections"][section]
+
+    def flush(self):
+        """
+        Write changed sections to disk now.
+        With a database or event log every change is already persisted.
+        """
+        if self.db is not None or self.event_log is not None:
+            return
+        self.data["sections"].save()
 
     # -------------------------
     # Public API
@@ -39,24 +184,86 @@ class FlashcardStore:
         Add a flashcard to a section.
         Prevent duplicate questions within the same section.
         """
-        if section not in self.data["sections"]:
-            self.data["sections"][section] = []
+        added = self.add_flashcards(section, [{"front": front, "back": back}])
+        return added[0] if added else None
 
-        cards = self.data["sections"][section]
+    def add_flashcards(self, section: str, flashcards: list) -> list:
+        """
+        Add many flashcards ({"front": ..., "back": ...}) to a section
+        with a single save. Questions already in the section, or repeated
+        within the batch, are skipped. Returns the cards that were added.
+        """
+        self.get_flashcards_for_section(section)  # load and index the section
+        keys = set(self._front_keys.get(section, ()))
+        created_ts = int(time.time())
+
+        new_cards = []
+        for flashcard in flashcards:
+            key = self._front_key(flashcard["front"])
+            if key in keys:
+                continue  # duplicate → skip
+            keys.add(key)
+            new_cards.append(Flashcard(
+                id=uuid4().hex,
+                front=flashcard["front"],
+                back=flashcard["back"],
+                created_ts=created_ts
+            ))
+
+        if not new_cards:
+            return []
+
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "cards_added", section=section, cards=new_cards)
+            return new_cards
+
+        with self._data_lock():
+            self.data["sections"].setdefault(section, []).extend(new_cards)
+        self.save_cards(section, new_cards)
+        return new_cards
+
+    def get_flashcard(self, card_id: str):
+        """
+        Return the card with this id, or None.
+        """
+        entry = self._find(card_id)
+        return entry[1] if entry else None
 
-        # Deduplicate by question text
-        normalized_front = front.strip().lower()
-        for card in cards:
-            if card["front"].strip().lower() == normalized_front:
-                return  # duplicate → do nothing
+    def _find(self, card_id: str):
+        entry = self._cards_by_id.get(card_id)
+        if entry is None and self.db is None and self.event_log is None:
+            self._load_all_sections()  # the card may be in a section not loaded yet
+            entry = self._cards_by_id.get(card_id)
+        return entry
+
+    def update_flashcard(self, card_id: str, updated_fields: dict):
+        """
+        Update fields of one card (looked up by id) and persist only that card.
+        """
+        entry = self._find(card_id)
+        if entry is None:
+            raise KeyError(f"Unknown flashcard id: {card_id}")
 
-        cards.append({
-            "front": front,
-            "back": back,
-            "created_at": datetime.utcnow().isoformat()
-        })
+        section, card = entry
+        with self._data_lock():
+            card.update(updated_fields)
+        self.save_cards(section, [card])
+        return card
 
-        self._save()
+    def save_cards(self, section: str, cards: list):
+        """
+        Persist changes to the given cards of a section.
+        With a database only those rows are written; otherwise the section's file.
+        """
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "cards_updated", section=section, cards=cards)
+            return
+
+        self._index_cards(section, cards)  # they may have been rescheduled
+        if self.db is not None:
+            self.db.upsert_flashcards(self.user_id, section, cards)
+        else:
+            self._save(section)
 
     def get_flashcards_for_section(self, section: str) -> list:
         """
@@ -70,6 +277,20 @@ class FlashcardStore:
         """
         return self.data["sections"]
 
+    def get_due_cards(self, limit: int | None = None, now: int | None = None) -> list:
+        """
+        Return up to `limit` due cards across all sections, earliest first,
+        as (section, card) pairs. `now` is epoch seconds (default: current time).
+        """
+        sections = self.data["sections"]
+        if isinstance(sections, ShardedSections):
+            now = int(time.time()) if now is None else now
+            for section in sections:
+                next_due = sections.meta(section).get("next_due_ts")
+                if not sections.is_loaded(section) and (next_due is None or next_due <= now):
+                    sections[section]  # loading indexes its cards
+        return self.due_index.due(now=now, limit=limit)
+
     # -------------------------
     # Step 3: Access & Management Helpers
     # -------------------------
@@ -84,7 +305,7 @@ class FlashcardStore:
         """
         Check if a section has any flashcards.
         """
-        return section in self.data["sections"] and len(self.data["sections"][section]) > 0
+        return self.count_flashcards(section) > 0
 
     def count_flashcards(self, section: str | None = None) -> int:
         """
@@ -92,25 +313,45 @@ class FlashcardStore:
         - If section is provided, count only that section
         - Otherwise, count all flashcards
         """
+        sections = self.data["sections"]
+        if isinstance(sections, ShardedSections):
+            if section:
+                return sections.count(section)
+            return sum(sections.count(name) for name in sections)
+
         if section:
-            return len(self.data["sections"].get(section, []))
+            return len(sections.get(section, []))
 
-        return sum(len(cards) for cards in self.data["sections"].values())
+        return sum(len(cards) for cards in sections.values())
 
     def clear_section(self, section: str):
         """
         Delete all flashcards for a specific section.
         """
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "section_cleared", section=section)
+            return
         if section in self.data["sections"]:
             del self.data["sections"][section]
-            self._save()
+            self._reindex()
+            if self.db is not None:
+                self.db.delete_flashcards(self.user_id, section=section)
+            else:
+                self._save()
 
     def clear_all(self):
         """
         Delete all flashcards for all sections.
         """
-        self.data = {"sections": {}}
-        self._save()
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "section_cleared", section=None)
+            return
+        self.data["sections"].clear()
+        self._reindex()
+        if self.db is not None:
+            self.db.delete_flashcards(self.user_id)
+        else:
+            self._save()
 
     # -------------------------
     # v0.13 Maintenance Utility
@@ -125,6 +366,7 @@ class FlashcardStore:
         """
 
         report = {}
+        removed_ids = []
         changed = False
 
         for section, cards in self.data["sections"].items():
@@ -139,6 +381,7 @@ class FlashcardStore:
                     unique_cards.append(card)
                 else:
                     changed = True
+                    removed_ids.append(card["id"])
 
             if len(unique_cards) != len(cards):
                 report[section] = {
@@ -150,7 +393,14 @@ class FlashcardStore:
                     self.data["sections"][section] = unique_cards
 
         if changed and not dry_run:
-            self._save()
+            if self.event_log is not None:
+                self.event_log.append(self.VIEW_NAME, "cards_removed", ids=removed_ids)
+            else:
+                self._reindex()
+                if self.db is not None:
+                    self.db.delete_flashcards(self.user_id, card_ids=removed_ids)
+                else:
+                    self._save()
 
         return report
 
@@ -158,25 +408,59 @@ class FlashcardStore:
         """
         Update spaced repetition metadata for a flashcard.
         rating: 1 = again, 2 = good, 3 = easy
+        (SM-2 quality 1, 4 and 5 through scheduler.schedule_card)
         """
         card = self.data["sections"][section][card_index]
 
-        now = datetime.utcnow()
-        interval = card.get("interval", 1)
-        ease = card.get("ease", 2.5)
-
-        if rating == 1:  # Again
-            interval = 1
-            ease = max(1.3, ease - 0.2)
-        elif rating == 2:  # Good
-            interval = round(interval * ease)
-        elif rating == 3:  # Easy
-            interval = round(interval * ease * 1.3)
-            ease += 0.1
-
-        card["last_reviewed"] = now.isoformat()
-        card["interval"] = interval
-        card["ease"] = round(ease, 2)
-        card["next_review"] = (now + timedelta(days=interval)).isoformat()
-
-        self._save()
+        now = int(time.time())
+        with self._data_lock():
+            schedule_card(card, self.RATING_QUALITY[rating], now=now)
+            card.last_reviewed_ts = now
+
+        self.save_cards(section, [card])
+
+    # -------------------------
+    # Event log view
+    # -------------------------
+
+    def restore_state(self, state):
+        self.data = state or {"sections": {}}
+        for cards in self.data["sections"].values():
+            self._to_models(cards)
+        self._reindex()
+
+    def snapshot_state(self) -> dict:
+        return self.data
+
+    def apply_event(self, event: dict):
+        sections = self.data["sections"]
+
+        if event["type"] in ("card_added", "cards_added"):
+            added = self._to_models(list(event["cards"] if "cards" in event else [event["card"]]))
+            sections.setdefault(event["section"], []).extend(added)
+            self._index_cards(event["section"], added)
+
+        elif event["type"] == "cards_updated":
+            cards = sections.setdefault(event["section"], [])
+            for updated in event["cards"]:
+                entry = self._cards_by_id.get(updated.get("id"))
+                card = entry[1] if entry else None
+                if card is None:
+                    card = Flashcard.coerce(updated)
+                    cards.append(card)
+                elif card is not updated:
+                    card.update(updated)
+                self._index_cards(event["section"], [card])
+
+        elif event["type"] == "cards_removed":
+            removed = set(event["ids"])
+            for section, cards in sections.items():
+                sections[section] = [c for c in cards if c.get("id") not in removed]
+            self._reindex()
+
+        elif event["type"] == "section_cleared":
+            if event["section"] is None:
+                sections.clear()
+            else:
+                sections.pop(event["section"], None)
+            self._reindex()
@@ -1,75 +1,320 @@
-import json
 import os
+import threading
+import time
+from bisect import bisect_left, insort
 from typing import List
 
+import data_layout
+from due_index import epoch_from_iso
+from models import SectionStats
+from persistence import file_lock, read_json, write_json
+from time_buckets import DAY_SECONDS, BucketedCounters
+
+
+class WeakSectionIndex:
+    """
+    Sections whose quiz or flashcard accuracy is below a threshold pair,
+    kept sorted weakest first.
+
+    update() is called whenever a section's accuracy changes, so reading
+    the weak sections is O(k) in their number instead of a scan of all
+    sections. A section's weakness is how far its worse accuracy falls
+    below its threshold.
+    """
+
+    def __init__(self, quiz_threshold: float, flashcard_threshold: float):
+        self.quiz_threshold = quiz_threshold
+        self.flashcard_threshold = flashcard_threshold
+        self._members = {}  # section -> sort key
+        self._order = []    # sorted (sort key, section)
+
+    def __contains__(self, section):
+        return section in self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def update(self, section: str, quiz_accuracy: float, flashcard_accuracy: float):
+        self.discard(section)
+        margin = min(quiz_accuracy - self.quiz_threshold, flashcard_accuracy - self.flashcard_threshold)
+        if margin < 0:
+            self._members[section] = margin
+            insort(self._order, (margin, section))
+
+    def discard(self, section: str):
+        old_key = self._members.pop(section, None)
+        if old_key is not None:
+            del self._order[bisect_left(self._order, (old_key, section))]
+
+    def reset(self, accuracy: dict):
+        """
+        Rebuild from {section: (quiz accuracy, flashcard accuracy)} off to
+        the side, then swap the result in.
+        """
+        fresh = WeakSectionIndex(self.quiz_threshold, self.flashcard_threshold)
+        for section, (quiz_accuracy, flashcard_accuracy) in accuracy.items():
+            fresh.update(section, quiz_accuracy, flashcard_accuracy)
+        self._members, self._order = fresh._members, fresh._order
+
+    def sections(self, limit: int | None = None) -> List[str]:
+        order = self._order if limit is None else self._order[:limit]
+        return [section for _, section in order]
+
 
 class LearningStats:
     """
     Persistent learning analytics store.
-    Tracks quiz and flashcard performance per section, per user.
+    Tracks quiz and flashcard performance per section, per user
+    (lifetime counters are models.SectionStats records).
+
+    Accuracy ratios are cached per section and every registered threshold
+    pair keeps a WeakSectionIndex up to date as results are recorded;
+    both are only read and changed under the store's lock, as flush() may
+    run on the write-behind thread.
+
+    Besides lifetime counters, each section keeps per-day counts for the
+    last BUCKET_DAYS days and exponentially decayed counts
+    (time_buckets.BucketedCounters), so recent performance is available
+    without reading quiz history.
+
+    In file mode, results recorded since the last save are kept as
+    pending deltas and added to the file's current contents under a
+    lock, so several processes can record results for the same user.
     """
 
-    def __init__(self, user_id: str = "default"):
+    VIEW_NAME = "stats"  # event log view
+    DEFAULT_THRESHOLDS = (0.6, 0.7)  # (quiz, flashcard) accuracy
+
+    BUCKET_FIELDS = ("quiz_attempts", "quiz_correct", "flashcard_reviews", "flashcard_good")
+    BUCKET_DAYS = 30            # ring size
+    DECAY_HALF_LIFE_DAYS = 7
+    RECENT_DAYS = 7             # default rolling window
+
+    def __init__(
+        self,
+        user_id: str = "default",
+        db=None,
+        event_log=None,
+        write_behind=None,
+        data_root: str | None = None
+    ):
         self.user_id = user_id
-        self.base_dir = "learning_stats"
-        os.makedirs(self.base_dir, exist_ok=True)
-        self.file_path = os.path.join(self.base_dir, f"{user_id}.json")
+        self.db = db  # optional database.Database
+        self.event_log = event_log  # optional event_log.EventLog
+        self.write_behind = write_behind  # optional persistence.WriteBehindQueue
+        self.data_root = data_root
+        self.file_path = None
+        self.buckets_path = None
+        if self.db is None and self.event_log is None:
+            self.file_path = data_layout.user_path(user_id, data_layout.STATS_FILE, data_root)
+            self.buckets_path = data_layout.user_path(user_id, data_layout.STATS_BUCKETS_FILE, data_root)
+        self.buckets = {}  # section -> BucketedCounters
+
+        self._accuracy = {}       # section -> (quiz accuracy, flashcard accuracy)
+        self._weak_indexes = {}   # (quiz threshold, flashcard threshold) -> WeakSectionIndex
+        self.stats = {}
+        self._pending = []  # (section, deltas, ts) not yet in the file
+        self._lock = threading.RLock()
+        self.register_thresholds(*self.DEFAULT_THRESHOLDS)
 
         # Load existing stats or initialize empty
-        if os.path.exists(self.file_path):
-            try:
-                with open(self.file_path, "r", encoding="utf-8") as f:
-                    loaded = json.load(f)
-                    if isinstance(loaded, dict):
-                        self.stats = loaded
-                    else:
-                        self.stats = {}
-            except json.JSONDecodeError:
-                print("Warning: stats file corrupted, starting fresh.")
-                self.stats = {}
+        # (a corrupted file raises persistence.CorruptFileError)
+        if self.event_log is not None:
+            self.event_log.attach(self)
+        elif self.db is not None:
+            self.stats = self._to_models(self.db.load_section_stats(self.user_id))
         else:
-            self.stats = {}
+            loaded = read_json(self.file_path, {})
+            self.stats = self._to_models(loaded if isinstance(loaded, dict) else {})
+
+        if self.event_log is None:
+            self._rebuild_accuracy()
+            self._load_buckets()
 
     # -------------------------
     # Internal helpers
     # -------------------------
 
+    @staticmethod
+    def _to_models(stats: dict) -> dict:
+        """
+        {section: counters dict} as read from storage -> {section: SectionStats}
+        """
+        return {section: SectionStats.coerce(counters) for section, counters in stats.items()}
+
+    def _new_buckets(self, state: dict | None = None) -> BucketedCounters:
+        options = {
+            "size": self.BUCKET_DAYS,
+            "bucket_seconds": DAY_SECONDS,
+            "half_life_seconds": self.DECAY_HALF_LIFE_DAYS * DAY_SECONDS,
+            "windows": (self.RECENT_DAYS,),
+        }
+        if state is None:
+            return BucketedCounters(self.BUCKET_FIELDS, **options)
+        return BucketedCounters.from_dict(state, self.BUCKET_FIELDS, **options)
+
+    def _load_buckets(self):
+        if self.db is not None:
+            states = self.db.load_section_buckets(self.user_id)
+        else:
+            states = read_json(self.buckets_path, {})
+        self.buckets = {section: self._new_buckets(state) for section, state in states.items()}
+
     def _save(self):
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.stats, f, indent=2)
+        if self.write_behind is not None:
+            self.write_behind.mark_dirty(self)
+        else:
+            self.flush()
+
+    def flush(self):
+        """
+        Write stats to disk now.
+        With a database or event log every change is already persisted.
+        """
+        if self.db is not None or self.event_log is not None:
+            return
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending and os.path.exists(self.file_path):
+            return
+
+        try:
+            with file_lock(self.file_path):
+                stats = self._to_models(read_json(self.file_path, {}))
+                buckets = {
+                    section: self._new_buckets(state)
+                    for section, state in read_json(self.buckets_path, {}).items()
+                }
+                for section, deltas, ts in pending:
+                    self._merge_deltas(stats, buckets, section, deltas, ts)
+
+                write_json(self.file_path, stats)
+                write_json(self.buckets_path, {s: b.to_dict() for s, b in buckets.items()}, indent=None)
+        except BaseException:
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+
+        # The file now holds every process's results; keep ours recorded since
+        with self._lock:
+            for section, deltas, ts in self._pending:
+                self._merge_deltas(stats, buckets, section, deltas, ts)
+            self.stats = stats
+            self.buckets = buckets
+            self._refresh_accuracy()
+
+    def _merge_deltas(self, stats: dict, buckets: dict, section: str, deltas: dict, ts: float):
+        if section not in stats:
+            stats[section] = SectionStats()
+        stats[section].add(**deltas)
+
+        if section not in buckets:
+            buckets[section] = self._new_buckets()
+        buckets[section].add(ts, **{k: v for k, v in deltas.items() if k in self.BUCKET_FIELDS})
+
+    @staticmethod
+    def _quiz_deltas(correct: bool) -> dict:
+        if correct:
+            return {"quiz_attempts": 1, "quiz_correct": 1}
+        return {"quiz_attempts": 1, "quiz_incorrect": 1}
+
+    @staticmethod
+    def _flashcard_deltas(success: bool) -> dict:
+        if success:
+            return {"flashcard_reviews": 1, "flashcard_good": 1}
+        return {"flashcard_reviews": 1, "flashcard_again": 1}
+
+    def _apply_deltas(self, section: str, deltas: dict, ts: float | None = None):
+        self._ensure_section(section)
+        self.stats[section].add(**deltas)
+        self._update_accuracy(section)
+
+        buckets = self.buckets.get(section)
+        if buckets is None:
+            buckets = self.buckets[section] = self._new_buckets()
+        buckets.add(ts, **{k: v for k, v in deltas.items() if k in self.BUCKET_FIELDS})
+
+    @staticmethod
+    def _accuracies(data: dict) -> tuple:
+        """
+        (quiz accuracy, flashcard accuracy); 1.0 when nothing was attempted.
+        """
+        quiz_attempted = data.get("quiz_attempts", 0)
+        quiz_accuracy = data.get("quiz_correct", 0) / quiz_attempted if quiz_attempted > 0 else 1.0
+
+        fc_attempted = data.get("flashcard_reviews", 0)
+        flashcard_accuracy = data.get("flashcard_good", 0) / fc_attempted if fc_attempted > 0 else 1.0
+
+        return quiz_accuracy, flashcard_accuracy
+
+    def _update_accuracy(self, section: str):
+        accuracy = self._accuracies(self.stats[section])
+        self._accuracy[section] = accuracy
+        for index in self._weak_indexes.values():
+            index.update(section, *accuracy)
+
+    def _refresh_accuracy(self):
+        """
+        Re-apply only the sections whose accuracy changed since the
+        cache was last updated (after another process's results were read).
+        """
+        for section in self._accuracy.keys() - self.stats.keys():
+            del self._accuracy[section]
+            for index in self._weak_indexes.values():
+                index.discard(section)
+        for section, counters in self.stats.items():
+            if self._accuracy.get(section) != self._accuracies(counters):
+                self._update_accuracy(section)
+
+    def _rebuild_accuracy(self):
+        accuracy = {section: self._accuracies(counters) for section, counters in self.stats.items()}
+        for index in self._weak_indexes.values():
+            index.reset(accuracy)
+        self._accuracy = accuracy
+
+    def _increment(self, section: str, **deltas):
+        """
+        Apply counter deltas in memory and persist them.
+        With a database only the section's row is updated.
+        """
+        ts = time.time()
+        with self._lock:
+            self._apply_deltas(section, deltas, ts)
+            if self.db is None:
+                self._pending.append((section, deltas, ts))
+
+        if self.db is not None:
+            self.db.increment_section_stats(self.user_id, section, **deltas)
+            self.db.save_section_buckets(self.user_id, section, self.buckets[section].to_dict())
+        else:
+            self._save()
 
     def _ensure_section(self, section: str):
         if section not in self.stats:
-            self.stats[section] = {
-                "quiz_attempts": 0,
-                "quiz_correct": 0,
-                "quiz_incorrect": 0,
-                "flashcard_reviews": 0,
-                "flashcard_good": 0,
-                "flashcard_again": 0,
-            }
+            self.stats[section] = SectionStats()
 
     # -------------------------
     # Public API
     # -------------------------
 
     def record_quiz_result(self, section: str, correct: bool):
-        self._ensure_section(section)
-        self.stats[section]["quiz_attempts"] += 1
-        if correct:
-            self.stats[section]["quiz_correct"] += 1
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "quiz_answered", section=section, correct=correct)
         else:
-            self.stats[section]["quiz_incorrect"] += 1
-        self._save()
+            self._increment(section, **self._quiz_deltas(correct))
 
     def record_flashcard_result(self, section: str, success: bool):
-        self._ensure_section(section)
-        self.stats[section]["flashcard_reviews"] += 1
-        if success:
-            self.stats[section]["flashcard_good"] += 1
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "card_reviewed", section=section, success=success)
         else:
-            self.stats[section]["flashcard_again"] += 1
-        self._save()
+            self._increment(section, **self._flashcard_deltas(success))
+
+    def record_flashcard_review(self, section: str, quality: int):
+        """
+        Record an SM-2 review (quality 0–5); 3 or more counts as good.
+        """
+        self.record_flashcard_result(section=section, success=quality >= 3)
 
     def get_section_stats(self, section: str):
         self._ensure_section(section)
@@ -78,48 +323,113 @@ class LearningStats:
     def get_all_stats(self):
         return self.stats
 
+    def register_thresholds(self, quiz_threshold: float, flashcard_threshold: float) -> WeakSectionIndex:
+        """
+        Maintain the weak sections for this threshold pair from now on.
+        Costs one pass over the sections; later updates are incremental.
+        """
+        key = (quiz_threshold, flashcard_threshold)
+        with self._lock:
+            index = self._weak_indexes.get(key)
+            if index is None:
+                index = WeakSectionIndex(quiz_threshold, flashcard_threshold)
+                index.reset(self._accuracy)
+                self._weak_indexes[key] = index
+            return index
+
     def get_weak_sections(
         self,
         quiz_threshold: float = 0.6,
-        flashcard_threshold: float = 0.7
+        flashcard_threshold: float = 0.7,
+        limit: int | None = None
     ) -> List[str]:
         """
-        Returns a list of section names the user is weak in.
+        Returns a list of section names the user is weak in, weakest first.
+        Thresholds not registered yet are registered on first use.
         """
+        with self._lock:
+            return self.register_thresholds(quiz_threshold, flashcard_threshold).sections(limit)
 
-        weak_sections = []
+    def is_weak(self, section: str, quiz_threshold: float = 0.6, flashcard_threshold: float = 0.7) -> bool:
+        with self._lock:
+            return section in self.register_thresholds(quiz_threshold, flashcard_threshold)
 
-        for section, data in self.stats.items():
-            # --- Quiz stats ---
-            quiz_attempted = data.get("quiz_attempts", 0)
-            quiz_correct = data.get("quiz_correct", 0)
-            quiz_accuracy = (quiz_correct / quiz_attempted) if quiz_attempted > 0 else 1.0
+    def get_quiz_accuracy(self, section: str) -> float:
+        """
+        Returns quiz accuracy for a section as a float between 0.0 and 1.0.
+        If no quiz attempts exist, returns 1.0 (neutral / not weak).
+        """
+        return self._accuracy.get(section, (1.0, 1.0))[0]
 
-            # --- Flashcard stats ---
-            fc_attempted = data.get("flashcard_reviews", 0)
-            fc_success = data.get("flashcard_good", 0)
-            flashcard_accuracy = (fc_success / fc_attempted) if fc_attempted > 0 else 1.0
+    def get_flashcard_accuracy(self, section: str) -> float:
+        """
+        Returns flashcard success rate for a section (1.0 if never reviewed).
+        """
+        return self._accuracy.get(section, (1.0, 1.0))[1]
 
-            if quiz_accuracy < quiz_threshold or flashcard_accuracy < flashcard_threshold:
-                weak_sections.append(section)
+    # -------------------------
+    # Recent performance
+    # -------------------------
 
-        return weak_sections
+    def get_recent_stats(self, section: str, days: int | None = None, now: float | None = None) -> dict:
+        """
+        Counters of the last `days` days (default: RECENT_DAYS) for a section.
+        """
+        days = self.RECENT_DAYS if days is None else days
+        buckets = self.buckets.get(section)
+        if buckets is None:
+            return {field: 0 for field in self.BUCKET_FIELDS}
+        with self._lock:  # a read may advance the ring (see BucketedCounters.window)
+            return {field: buckets.window(field, days, now=now) for field in self.BUCKET_FIELDS}
 
-    def get_quiz_accuracy(self, section: str) -> float:
+    def get_recent_quiz_accuracy(self, section: str, days: int | None = None, now: float | None = None) -> float:
         """
-        Returns quiz accuracy for a section as a float between 0.0 and 1.0.
-        If no quiz attempts exist, returns 1.0 (neutral / not weak).
+        Quiz accuracy over the last `days` days. Falls back to lifetime
+        accuracy when there were no quiz answers in the window.
         """
-        section_data = self.stats.get(section)
+        recent = self.get_recent_stats(section, days, now=now)
+        if recent["quiz_attempts"] == 0:
+            return self.get_quiz_accuracy(section)
+        return recent["quiz_correct"] / recent["quiz_attempts"]
 
-        if not section_data:
+    def get_decayed_quiz_accuracy(self, section: str, now: float | None = None) -> float:
+        """
+        Quiz accuracy with each answer weighted by 0.5 ** (age / half-life).
+        """
+        buckets = self.buckets.get(section)
+        if buckets is None:
             return 1.0
+        attempts = buckets.decayed("quiz_attempts", now=now)
+        if attempts <= 1e-9:
+            return self.get_quiz_accuracy(section)
+        return buckets.decayed("quiz_correct", now=now) / attempts
 
-        attempts = section_data.get("quiz_attempts", 0)
-        correct = section_data.get("quiz_correct", 0)
+    # -------------------------
+    # Event log view
+    # -------------------------
 
-        if attempts == 0:
-            return 1.0
+    def restore_state(self, state):
+        state = state or {}
+        with self._lock:
+            if state.get("version") == 2:
+                self.stats = self._to_models(state["stats"])
+                self.buckets = {s: self._new_buckets(b) for s, b in state["buckets"].items()}
+            else:
+                self.stats = self._to_models(state)  # snapshot without buckets
+                self.buckets = {}
+            self._rebuild_accuracy()
 
-        return correct / attempts
+    def snapshot_state(self) -> dict:
+        return {
+            "version": 2,
+            "stats": self.stats,
+            "buckets": {s: b.to_dict() for s, b in self.buckets.items()},
+        }
 
+    def apply_event(self, event: dict):
+        ts = epoch_from_iso(event["ts"]) if "ts" in event else None
+        with self._lock:
+            if event["type"] == "quiz_answered":
+                self._apply_deltas(event["section"], self._quiz_deltas(event["correct"]), ts)
+            elif event["type"] == "card_reviewed":
+                self._apply_deltas(event["section"], self._flashcard_deltas(event["success"]), ts)
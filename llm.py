@@ -1,42 +1,381 @@
 # llm.py
+import asyncio
 import os
 import json
-from openai import OpenAI, RateLimitError
+from openai import AsyncOpenAI, OpenAI
 
+from llm_guard import LLMUnavailableError, guard_for
+
+
+# -------------------------
+# Prompts (shared by both clients)
+# -------------------------
+
+QUIZ_DIFFICULTY_GUIDELINES = {
+    "easy": (
+        "Use simple, direct questions. "
+        "Focus on definitions and basic recall. "
+        "Avoid tricky wording or close distractors."
+    ),
+    "normal": (
+        "Use standard conceptual questions. "
+        "Test understanding, not memorization. "
+        "Include reasonable distractors."
+    ),
+    "hard": (
+        "Use challenging questions. "
+        "Test edge cases, misconceptions, and deeper reasoning. "
+        "Use subtle distractors and application-based questions."
+    )
+}
+
+UNAVAILABLE_MESSAGE = (
+    "LLM unavailable (quota limits or provider outage)\n"
+    "Please review the material manually or try again later."
+)
+
+
+def section_messages(topic: str) -> list:
+    return [
+        {"role": "system", "content": "You are a helpful AI tutor."},
+        {"role": "user", "content": f"Explain {topic} clearly and simply."}
+    ]
+
+
+def quiz_messages(
+    section_title: str,
+    section_content: str,
+    difficulty: str,
+    num_questions: int,
+    avoid: list | None = None
+) -> list:
+    difficulty_instruction = QUIZ_DIFFICULTY_GUIDELINES.get(
+        difficulty, QUIZ_DIFFICULTY_GUIDELINES["normal"]
+    )
+    avoid_rule = ""
+    if avoid:
+        avoid_rule = "- Do not repeat or rephrase any of these existing questions:\n" + "".join(
+            f"  * {question}\n" for question in avoid
+        )
+
+    prompt = f"""
+You are an AI tutor generating a quiz.
+
+Section Title: {section_title}
+
+Section Content:
+{section_content}
+
+Difficulty Level: {difficulty.upper()}
+Guidelines: {difficulty_instruction}
+
+Rules:
+- Generate {num_questions} clear, independent questions
+- Each question must have exactly one correct answer
+{avoid_rule}- Return STRICT JSON in this format only:
+{{
+  "questions": [
+    {{"question": "...", "correct_answer": "..."}}
+  ]
+}}
+Do NOT include explanations, markdown, or extra text.
+"""
+    return [
+        {"role": "system", "content": "You generate valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_quiz(raw_output: str) -> dict:
+    raw_output = raw_output.strip()
+    try:
+        quiz = json.loads(raw_output)
+    except json.JSONDecodeError:
+        raise ValueError(f"LLM returned invalid JSON for quiz:\n{raw_output}")
+
+    if "questions" not in quiz or not isinstance(quiz["questions"], list):
+        raise ValueError("Quiz format invalid: missing 'questions' list")
+
+    return quiz
+
+
+def fallback_quiz(section_title: str) -> dict:
+    return {
+        "questions": [
+            {
+                "question": f"What is the main idea of {section_title}?",
+                "correct_answer": "definition"
+            }
+        ]
+    }
+
+
+def flashcard_messages(section_title: str, section_content: str) -> list:
+    prompt = f"""
+Generate 3 concise flashcards for revision.
+
+Rules:
+- Beginner-friendly
+- Question-answer format
+- No markdown
+- No explanations
+- STRICT JSON only
+
+FORMAT:
+[{{ "front": "...", "back": "..." }}]
+
+SECTION TITLE:
+{section_title}
+
+SECTION CONTENT:
+{section_content}
+"""
+    return [
+        {"role": "system", "content": "Return valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_flashcards(output: str) -> list:
+    flashcards = json.loads(output.strip())
+
+    if not isinstance(flashcards, list):
+        raise ValueError("Invalid flashcard format")
+
+    return flashcards
+
+
+def mistake_messages(question: str, correct_answer: str) -> list:
+    prompt = f"""
+A learner answered a question incorrectly.
+
+QUESTION:
+{question}
+
+CORRECT ANSWER:
+{correct_answer}
+
+Explain the concept clearly and simply so the learner understands.
+"""
+    return [
+        {"role": "system", "content": "You are a patient AI tutor."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def mistakes_messages(batch: list) -> list:
+    """
+    One request for several (question, correct_answer) pairs; the items
+    are numbered from 1 so the response can be split back (parse_explanations).
+    """
+    items = json.dumps(
+        [
+            {"id": i, "question": question, "correct_answer": correct_answer}
+            for i, (question, correct_answer) in enumerate(batch, start=1)
+        ],
+        indent=2,
+        ensure_ascii=False
+    )
+    prompt = f"""
+A learner answered these questions incorrectly.
+
+QUESTIONS:
+{items}
+
+For each one, explain the concept clearly and simply so the learner understands.
+Return STRICT JSON in this format only, one entry per id:
+{{
+  "explanations": [
+    {{"id": 1, "explanation": "..."}}
+  ]
+}}
+"""
+    return [
+        {"role": "system", "content": "You are a patient AI tutor. You reply with valid JSON only."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_explanations(raw_output: str, count: int) -> list:
+    """
+    The explanations of a mistakes_messages() response, in item order.
+    Raises ValueError unless there is exactly one non-empty explanation
+    per id.
+    """
+    try:
+        data = json.loads(raw_output.strip())
+    except json.JSONDecodeError:
+        raise ValueError("LLM returned invalid JSON for explanations")
+
+    items = data.get("explanations") if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("Explanations format invalid: missing 'explanations' list")
+
+    explanations = [None] * count
+    for item in items:
+        item_id = item.get("id") if isinstance(item, dict) else None
+        text = item.get("explanation") if isinstance(item, dict) else None
+        if not isinstance(item_id, int) or not 1 <= item_id <= count:
+            raise ValueError(f"Explanations format invalid: unexpected id {item_id!r}")
+        if not isinstance(text, str) or not text.strip() or explanations[item_id - 1] is not None:
+            raise ValueError(f"Explanations format invalid: bad entry for id {item_id}")
+        explanations[item_id - 1] = text.strip()
+
+    if None in explanations:
+        raise ValueError("Explanations format invalid: missing ids")
+    return explanations
+
+
+# -------------------------
+# Bounded concurrency
+# -------------------------
+
+def bounded_tasks(coros, limit: int = 4) -> list:
+    """
+    Schedule coroutines as tasks, at most `limit` running at once.
+    The tasks come back in input order, so awaiting them one by one
+    handles each result as soon as it and every earlier one are done.
+    Must be called with an event loop running.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coro):
+        async with semaphore:
+            return await coro
+
+    return [asyncio.ensure_future(run(coro)) for coro in coros]
+
+
+async def gather_bounded(coros, limit: int = 4, return_exceptions: bool = False) -> list:
+    """
+    asyncio.gather with at most `limit` coroutines running at once.
+    Results are in input order.
+    """
+    return await asyncio.gather(*bounded_tasks(coros, limit), return_exceptions=return_exceptions)
+
+
+# -------------------------
+# Clients
+# -------------------------
 
 class OpenAIClient:
-    def __init__(self, model="gpt-4.1-mini"):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, model="gpt-4.1-mini", cache=None, guard=None, client=None):
+        """
+        client: an OpenAI-compatible client (client.chat.completions.create);
+        by default the SDK's OpenAI. llm_backends has offline stand-ins.
+
+        cache: optional llm_cache.LLMCache; identical requests are then
+        answered from it instead of the API.
+
+        guard: llm_guard.LLMGuard applied to every request (rate limits,
+        retries, circuit breaker); by default the model's process-wide one.
+        Requests it gives up on raise LLMUnavailableError, which the
+        methods below turn into their offline fallbacks where they have one.
+        """
+        self.client = client or OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = model
+        self.cache = cache
+        self.guard = guard or guard_for(model)
 
     # -------------------------
-    # Section explanation
+    # Chat completion (cached)
     # -------------------------
 
-    def generate_section(self, topic: str) -> dict:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a helpful AI tutor."},
-                {"role": "user", "content": f"Explain {topic} clearly and simply."}
-            ],
-            temperature=0.4
+    def chat(self, messages: list, temperature: float, parse=None):
+        """
+        Content of one chat completion. Every request goes through here,
+        so all of them share the response cache.
+
+        parse: optional callable applied to the content (its result is
+        returned); a response it raises on is not cached.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.model, messages, temperature)
+            if cached is not None:
+                return parse(cached) if parse else cached
+
+        response = self.guard.call(
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature
+            ),
+            messages
+        )
+        content = response.choices[0].message.content
+        result = parse(content) if parse else content
+
+        if self.cache is not None:
+            self.cache.put(self.model, messages, temperature, content)
+        return result
+
+    def chat_stream(self, messages: list, temperature: float):
+        """
+        chat() as a generator of content chunks. A cached response comes
+        back as a single chunk; a streamed one is cached once it has been
+        read to the end.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.model, messages, temperature)
+            if cached is not None:
+                yield cached
+                return
+
+        stream = self.guard.call(
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True
+            ),
+            messages
         )
+        parts = []
+        for event in stream:
+            chunk = event.choices[0].delta.content if event.choices else None
+            if chunk:
+                parts.append(chunk)
+                yield chunk
+
+        if self.cache is not None:
+            self.cache.put(self.model, messages, temperature, "".join(parts))
+
+    # -------------------------
+    # Section explanation
+    # -------------------------
+
+    def generate_section(self, topic: str, stream: bool = False):
+        """
+        {"title", "content"}; with stream=True, a generator of content
+        chunks instead.
+        """
+        if stream:
+            return self.chat_stream(section_messages(topic), temperature=0.4)
+
+        content = self.chat(section_messages(topic), temperature=0.4)
 
         return {
             "title": topic,
-            "content": response.choices[0].message.content
+            "content": content
         }
 
-    def generate(self, prompt: str) -> str:
+    def generate(self, prompt: str, stream: bool = False):
+        """
+        The explanation text; with stream=True, a generator of its chunks.
+        """
+        if stream:
+            return self._generate_stream(prompt)
         try:
             section = self.generate_section(prompt)
             return section["content"]
-        except RateLimitError:
-            return (
-                "LLM unavailable due to quota limits\n"
-                "Please review the material manually or try again later."
-            )
+        except LLMUnavailableError:
+            return UNAVAILABLE_MESSAGE
+
+    def _generate_stream(self, prompt: str):
+        try:
+            yield from self.generate_section(prompt, stream=True)
+        except LLMUnavailableError:
+            yield UNAVAILABLE_MESSAGE
 
     # -------------------------
     # Quiz generation (v0.17)
@@ -47,10 +386,12 @@ class OpenAIClient:
         section_title: str,
         section_content: str,
         difficulty: str = "normal",
-        num_questions: int = 3
+        num_questions: int = 3,
+        avoid: list | None = None
     ) -> dict:
         """
         Generate a quiz for a section with optional difficulty.
+        avoid: question texts the new questions must differ from.
         Returns a dict:
         {
             "questions": [
@@ -58,111 +399,246 @@ class OpenAIClient:
             ]
         }
         """
+        try:
+            print(f"[LLM] Generating {difficulty} quiz for '{section_title}'")
 
-        # Difficulty guidelines
-        difficulty_guidelines = {
-            "easy": (
-                "Use simple, direct questions. "
-                "Focus on definitions and basic recall. "
-                "Avoid tricky wording or close distractors."
-            ),
-            "normal": (
-                "Use standard conceptual questions. "
-                "Test understanding, not memorization. "
-                "Include reasonable distractors."
-            ),
-            "hard": (
-                "Use challenging questions. "
-                "Test edge cases, misconceptions, and deeper reasoning. "
-                "Use subtle distractors and application-based questions."
+            return self.chat(
+                quiz_messages(section_title, section_content, difficulty, num_questions, avoid),
+                temperature=0.2,
+                parse=parse_quiz
             )
-        }
 
-        difficulty_instruction = difficulty_guidelines.get(
-            difficulty, difficulty_guidelines["normal"]
+        except LLMUnavailableError:
+            return fallback_quiz(section_title)
+
+    # -------------------------
+    # Flashcard generation
+    # -------------------------
+
+    def generate_flashcards(self, section_title: str, section_content: str) -> list:
+        """
+        [{"front", "back"}] for a section; raises on a malformed response.
+        """
+        return self.chat(
+            flashcard_messages(section_title, section_content),
+            temperature=0.3,
+            parse=parse_flashcards
         )
 
-        prompt = f"""
-You are an AI tutor generating a quiz.
+    # -------------------------
+    # Mistake explanation
+    # -------------------------
 
-Section Title: {section_title}
+    def explain_mistake(self, question: str, correct_answer: str) -> str:
+        return self.chat(mistake_messages(question, correct_answer), temperature=0.4)
 
-Section Content:
-{section_content}
+    def explain_mistakes(self, batch: list) -> list:
+        """
+        Explanations of several (question, correct_answer) pairs, in order,
+        from one request. Falls back to one explain_mistake() call per
+        pair if the batched response is malformed.
+        """
+        if len(batch) < 2:
+            return [self.explain_mistake(question, answer) for question, answer in batch]
+        try:
+            return self.chat(
+                mistakes_messages(batch),
+                temperature=0.4,
+                parse=lambda raw: parse_explanations(raw, len(batch))
+            )
+        except ValueError:
+            return [self.explain_mistake(question, answer) for question, answer in batch]
 
-Difficulty Level: {difficulty.upper()}
-Guidelines: {difficulty_instruction}
 
-Rules:
-- Generate {num_questions} clear, independent questions
-- Each question must have exactly one correct answer
-- Return STRICT JSON in this format only:
-{{
-  "questions": [
-    {{"question": "...", "correct_answer": "..."}}
-  ]
-}}
-Do NOT include explanations, markdown, or extra text.
-"""
+class AsyncOpenAIClient:
+    """
+    OpenAIClient with coroutine methods, for issuing requests
+    concurrently (see gather_bounded).
 
-        try:
-            print(f"[LLM] Generating {difficulty} quiz for '{section_title}'")
+    The underlying AsyncOpenAI client is bound to the event loop it is
+    first used on, so one is created per loop: callers that run each
+    batch under its own asyncio.run() can share this object. A `client`
+    passed in (e.g. an llm_backends stand-in) is used as is; `make_client`
+    replaces AsyncOpenAI() as the per-loop constructor (see llm_pool).
+    """
 
-            response = self.client.chat.completions.create(
+    def __init__(self, model="gpt-4.1-mini", cache=None, guard=None, client=None, make_client=None):
+        self.model = model
+        self.cache = cache
+        self.guard = guard or guard_for(model)
+        self._fixed_client = client
+        self._make_client = make_client or (lambda: AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY")))
+        self._client = None
+        self._loop = None
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._fixed_client is not None:
+            return self._fixed_client
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = self._make_client()
+            self._loop = loop
+        return self._client
+
+    # -------------------------
+    # Chat completion (cached)
+    # -------------------------
+
+    async def chat(self, messages: list, temperature: float, parse=None):
+        """
+        See OpenAIClient.chat.
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.model, messages, temperature)
+            if cached is not None:
+                return parse(cached) if parse else cached
+
+        response = await self.guard.acall(
+            lambda: self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": "You generate valid JSON only."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2
-            )
+                messages=messages,
+                temperature=temperature
+            ),
+            messages
+        )
+        content = response.choices[0].message.content
+        result = parse(content) if parse else content
 
-            raw_output = response.choices[0].message.content.strip()
+        if self.cache is not None:
+            self.cache.put(self.model, messages, temperature, content)
+        return result
 
-            try:
-                quiz = json.loads(raw_output)
-            except json.JSONDecodeError:
-                raise ValueError(f"LLM returned invalid JSON for quiz:\n{raw_output}")
-
-            if "questions" not in quiz or not isinstance(quiz["questions"], list):
-                raise ValueError("Quiz format invalid: missing 'questions' list")
-
-            return quiz
-
-        except RateLimitError:
-            # fallback quiz
-            return {
-                "questions": [
-                    {
-                        "question": f"What is the main idea of {section_title}?",
-                        "correct_answer": "definition"
-                    }
-                ]
-            }
+    async def chat_stream(self, messages: list, temperature: float):
+        """
+        See OpenAIClient.chat_stream (an async generator here).
+        """
+        if self.cache is not None:
+            cached = self.cache.get(self.model, messages, temperature)
+            if cached is not None:
+                yield cached
+                return
+
+        stream = await self.guard.acall(
+            lambda: self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=True
+            ),
+            messages
+        )
+        parts = []
+        async for event in stream:
+            chunk = event.choices[0].delta.content if event.choices else None
+            if chunk:
+                parts.append(chunk)
+                yield chunk
+
+        if self.cache is not None:
+            self.cache.put(self.model, messages, temperature, "".join(parts))
 
     # -------------------------
-    # Mistake explanation
+    # Section explanation
     # -------------------------
 
-    def explain_mistake(self, question: str, correct_answer: str) -> str:
-        prompt = f"""
-A learner answered a question incorrectly.
+    def generate_section(self, topic: str, stream: bool = False):
+        """
+        A coroutine for {"title", "content"}; with stream=True, an async
+        generator of content chunks instead.
+        """
+        if stream:
+            return self.chat_stream(section_messages(topic), temperature=0.4)
+        return self._generate_section(topic)
 
-QUESTION:
-{question}
+    async def _generate_section(self, topic: str) -> dict:
+        content = await self.chat(section_messages(topic), temperature=0.4)
 
-CORRECT ANSWER:
-{correct_answer}
+        return {
+            "title": topic,
+            "content": content
+        }
 
-Explain the concept clearly and simply so the learner understands.
-"""
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are a patient AI tutor."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.4
+    def generate(self, prompt: str, stream: bool = False):
+        """
+        A coroutine for the explanation text; with stream=True, an async
+        generator of its chunks.
+        """
+        if stream:
+            return self._generate_stream(prompt)
+        return self._generate(prompt)
+
+    async def _generate(self, prompt: str) -> str:
+        try:
+            section = await self.generate_section(prompt)
+            return section["content"]
+        except LLMUnavailableError:
+            return UNAVAILABLE_MESSAGE
+
+    async def _generate_stream(self, prompt: str):
+        try:
+            async for chunk in self.generate_section(prompt, stream=True):
+                yield chunk
+        except LLMUnavailableError:
+            yield UNAVAILABLE_MESSAGE
+
+    # -------------------------
+    # Quiz generation
+    # -------------------------
+
+    async def generate_quiz(
+        self,
+        section_title: str,
+        section_content: str,
+        difficulty: str = "normal",
+        num_questions: int = 3,
+        avoid: list | None = None
+    ) -> dict:
+        try:
+            print(f"[LLM] Generating {difficulty} quiz for '{section_title}'")
+
+            return await self.chat(
+                quiz_messages(section_title, section_content, difficulty, num_questions, avoid),
+                temperature=0.2,
+                parse=parse_quiz
+            )
+
+        except LLMUnavailableError:
+            return fallback_quiz(section_title)
+
+    # -------------------------
+    # Flashcard generation
+    # -------------------------
+
+    async def generate_flashcards(self, section_title: str, section_content: str) -> list:
+        return await self.chat(
+            flashcard_messages(section_title, section_content),
+            temperature=0.3,
+            parse=parse_flashcards
         )
 
-        return response.choices[0].message.content
+    # -------------------------
+    # Mistake explanation
+    # -------------------------
+
+    async def explain_mistake(self, question: str, correct_answer: str) -> str:
+        return await self.chat(mistake_messages(question, correct_answer), temperature=0.4)
+
+    async def explain_mistakes(self, batch: list, limit: int = 4) -> list:
+        """
+        See OpenAIClient.explain_mistakes; the fallback calls run
+        concurrently, at most `limit` at once.
+        """
+        if len(batch) > 1:
+            try:
+                return await self.chat(
+                    mistakes_messages(batch),
+                    temperature=0.4,
+                    parse=lambda raw: parse_explanations(raw, len(batch))
+                )
+            except ValueError:
+                pass
+        return await gather_bounded(
+            (self.explain_mistake(question, answer) for question, answer in batch),
+            limit
+        )
@@ -0,0 +1,262 @@
+# llm_backends.py
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Protocol, runtime_checkable
+
+from llm_cache import cache_key
+from persistence import read_json, write_json
+
+
+@runtime_checkable
+class LLMBackend(Protocol):
+    """
+    What the tutor needs from a language model. llm.OpenAIClient
+    implements it on top of any OpenAI-compatible client, including the
+    offline transports below.
+    """
+
+    def generate(self, prompt: str, stream: bool = False): ...
+
+    def generate_quiz(
+        self,
+        section_title: str,
+        section_content: str,
+        difficulty: str = "normal",
+        num_questions: int = 3,
+        avoid: list | None = None
+    ) -> dict: ...
+
+    def explain_mistake(self, question: str, correct_answer: str) -> str: ...
+
+    def generate_flashcards(self, section_title: str, section_content: str) -> list: ...
+
+
+# -------------------------
+# OpenAI-compatible transports
+# -------------------------
+
+def _completion(content: str, messages: list):
+    prompt_chars = sum(len(message.get("content") or "") for message in messages)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=content))],
+        usage=SimpleNamespace(total_tokens=(prompt_chars + len(content)) // 4)
+    )
+
+
+def _chunks(content: str) -> list:
+    return re.findall(r"\S+\s*|\s+", content) or [content]
+
+
+def _chunk_event(chunk: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+
+class Transport:
+    """
+    Base of the stand-ins for the OpenAI SDK client: subclasses answer
+    respond(model, messages, temperature) with (content, delay seconds)
+    and get client.chat.completions.create(...) (stream=True included)
+    from here. `async_client` is the same transport with an awaitable
+    create(), for llm.AsyncOpenAIClient(client=...).
+    """
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+        self.async_client = _AsyncTransport(self)
+        self.calls = 0
+
+    def respond(self, model: str, messages: list, temperature: float) -> tuple:
+        raise NotImplementedError
+
+    def create(self, model: str, messages: list, temperature: float = 1.0, stream: bool = False, **kwargs):
+        self.calls += 1
+        content, delay = self.respond(model, messages, temperature)
+        if not stream:
+            time.sleep(delay)
+            return _completion(content, messages)
+        return self._stream(_chunks(content), delay)
+
+    @staticmethod
+    def _stream(chunks: list, delay: float):
+        # The delay is spread over the chunks, so the first arrives early
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield _chunk_event(chunk)
+
+
+class _AsyncTransport:
+    def __init__(self, transport: Transport):
+        self.transport = transport
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, model: str, messages: list, temperature: float = 1.0, stream: bool = False, **kwargs):
+        self.transport.calls += 1
+        content, delay = self.transport.respond(model, messages, temperature)
+        if not stream:
+            await asyncio.sleep(delay)
+            return _completion(content, messages)
+        return self._stream(_chunks(content), delay)
+
+    @staticmethod
+    async def _stream(chunks: list, delay: float):
+        for chunk in chunks:
+            await asyncio.sleep(delay / len(chunks))
+            yield _chunk_event(chunk)
+
+
+# -------------------------
+# Fake backend
+# -------------------------
+
+def latency_sampler(latency, seed: int = 0):
+    """
+    A function returning one request's latency in seconds, from:
+    - a number: always that long
+    - ("uniform", low, high)
+    - ("normal", mean, stdev)          (clipped at 0)
+    - ("lognormal", median, sigma)     (long-tailed, like real APIs)
+    - any callable taking a random.Random
+    Draws come from a seeded generator, so runs are reproducible.
+    """
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    if callable(latency):
+        sample = latency
+    elif isinstance(latency, (int, float)):
+        return lambda: float(latency)
+    else:
+        kind, *params = latency
+        if kind == "uniform":
+            sample = lambda r: r.uniform(*params)
+        elif kind == "normal":
+            sample = lambda r: max(0.0, r.gauss(*params))
+        elif kind == "lognormal":
+            median, sigma = params
+            sample = lambda r: r.lognormvariate(math.log(median), sigma)
+        else:
+            raise ValueError(f"Unknown latency distribution: {kind!r}")
+
+    def draw():
+        with lock:
+            return sample(rng)
+    return draw
+
+
+class FakeTransport(Transport):
+    """
+    Deterministic offline stand-in for the OpenAI API. Recognises the
+    tutor's prompts (see llm.py) by the JSON format they ask for and
+    answers each with canned, valid content: quizzes with the requested
+    number of questions, batched explanations for every id, flashcard
+    lists; anything else gets a plain explanation. The same request
+    always gets the same answer; only the latency is sampled.
+    """
+
+    def __init__(self, latency=0.0, seed: int = 0):
+        super().__init__()
+        self.latency = latency_sampler(latency, seed)
+
+    def respond(self, model: str, messages: list, temperature: float) -> tuple:
+        return self.content(messages), self.latency()
+
+    def content(self, messages: list) -> str:
+        prompt = messages[-1]["content"]
+
+        if '"explanations"' in prompt:
+            items = json.loads(prompt.split("QUESTIONS:", 1)[1].split("\n\nFor each", 1)[0])
+            return json.dumps({"explanations": [
+                {"id": item["id"], "explanation": self._explanation(item["question"], item["correct_answer"])}
+                for item in items
+            ]})
+
+        if '"questions"' in prompt:
+            count = int(re.search(r"Generate (\d+)", prompt).group(1))
+            title = self._field(prompt, "Section Title:")
+            offset = prompt.count("\n  * ")  # questions to avoid: number past them
+            return json.dumps({"questions": [
+                {"question": f"Question {i} about {title}?", "correct_answer": f"answer {i}"}
+                for i in range(offset + 1, offset + count + 1)
+            ]})
+
+        if '"front"' in prompt:
+            title = self._field(prompt, "SECTION TITLE:\n")
+            return json.dumps([
+                {"front": f"What is {title}? ({i})", "back": f"{title}, point {i}."}
+                for i in range(1, 4)
+            ])
+
+        if "CORRECT ANSWER:" in prompt:
+            question = self._field(prompt, "QUESTION:\n")
+            answer = self._field(prompt, "CORRECT ANSWER:\n")
+            return self._explanation(question, answer)
+
+        topic = prompt.strip().splitlines()[-1]
+        return f"{topic} explained: " + " ".join(f"Point {i} about the topic." for i in range(1, 21))
+
+    @staticmethod
+    def _field(prompt: str, label: str) -> str:
+        return prompt.split(label, 1)[1].strip().splitlines()[0].strip()
+
+    @staticmethod
+    def _explanation(question: str, answer: str) -> str:
+        return f"The answer to '{question}' is '{answer}' because of how the concept is defined."
+
+
+# -------------------------
+# Record / replay
+# -------------------------
+
+class RecordReplayTransport(Transport):
+    """
+    Captures another client's responses to a JSON file and serves them
+    back, keyed like llm_cache (model, messages, temperature).
+
+    mode "record": forward each request to `inner` (e.g. the SDK's
+    OpenAI()) and save its response; "replay": answer from the file
+    only, raising LookupError for a request that was never recorded.
+    Replayed responses take `latency` (see latency_sampler).
+    """
+
+    def __init__(self, path: str, mode: str = "replay", inner=None, latency=0.0, seed: int = 0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown mode: {mode!r}")
+        if mode == "record" and inner is None:
+            raise ValueError("record mode needs an inner client")
+        super().__init__()
+        self.path = path
+        self.mode = mode
+        self.inner = inner
+        self.latency = latency_sampler(latency, seed)
+        self.recordings = read_json(path) if os.path.exists(path) else {}
+        self._lock = threading.Lock()
+
+    def respond(self, model: str, messages: list, temperature: float) -> tuple:
+        key = cache_key(model, messages, temperature)
+
+        if self.mode == "replay":
+            recording = self.recordings.get(key)
+            if recording is None:
+                raise LookupError(f"No recorded response for this request ({key[:12]})")
+            return recording["content"], self.latency()
+
+        start = time.perf_counter()
+        response = self.inner.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature
+        )
+        elapsed = time.perf_counter() - start
+        content = response.choices[0].message.content
+
+        with self._lock:
+            self.recordings[key] = {"model": model, "content": content, "latency": elapsed}
+            write_json(self.path, self.recordings)
+        return content, 0.0  # the real request already took its time
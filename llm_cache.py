@@ -0,0 +1,209 @@
+# llm_cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(model: str, messages: list, temperature: float) -> str:
+    """
+    Stable key of one chat request: the same model, messages and
+    temperature always map to the same key.
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "temperature": temperature},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Response cache for chat completions, keyed by (model, messages,
+    temperature).
+
+    An in-memory LRU of `memory_entries` responses sits in front of a
+    SQLite table holding up to `max_entries`; the least recently used
+    entries are evicted from each. Entries older than `ttl_seconds`
+    (None: never) are treated as misses and dropped.
+
+    Requests with a temperature above `max_temperature` are sampled to
+    vary, so they bypass the cache unless it is None (cache everything).
+
+    hits / misses / bypassed (plus memory_hits and disk_hits) are
+    counted; see stats().
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at);
+    """
+
+    def __init__(
+        self,
+        path: str | None = "llm_cache.db",
+        memory_entries: int = 256,
+        max_entries: int = 10_000,
+        ttl_seconds: float | None = 7 * 24 * 60 * 60,
+        max_temperature: float | None = None
+    ):
+        """
+        path=None keeps the cache in memory only.
+        """
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_temperature = max_temperature
+
+        self._memory = OrderedDict()  # key -> (response, created_at)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+
+        self.conn = None
+        if path is not None:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.executescript(self.SCHEMA)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def cacheable(self, temperature: float) -> bool:
+        return self.max_temperature is None or temperature <= self.max_temperature
+
+    def get(self, model: str, messages: list, temperature: float) -> str | None:
+        """
+        Cached response of this request, or None.
+        """
+        if not self.cacheable(temperature):
+            with self._lock:
+                self.counters["bypassed"] += 1
+            return None
+
+        key = cache_key(model, messages, temperature)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self._count_hit("memory_hits")
+                return entry[0]
+            self._memory.pop(key, None)
+
+            row = self._load(key)
+            if row is not None and not self._expired(row[1], now):
+                self._remember(key, row[0], row[1])
+                self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.conn.commit()
+                self._count_hit("disk_hits")
+                return row[0]
+            if row is not None:
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.conn.commit()
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, model: str, messages: list, temperature: float, response: str):
+        if not self.cacheable(temperature):
+            return
+
+        key = cache_key(model, messages, temperature)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, response, now)
+            if self.conn is None:
+                return
+            self.conn.execute(
+                """
+                INSERT INTO responses (key, model, response, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = excluded.created_at,
+                    accessed_at = excluded.accessed_at
+                """,
+                (key, model, response, now, now)
+            )
+            self._evict_disk(now)
+            self.conn.commit()
+
+    def stats(self) -> dict:
+        """
+        Counters plus the hit ratio and current sizes.
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_size"] = len(self._memory)
+            stats["disk_size"] = self._disk_size()
+        looked_up = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / looked_up if looked_up else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM responses")
+                self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _count_hit(self, tier: str):
+        self.counters["hits"] += 1
+        self.counters[tier] += 1
+
+    def _remember(self, key: str, response: str, created_at: float):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key: str):
+        if self.conn is None:
+            return None
+        return self.conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+    def _disk_size(self) -> int:
+        if self.conn is None:
+            return 0
+        return self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _evict_disk(self, now: float):
+        if self.ttl_seconds is not None:
+            self.conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        excess = self._disk_size() - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at LIMIT ?
+                )
+                """,
+                (excess,)
+            )
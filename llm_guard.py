@@ -0,0 +1,317 @@
+# llm_guard.py
+import asyncio
+import random
+import threading
+import time
+
+from openai import APIConnectionError, APIStatusError
+
+# Request / token budgets per minute, per model. Models not listed use
+# DEFAULT_LIMITS. Lower them to stay under an account's quota.
+MODEL_LIMITS = {
+    "gpt-4.1-mini": (500, 200_000),
+    "gpt-4.1": (500, 30_000),
+}
+DEFAULT_LIMITS = (500, 30_000)
+
+# Added to the prompt estimate to budget for the completion
+COMPLETION_TOKENS_ESTIMATE = 500
+
+RETRYABLE_STATUS = {408, 409, 429}  # plus any 5xx
+
+
+class LLMUnavailableError(Exception):
+    """
+    The provider could not be reached or kept refusing requests (after
+    retries); callers fall back to their offline behaviour.
+    """
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """
+    Failed fast: the circuit breaker is open after repeated failures.
+    """
+
+
+def estimate_tokens(messages: list) -> int:
+    """
+    Rough token count of a request (about 4 characters per token) plus
+    the completion budget.
+    """
+    chars = sum(len(message.get("content") or "") for message in messages)
+    return chars // 4 + COMPLETION_TOKENS_ESTIMATE
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, APIConnectionError):  # includes timeouts
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS or exc.status_code >= 500
+    return False
+
+
+def retry_after(exc: Exception) -> float | None:
+    """
+    Seconds the provider asked us to wait (Retry-After / retry-after-ms), if any.
+    """
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after") is not None:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass  # HTTP-date form: use our own backoff
+    return None
+
+
+# -------------------------
+# Token bucket
+# -------------------------
+
+class TokenBucket:
+    """
+    `capacity` units refilled at `per_minute` units a minute.
+
+    reserve(n) takes n units right away, going into debt if needed, and
+    returns how long the caller must wait before using them; callers
+    sleep however suits them (time.sleep or asyncio.sleep).
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1) -> float:
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """
+        Give back units reserved but not used (negative: take more).
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class RateLimiter:
+    """
+    A request budget and a token budget for one model.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def reserve(self, tokens: int) -> float:
+        """
+        Seconds to wait before sending a request of about `tokens` tokens.
+        """
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+    def settle(self, estimated: int, used: int):
+        """
+        Correct the token budget once the actual usage is known.
+        """
+        self.tokens.refund(estimated - used)
+
+
+# -------------------------
+# Circuit breaker
+# -------------------------
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; while open every
+    call fails fast with CircuitOpenError. After `reset_timeout` seconds
+    one trial call is let through (half-open): success closes the
+    circuit, failure opens it again, and a trial that ends without a
+    verdict (see abandon_trial) lets the next call try again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return
+        raise CircuitOpenError("LLM provider unavailable (circuit open)")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def abandon_trial(self):
+        """
+        The call let through ended without telling whether the provider
+        is up (cancelled, or failed before reaching it).
+        """
+        with self._lock:
+            self._trial = False
+
+
+# -------------------------
+# Guard
+# -------------------------
+
+class LLMGuard:
+    """
+    Wraps every request to one model: waits for the rate limiter, retries
+    retryable errors with jittered exponential backoff (honouring
+    Retry-After), and goes through the circuit breaker. Exhausted retries
+    and an open circuit raise LLMUnavailableError.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        breaker: CircuitBreaker,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0
+    ):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = time.sleep
+        self.async_sleep = asyncio.sleep
+
+    def backoff(self, attempt: int, exc: Exception) -> float:
+        """
+        Full-jitter delay before retry number `attempt` (from 1), never
+        shorter than the provider's Retry-After.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        requested = retry_after(exc)
+        return max(delay, requested) if requested is not None else delay
+
+    def call(self, request, messages: list):
+        """
+        request() with rate limiting, retries and the circuit breaker.
+        """
+        estimated = estimate_tokens(messages)
+        for attempt in range(1, self.max_attempts + 1):
+            self.breaker.before_call()
+            wait = self.limiter.reserve(estimated)
+            try:
+                if wait:
+                    self.sleep(wait)
+                response = request()
+            except Exception as exc:
+                if not is_retryable(exc):
+                    self._non_retryable(exc)
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_attempts:
+                    raise LLMUnavailableError(f"LLM request failed after {attempt} attempts") from exc
+                self.sleep(self.backoff(attempt, exc))
+                continue
+            except BaseException:
+                self.breaker.abandon_trial()
+                raise
+            self.breaker.record_success()
+            self._settle(estimated, response)
+            return response
+
+    async def acall(self, request, messages: list):
+        """
+        call() for a coroutine-returning request().
+        """
+        estimated = estimate_tokens(messages)
+        for attempt in range(1, self.max_attempts + 1):
+            self.breaker.before_call()
+            wait = self.limiter.reserve(estimated)
+            try:
+                if wait:
+                    await self.async_sleep(wait)
+                response = await request()
+            except Exception as exc:
+                if not is_retryable(exc):
+                    self._non_retryable(exc)
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.max_attempts:
+                    raise LLMUnavailableError(f"LLM request failed after {attempt} attempts") from exc
+                await self.async_sleep(self.backoff(attempt, exc))
+                continue
+            except BaseException:
+                self.breaker.abandon_trial()
+                raise
+            self.breaker.record_success()
+            self._settle(estimated, response)
+            return response
+
+    def _non_retryable(self, exc: Exception):
+        """
+        A non-retryable error: an API error means the provider answered
+        (so it is up); anything else never reached it.
+        """
+        if isinstance(exc, APIStatusError):
+            self.breaker.record_success()
+        else:
+            self.breaker.abandon_trial()
+
+    def _settle(self, estimated: int, response):
+        usage = getattr(response, "usage", None)
+        used = getattr(usage, "total_tokens", None)
+        if used is not None:
+            self.limiter.settle(estimated, used)
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def guard_for(model: str) -> LLMGuard:
+    """
+    The process-wide guard of a model, shared by every client using it.
+    """
+    with _guards_lock:
+        guard = _guards.get(model)
+        if guard is None:
+            requests, tokens = MODEL_LIMITS.get(model, DEFAULT_LIMITS)
+            guard = _guards[model] = LLMGuard(RateLimiter(requests, tokens), CircuitBreaker())
+        return guard
@@ -0,0 +1,377 @@
+# llm_pool.py
+import asyncio
+import importlib
+import os
+import threading
+import time
+import weakref
+
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+from llm import AsyncOpenAIClient, OpenAIClient
+
+
+class PoolMetrics:
+    """
+    Counters of one factory's HTTP connection pool (see snapshot()):
+    - in_use / peak_in_use: requests holding a connection
+    - requests, waited, wait_seconds, max_wait_seconds: time spent
+      waiting for a free connection (until the request's headers were
+      sent, less the time spent opening a new connection)
+    - connections_opened / tls_handshakes: new TCP connections and TLS
+      sessions; with keep-alive working these stay far below `requests`
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.requests = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+
+    def acquired(self, wait: float):
+        with self._lock:
+            self.requests += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if wait > 0.001:
+                self.waited += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+    def released(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def traced(self, event: str):
+        with self._lock:
+            if event == "connection.connect_tcp.complete":
+                self.connections_opened += 1
+            elif event == "connection.start_tls.complete":
+                self.tls_handshakes += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "requests": self.requests,
+                "waited": self.waited,
+                "wait_seconds": self.wait_seconds,
+                "max_wait_seconds": self.max_wait_seconds,
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+            }
+        stats["mean_wait_seconds"] = stats["wait_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+
+# -------------------------
+# Metered transports
+# -------------------------
+
+def _httpx():
+    """
+    The httpx package the OpenAI SDK is built on (the base class of its
+    DefaultHttpxClient), so we never depend on it ourselves.
+    """
+    return importlib.import_module(DefaultHttpxClient.__mro__[1].__module__.split(".")[0])
+
+
+# Limits and the pool timeout are the inner transport's own: a request
+# that cannot get a connection in time fails with the SDK's PoolTimeout.
+# The transports only meter them through httpcore's trace hook:
+# a request holds a connection from sending its headers until its
+# response stream is closed or garbage-collected, or the transport closes.
+
+CONNECTION_SETUP = ("connection.connect_tcp", "connection.start_tls")
+
+
+class _RequestMeter:
+    """
+    Metrics of one request: time spent waiting for a connection (before
+    its headers were sent, less connection setup) and the slot it holds.
+    """
+
+    def __init__(self, metrics: PoolMetrics, outstanding: set, lock: threading.Lock):
+        self.metrics = metrics
+        self.outstanding = outstanding
+        self.lock = lock
+        self.start = time.perf_counter()
+        self.setup = 0.0
+        self.setup_started = None
+        self.acquired = False
+        self.released = False
+
+    def observe(self, event: str):
+        self.metrics.traced(event)
+        name, _, stage = event.rpartition(".")
+        now = time.perf_counter()
+        if name in CONNECTION_SETUP:
+            if stage == "started":
+                self.setup_started = now
+            elif self.setup_started is not None:
+                self.setup += now - self.setup_started
+                self.setup_started = None
+        elif name.endswith(".send_request_headers") and stage == "started" and not self.acquired:
+            with self.lock:
+                self.acquired = True
+                self.outstanding.add(self)
+            self.metrics.acquired(now - self.start - self.setup)
+
+    def release(self):
+        with self.lock:
+            if not self.acquired or self.released:
+                return
+            self.released = True
+            self.outstanding.discard(self)
+        self.metrics.released()
+
+
+def _sync_trace(meter: _RequestMeter, chained):
+    def trace(event: str, info: dict):
+        meter.observe(event)
+        if chained is not None:
+            chained(event, info)
+    return trace
+
+
+def _async_trace(meter: _RequestMeter, chained):
+    async def trace(event: str, info: dict):
+        meter.observe(event)
+        if chained is not None:
+            await chained(event, info)
+    return trace
+
+
+def _release_on_close(stream, release):
+    close = type(stream).close
+    ref = weakref.ref(stream)  # the patched method must not keep the stream alive
+
+    def close_and_release():
+        try:
+            if ref() is not None:
+                close(ref())
+        finally:
+            release()
+    stream.close = close_and_release
+    weakref.finalize(stream, release)
+
+
+def _release_on_aclose(stream, release):
+    aclose = type(stream).aclose
+    ref = weakref.ref(stream)
+
+    async def aclose_and_release():
+        try:
+            if ref() is not None:
+                await aclose(ref())
+        finally:
+            release()
+    stream.aclose = aclose_and_release
+    weakref.finalize(stream, release)
+
+
+class MeteredTransport:
+    """
+    Wraps an httpx HTTPTransport to report its pool's use (see
+    PoolMetrics) without limiting it further. A trace hook already set
+    on a request is still called.
+    """
+
+    def __init__(self, inner, metrics: PoolMetrics):
+        self.inner = inner
+        self.metrics = metrics
+        self._outstanding = set()  # meters of requests holding a connection
+        self._lock = threading.Lock()
+
+    def handle_request(self, request):
+        meter = _RequestMeter(self.metrics, self._outstanding, self._lock)
+        request.extensions["trace"] = _sync_trace(meter, request.extensions.get("trace"))
+        try:
+            response = self.inner.handle_request(request)
+        except BaseException:
+            meter.release()
+            raise
+        _release_on_close(response.stream, meter.release)
+        return response
+
+    def close(self):
+        try:
+            self.inner.close()
+        finally:
+            _release_all(self._outstanding, self._lock)
+
+
+class AsyncMeteredTransport:
+    """
+    MeteredTransport for one event loop's AsyncClient.
+    """
+
+    def __init__(self, inner, metrics: PoolMetrics):
+        self.inner = inner
+        self.metrics = metrics
+        self._outstanding = set()
+        self._lock = threading.Lock()
+
+    async def handle_async_request(self, request):
+        meter = _RequestMeter(self.metrics, self._outstanding, self._lock)
+        request.extensions["trace"] = _async_trace(meter, request.extensions.get("trace"))
+        try:
+            response = await self.inner.handle_async_request(request)
+        except BaseException:
+            meter.release()
+            raise
+        _release_on_aclose(response.stream, meter.release)
+        return response
+
+    async def aclose(self):
+        try:
+            await self.inner.aclose()
+        finally:
+            _release_all(self._outstanding, self._lock)
+
+
+def _release_all(outstanding: set, lock: threading.Lock):
+    with lock:
+        meters = list(outstanding)
+    for meter in meters:
+        meter.release()
+
+
+# -------------------------
+# Factory
+# -------------------------
+
+class LLMClientFactory:
+    """
+    Source of LLM clients for everything in the process (Tutor,
+    FlashcardEngine, QuizReview, ...), all sharing one HTTP connection
+    pool, so concurrent sessions reuse warm keep-alive/TLS connections
+    instead of each OpenAIClient() opening its own.
+
+    - client(model) / async_client(model): one shared OpenAIClient /
+      AsyncOpenAIClient per model (the async client gets one pool per
+      event loop, as connections cannot move between loops)
+    - metrics: PoolMetrics of every pool created here
+
+    A request waits at most pool_timeout seconds for a free connection.
+    The SDK's own retries are off (max_retries=0): llm_guard retries.
+    Nothing is opened until the first client is asked for.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        timeout: float = 60.0,
+        connect_timeout: float = 5.0,
+        pool_timeout: float = 10.0,
+        cache=None
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.pool_timeout = pool_timeout
+        self.cache = cache
+        self.metrics = PoolMetrics()
+
+        self._openai = None
+        self._clients = {}
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def client(self, model: str = "gpt-4.1-mini") -> OpenAIClient:
+        with self._lock:
+            client = self._clients.get(model)
+            if client is None:
+                client = OpenAIClient(model=model, cache=self.cache, client=self._shared_openai())
+                self._clients[model] = client
+            return client
+
+    def async_client(self, model: str = "gpt-4.1-mini") -> AsyncOpenAIClient:
+        with self._lock:
+            client = self._async_clients.get(model)
+            if client is None:
+                client = AsyncOpenAIClient(model=model, cache=self.cache, make_client=self._new_async_openai)
+                self._async_clients[model] = client
+            return client
+
+    def stats(self) -> dict:
+        return self.metrics.snapshot()
+
+    def close(self):
+        """
+        Close the sync pool. Async pools close with their event loop.
+        """
+        with self._lock:
+            if self._openai is not None:
+                self._openai.close()
+            self._openai = None
+            self._clients.clear()
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+
+    def _http_options(self) -> tuple:
+        httpx = _httpx()
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        return httpx, limits, httpx.Timeout(self.timeout, connect=self.connect_timeout, pool=self.pool_timeout)
+
+    def _shared_openai(self) -> OpenAI:
+        if self._openai is None:
+            httpx, limits, timeout = self._http_options()
+            transport = MeteredTransport(httpx.HTTPTransport(limits=limits), self.metrics)
+            self._openai = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=DefaultHttpxClient(transport=transport, timeout=timeout),
+                max_retries=0
+            )
+        return self._openai
+
+    def _new_async_openai(self) -> AsyncOpenAI:
+        httpx, limits, timeout = self._http_options()
+        transport = AsyncMeteredTransport(httpx.AsyncHTTPTransport(limits=limits), self.metrics)
+        return AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=DefaultAsyncHttpxClient(transport=transport, timeout=timeout),
+            max_retries=0
+        )
+
+
+_default_factory = None
+_default_factory_lock = threading.Lock()
+
+
+def get_default_factory() -> LLMClientFactory:
+    """
+    The process-wide factory, created on first use.
+    """
+    global _default_factory
+    with _default_factory_lock:
+        if _default_factory is None:
+            _default_factory = LLMClientFactory()
+        return _default_factory
+
+
+def get_llm(model: str = "gpt-4.1-mini") -> OpenAIClient:
+    """
+    Shortcut for get_default_factory().client().
+    """
+    return get_default_factory().client(model)
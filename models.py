@@ -0,0 +1,336 @@
+# models.py
+from collections.abc import MutableMapping
+from dataclasses import MISSING, dataclass, fields
+from functools import lru_cache
+
+from due_index import epoch_from_iso, iso_from_epoch
+
+# Cards created together share their date strings; parse each once
+_parse_iso = lru_cache(maxsize=4096)(epoch_from_iso)
+
+
+class Record(MutableMapping):
+    """
+    Base of the model classes: __slots__ dataclasses that can still be
+    read and written like the dicts they replace, so code using
+    card["front"] or card.get("interval", 1) keeps working.
+
+    - Each canonical field is a slot; keys that are not fields go to
+      `extra`, so records round-trip losslessly.
+    - ALIASES maps older key names to a field ("interval" -> "interval_days").
+    - TIMESTAMPS maps ISO date keys to an integer epoch field
+      ("next_review" -> "due_ts"): reads return the ISO string, writes
+      parse it once.
+    - When a stored dict has both a field and an older key for it, the
+      field wins.
+    - A field set to None is absent for `key in record`, iteration,
+      record.get(key, default) and setdefault(); record[key] returns None
+      (as for a dict that stored None) and only raises KeyError for keys
+      that are neither fields nor in `extra`.
+    """
+
+    __slots__ = ()
+
+    FIELDS = ()              # canonical field names (set by @model)
+    FIELD_SET = frozenset()
+    ALIASES = {}
+    TIMESTAMPS = {}
+    KEYS = {}                # any accepted key -> field (set by @model)
+
+    # -------------------------
+    # Codecs
+    # -------------------------
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from a stored dict (canonical, aliased or ISO keys).
+        Generated per class by @model (see _codec_source).
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def coerce(cls, value):
+        """
+        `value` itself if it already is a record of this class, else from_dict(value).
+        """
+        return value if isinstance(value, cls) else cls.from_dict(value)
+
+    def to_dict(self) -> dict:
+        """
+        Canonical keys only, absent (None) fields left out.
+        Generated per class by @model (see _codec_source).
+        """
+        raise NotImplementedError
+
+    # -------------------------
+    # Mapping interface
+    # -------------------------
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            return getattr(self, key)
+
+        name = self.TIMESTAMPS.get(key)
+        if name is not None:
+            value = getattr(self, name)
+            return None if value is None else iso_from_epoch(value)
+
+        name = self.ALIASES.get(key)
+        if name is not None:
+            return getattr(self, name)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            return self[key] is not None
+        except KeyError:
+            return False
+
+    def get(self, key, default=None):
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def setdefault(self, key, default=None):
+        value = self.get(key)
+        if value is None:
+            self[key] = value = default
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self.FIELD_SET:
+            setattr(self, key, value)
+            return
+
+        name = self.TIMESTAMPS.get(key)
+        if name is not None:
+            setattr(self, name, _parse_iso(value) if value else None)
+            return
+
+        name = self.ALIASES.get(key)
+        if name is not None:
+            setattr(self, name, value)
+            return
+
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if self.extra and key in self.extra:
+            del self.extra[key]
+            return
+        name = self.TIMESTAMPS.get(key) or self.ALIASES.get(key) or key
+        setattr(self, name, None)
+
+    def __iter__(self):
+        for name in self.FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def _codec_source(cls, defaults: dict) -> str:
+    """
+    Source of a class's from_dict / to_dict, unrolled over its fields the
+    way dataclasses generates __init__: one dict lookup or attribute read
+    per field instead of a loop that checks every key for aliases and ISO
+    dates. A dict that only has canonical keys (what the stores write) goes
+    straight to the dataclass __init__.
+    """
+    lines = [
+        "def from_dict(cls, data):",
+        "    if FIELD_SET.issuperset(data):",
+        "        return cls(**data)",
+        "    if not KEY_SET.issuperset(data):",
+        "        return from_dict_with_extra(cls, data)",
+        "    get = data.get",
+        "    self = new(cls)",
+    ]
+    lines += [f"    self.{name} = get({name!r}, {defaults[name]!r})" for name in cls.FIELDS]
+    lines.append("    self.extra = None")
+    for key, name in cls.ALIASES.items():
+        lines.append(f"    if {key!r} in data and {name!r} not in data:")
+        lines.append(f"        self.{name} = data[{key!r}]")
+    for key, name in cls.TIMESTAMPS.items():
+        lines.append(f"    if {key!r} in data and {name!r} not in data:")
+        lines.append(f"        value = data[{key!r}]")
+        lines.append(f"        self.{name} = parse_iso(value) if value else None")
+    lines.append("    return self")
+
+    lines.append("def to_dict(self):")
+    lines.append("    data = {}")
+    for name in cls.FIELDS:
+        lines.append(f"    if self.{name} is not None:")
+        lines.append(f"        data[{name!r}] = self.{name}")
+    lines.append("    if self.extra:")
+    lines.append("        data.update(self.extra)")
+    lines.append("    return data")
+    return "\n".join(lines) + "\n"
+
+
+def _from_dict_with_extra(cls, data):
+    """
+    from_dict for a dict with keys that are not fields: those go to `extra`.
+    """
+    known = {}
+    extra = {}
+    for key, value in data.items():
+        if key in cls.KEYS:
+            known[key] = value
+        else:
+            extra[key] = value
+    record = cls.from_dict(known)
+    record.extra = extra
+    return record
+
+
+def model(cls):
+    """
+    Class decorator: a __slots__ dataclass (compared like a mapping) with
+    FIELDS / FIELD_SET / KEYS filled in from its fields, `extra` excluded,
+    and generated from_dict / to_dict codecs.
+    """
+    cls = dataclass(slots=True, eq=False)(cls)
+    cls.FIELDS = tuple(f.name for f in fields(cls) if f.name != "extra")
+    cls.FIELD_SET = frozenset(cls.FIELDS)
+    cls.KEYS = {**{name: name for name in cls.FIELDS}, **cls.ALIASES, **cls.TIMESTAMPS}
+
+    defaults = {
+        f.name: None if f.default is MISSING else f.default
+        for f in fields(cls) if f.name != "extra"
+    }
+    namespace = {
+        "new": object.__new__,
+        "FIELD_SET": cls.FIELD_SET,
+        "KEY_SET": frozenset(cls.KEYS),
+        "parse_iso": _parse_iso,
+        "from_dict_with_extra": _from_dict_with_extra,
+    }
+    exec(_codec_source(cls, defaults), namespace)
+    cls.from_dict = classmethod(namespace["from_dict"])
+    cls.to_dict = namespace["to_dict"]
+    return cls
+
+
+# -------------------------
+# Flashcards
+# -------------------------
+
+@model
+class Flashcard(Record):
+    """
+    One flashcard and its SM-2 scheduling state. Times are epoch seconds.
+
+    The schedulers used to write different keys for the same value
+    ("interval" / "interval_days", "repetition" / "repetitions",
+    "ease" / "ease_factor", "due" / "next_review"); they are all
+    aliases of one field here.
+    """
+
+    id: str | None = None
+    front: str | None = None
+    back: str | None = None
+    created_ts: int | None = None
+    ease_factor: float | None = None
+    repetitions: int | None = None
+    interval_days: int | None = None
+    due_ts: int | None = None
+    last_reviewed_ts: int | None = None
+    extra: dict | None = None
+
+    ALIASES = {
+        "ease": "ease_factor",
+        "repetition": "repetitions",
+        "interval": "interval_days",
+    }
+    TIMESTAMPS = {
+        "created_at": "created_ts",
+        "due": "due_ts",
+        "next_review": "due_ts",
+        "last_reviewed": "last_reviewed_ts",
+    }
+
+
+# -------------------------
+# Quizzes
+# -------------------------
+
+@model
+class QuizAttempt(Record):
+    """
+    One quiz attempt in the compact layout (see QuizStore): question ids,
+    the learner's answers and a string of correctness bits.
+    """
+
+    ts: int | None = None
+    score: int | None = None
+    total: int | None = None
+    question_ids: list | None = None
+    answers: list | None = None
+    correct: str | None = None
+    extra: dict | None = None
+
+    TIMESTAMPS = {"timestamp": "ts"}
+
+
+@model
+class Answer(Record):
+    """
+    One answered question of an expanded attempt (QuizStore.expand_attempt).
+    """
+
+    question: str | None = None
+    answer: str | None = None
+    correct_answer: str | None = None
+    is_correct: bool | None = None
+    extra: dict | None = None
+
+
+# -------------------------
+# Stats and progress
+# -------------------------
+
+@model
+class SectionStats(Record):
+    """
+    Lifetime counters of one section (see LearningStats).
+    """
+
+    quiz_attempts: int = 0
+    quiz_correct: int = 0
+    quiz_incorrect: int = 0
+    flashcard_reviews: int = 0
+    flashcard_good: int = 0
+    flashcard_again: int = 0
+    extra: dict | None = None
+
+    def add(self, **deltas):
+        for name, delta in deltas.items():
+            setattr(self, name, getattr(self, name) + delta)
+
+
+@model
+class SectionProgress(Record):
+    """
+    Completion state of one section (see ProgressManager).
+    """
+
+    completed: bool | None = None
+    quiz_score: int | None = None
+    quiz_total: int | None = None
+    last_attempt_ts: int | None = None
+    extra: dict | None = None
+
+    TIMESTAMPS = {"last_attempt": "last_attempt_ts"}
@@ -0,0 +1,278 @@
+# persistence.py
+import atexit
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from serialization import dumps, loads
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows: locking is skipped
+    fcntl = None
+
+
+# -------------------------
+# Crash-safe JSON files
+# -------------------------
+
+# Durability levels for atomic_write, weakest (fastest) first, named
+# after the last step they take:
+# - "atomic":     write a temp file and rename it over the target. A
+#                 crashed process never leaves a truncated file, but after
+#                 a power loss the OS may not have written the new
+#                 contents yet.
+# - "fsync-file": also fsync the temp file before the rename, so the
+#                 renamed file always has its full contents; the rename
+#                 itself may still be lost on power loss.
+# - "fsync-dir":  also fsync the parent directory after the rename, so
+#                 the rename survives a power loss too (on platforms that
+#                 can open a directory; elsewhere like "fsync-file").
+DURABILITY_LEVELS = ("atomic", "fsync-file", "fsync-dir")
+DURABILITY_ALIASES = {"none": "atomic", "flush": "fsync-file", "fsync": "fsync-dir"}  # earlier names
+DURABILITY_ENV = "AI_TUTOR_DURABILITY"
+
+
+def _durability_level(level: str) -> str:
+    level = DURABILITY_ALIASES.get(level, level)
+    if level not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability level: {level!r} (expected one of {DURABILITY_LEVELS})")
+    return level
+
+
+try:
+    _durability = _durability_level(os.environ.get(DURABILITY_ENV, "fsync-file"))
+except ValueError:
+    _durability = "fsync-file"
+
+
+class CorruptFileError(ValueError):
+    """
+    A store file exists but cannot be parsed. Raised instead of silently
+    starting over, which would overwrite the learner's data on next save.
+    """
+
+    def __init__(self, path: str, error: Exception):
+        super().__init__(f"{path} is corrupted ({error}); fix or move it aside")
+        self.path = path
+
+
+def set_durability(level: str):
+    """
+    Set the process-wide durability level (see DURABILITY_LEVELS).
+    """
+    global _durability
+    _durability = _durability_level(level)
+
+
+def get_durability() -> str:
+    return _durability
+
+
+def read_json(path, default=None):
+    """
+    Parse a state file in any serialization format (detected from its
+    header); `default` if it does not exist.
+    Raises CorruptFileError if it cannot be parsed.
+    """
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read())
+    except FileNotFoundError:
+        return default
+    except (ValueError, KeyError, TypeError, struct.error) as e:
+        raise CorruptFileError(str(path), e) from e
+
+
+def atomic_write(path, payload: str | bytes, durability: str | None = None):
+    """
+    Replace `path` with `payload` (text or bytes) through a temp file and
+    a rename, so readers and crashes only ever see the old or the new
+    contents.
+    """
+    durability = _durability_level(durability) if durability else _durability
+    directory = os.path.dirname(os.path.abspath(path))
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            if durability != "atomic":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if durability == "fsync-dir" and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_json(path, data, durability: str | None = None, indent: int | None = 2, fmt: str | None = None):
+    """
+    Serialize first, then atomic_write: a failing dumps never touches the file.
+    `fmt` defaults to the process-wide format (see serialization.FORMATS).
+    """
+    atomic_write(path, dumps(data, fmt, indent), durability)
+
+
+@contextmanager
+def file_lock(path, shared: bool = False):
+    """
+    Hold an advisory fcntl lock on `path` + ".lock" across processes.
+    Exclusive by default; a no-op where fcntl is unavailable.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def update_json(path, merge, default=None, durability: str | None = None, indent: int | None = 2):
+    """
+    Read-modify-write under an exclusive lock: merge(current contents or
+    `default`) returns the data to write, which is also returned. Another
+    process's changes made since we loaded the file are therefore merged
+    instead of overwritten.
+    """
+    with file_lock(path):
+        merged = merge(read_json(path, default))
+        write_json(path, merged, durability, indent)
+    return merged
+
+
+# -------------------------
+# Write-behind queue
+# -------------------------
+
+class WriteBehindQueue:
+    """
+    Coalescing write-behind queue shared by the stores.
+
+    Instead of rewriting their file on every change, stores created with
+    `write_behind=queue` only mark themselves dirty. Repeated changes to
+    the same store are merged into one write, performed by a background
+    thread once the oldest pending change is `max_staleness` seconds old,
+    or earlier at an explicit flush() (end of quiz, end of session) and
+    at interpreter exit.
+
+    A store only needs a `flush()` method that writes its current state;
+    it snapshots that state under its own lock, as flush() runs on the
+    background thread while the learner keeps changing it. A store
+    whose flush() raises is reported and stays dirty for the next round,
+    and the rest of the batch is still written.
+    """
+
+    def __init__(self, max_staleness: float = 2.0):
+        self.max_staleness = max_staleness
+        self._dirty = {}  # id(store) -> (store, time first marked dirty)
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # one writer at a time
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def mark_dirty(self, store):
+        """
+        Schedule a store to be written. O(1); never touches the disk.
+        """
+        with self._cond:
+            if id(store) not in self._dirty:
+                self._dirty[id(store)] = (store, time.monotonic())
+                self._cond.notify()
+
+    def pending(self) -> int:
+        """Number of stores waiting to be written."""
+        with self._cond:
+            return len(self._dirty)
+
+    def flush(self):
+        """
+        Write every dirty store now and wait for it to finish.
+        """
+        with self._cond:
+            stores = [store for store, _ in self._dirty.values()]
+            self._dirty.clear()
+
+        self._write(stores)
+
+    def close(self):
+        """
+        Stop the background thread after flushing pending writes.
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+
+    def _write(self, stores):
+        with self._write_lock:
+            for i, store in enumerate(stores):
+                try:
+                    store.flush()
+                except Exception as e:
+                    print(f"Warning: could not save {type(store).__name__}: {e!r}")
+                    self.mark_dirty(store)
+                except BaseException:
+                    for unwritten in stores[i:]:
+                        self.mark_dirty(unwritten)
+                    raise
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return
+
+                if not self._dirty:
+                    self._cond.wait()
+                    continue
+
+                now = time.monotonic()
+                oldest = min(marked for _, marked in self._dirty.values())
+                delay = oldest + self.max_staleness - now
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                due = [
+                    key for key, (_, marked) in self._dirty.items()
+                    if now - marked >= self.max_staleness
+                ]
+                stores = [self._dirty.pop(key)[0] for key in due]
+
+            self._write(stores)
@@ -0,0 +1,94 @@
+# prefetch.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Prefetcher:
+    """
+    Runs work ahead of the learner on a small thread pool.
+
+    Each job is keyed (e.g. ("quiz", title, difficulty, num_questions));
+    result(key, fn, *args) hands over the finished (or still running)
+    job for that key, or calls fn(*args) itself when nothing was
+    prefetched or the prefetch failed. Keys should capture every input
+    that matters, so a job started with outdated inputs is never used.
+
+    Jobs whose key is no longer wanted (the route changed) are dropped
+    with retain(); queued ones are cancelled, running ones finish and
+    their results are thrown away.
+
+    submitted / used / missed / discarded / failed are counted in
+    `counters`.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._futures = {}  # key -> Future
+        self._lock = threading.Lock()
+        self.counters = {"submitted": 0, "used": 0, "missed": 0, "discarded": 0, "failed": 0}
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Start fn(*args, **kwargs) in the background unless `key` is
+        already scheduled. Returns the job's Future.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self.executor.submit(fn, *args, **kwargs)
+                self._futures[key] = future
+                self.counters["submitted"] += 1
+            return future
+
+    def result(self, key, fn, *args, **kwargs):
+        """
+        The prefetched result for `key` (waiting for it if needed), else
+        fn(*args, **kwargs) run in the calling thread.
+        """
+        with self._lock:
+            future = self._futures.pop(key, None)
+            if future is None:
+                self.counters["missed"] += 1
+
+        if future is not None:
+            try:
+                value = future.result()
+            except Exception:
+                with self._lock:
+                    self.counters["failed"] += 1
+            else:
+                with self._lock:
+                    self.counters["used"] += 1
+                return value
+
+        return fn(*args, **kwargs)
+
+    def done(self, key) -> bool:
+        """
+        Whether a job for `key` exists and has finished.
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            return future is not None and future.done()
+
+    def pending(self) -> list:
+        with self._lock:
+            return list(self._futures)
+
+    def retain(self, keep):
+        """
+        Drop every job whose key fails the `keep(key)` predicate.
+        """
+        with self._lock:
+            stale = [key for key in self._futures if not keep(key)]
+            for key in stale:
+                self._futures.pop(key).cancel()
+            self.counters["discarded"] += len(stale)
+
+    def close(self):
+        self.retain(lambda key: False)
+        self.executor.shutdown(wait=False, cancel_futures=True)
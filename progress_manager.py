@@ -1,36 +1,71 @@
 # progress_manager.py
-import json
-import os
-from datetime import datetime
+import threading
+import time
 from typing import Dict
 
+import data_layout
+from models import SectionProgress
+from persistence import read_json, update_json
+
 
 class ProgressManager:
     """
     Handles loading, updating, and saving learner progress
-    to persistent storage (JSON file).
+    to persistent storage (JSON file). Each section's entry is a
+    models.SectionProgress record.
+
+    The file defaults to progress.json in the user's directory under the
+    data root (see data_layout), so every learner has their own. Saves
+    merge the sections changed here into the file under a lock, keeping
+    sections saved meanwhile by other processes.
     """
 
-    def __init__(self, file_path: str = "progress.json", user_id: str = "default"):
+    VIEW_NAME = "progress"  # event log view
+
+    def __init__(
+        self,
+        file_path: str | None = None,
+        user_id: str = "default",
+        db=None,
+        event_log=None,
+        write_behind=None,
+        data_root: str | None = None
+    ):
+        if file_path is None and db is None and event_log is None:
+            file_path = data_layout.user_path(user_id, data_layout.PROGRESS_FILE, data_root)
         self.file_path = file_path
         self.user_id = user_id
-        self.progress = self._load_progress()
+        self.db = db  # optional database.Database
+        self.event_log = event_log  # optional event_log.EventLog
+        self.write_behind = write_behind  # optional persistence.WriteBehindQueue
+        self._dirty_sections = set()  # changed since the last file save
+        self._lock = threading.RLock()  # held while changing or snapshotting sections
+
+        if self.event_log is not None:
+            self.event_log.attach(self)
+        else:
+            self.progress = self._load_progress()
 
     # -------------------------
     # Core persistence methods
     # -------------------------
 
     def _load_progress(self) -> Dict:
-        """Load progress from disk or initialize a new structure."""
-        if os.path.exists(self.file_path):
-            try:
-                with open(self.file_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except json.JSONDecodeError:
-                # Corrupted file fallback
-                return self._empty_progress()
-        else:
-            return self._empty_progress()
+        """
+        Load progress from disk or initialize a new structure.
+        A corrupted file raises persistence.CorruptFileError.
+        """
+        if self.db is not None:
+            return self._to_models(self.db.load_progress(self.user_id))
+        return self._to_models(read_json(self.file_path) or self._empty_progress())
+
+    @staticmethod
+    def _to_models(progress: Dict) -> Dict:
+        """Convert stored section entries to SectionProgress records in place."""
+        sections = progress["sections"]
+        for title, entry in sections.items():
+            sections[title] = SectionProgress.coerce(entry)
+        return progress
 
     def _empty_progress(self) -> Dict:
         """Initial empty progress structure."""
@@ -41,8 +76,54 @@ class ProgressManager:
 
     def save_progress(self) -> None:
         """Persist progress to disk."""
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.progress, f, indent=2)
+        if self.event_log is not None:
+            self.event_log.append(
+                self.VIEW_NAME, "progress_saved", sections=self.progress["sections"]
+            )
+            return
+        if self.db is not None:
+            self.db.upsert_section_progress(self.user_id, self.progress["sections"])
+            return
+
+        sections = self.progress["sections"]
+        with self._lock:
+            # Without tracked changes (explicit full save) every section is ours
+            dirty = set(self._dirty_sections) or set(sections)
+            self._dirty_sections -= dirty
+            ours = {title: sections[title] for title in dirty if title in sections}
+
+        def merge(current):
+            current = current or self._empty_progress()
+            current["sections"].update(ours)
+            return current
+
+        try:
+            merged = update_json(self.file_path, merge)
+        except BaseException:
+            with self._lock:
+                self._dirty_sections |= dirty
+            raise
+
+        # Adopt sections saved by other processes
+        with self._lock:
+            for title, entry in merged["sections"].items():
+                if title not in self._dirty_sections:
+                    sections[title] = SectionProgress.coerce(entry)
+
+    def flush(self) -> None:
+        """
+        Write progress to disk now.
+        With a database or event log every change is already persisted.
+        """
+        if self.db is not None or self.event_log is not None:
+            return
+        self.save_progress()
+
+    def _save(self) -> None:
+        if self.write_behind is not None:
+            self.write_behind.mark_dirty(self)
+        else:
+            self.save_progress()
 
     # -------------------------
     # Section-level operations
@@ -62,13 +143,42 @@ class ProgressManager:
         """
         Update progress for a section after quiz completion.
         """
-        self.progress["sections"][section_title] = {
-            "completed": True,
-            "quiz_score": quiz_score,
-            "quiz_total": quiz_total,
-            "last_attempt": datetime.utcnow().isoformat()
-        }
-        self.save_progress()
+        self._store_section(section_title, SectionProgress(
+            completed=True,
+            quiz_score=quiz_score,
+            quiz_total=quiz_total,
+            last_attempt_ts=int(time.time())
+        ))
+
+    def mark_section_completed(self, section_title: str) -> None:
+        """
+        Mark a section as completed, keeping any recorded quiz score.
+        """
+        if self.is_section_completed(section_title):
+            return
+
+        entry = SectionProgress.from_dict(self.get_section_progress(section_title))
+        entry.completed = True
+        if entry.last_attempt_ts is None:
+            entry.last_attempt_ts = int(time.time())
+        self._store_section(section_title, entry)
+
+    def _store_section(self, section_title: str, entry: SectionProgress) -> None:
+        """Replace one section's progress and persist only that change."""
+        if self.event_log is not None:
+            self.event_log.append(
+                self.VIEW_NAME, "section_completed", section=section_title, entry=entry
+            )
+            return
+
+        if self.db is not None:
+            self.progress["sections"][section_title] = entry
+            self.db.upsert_section_progress(self.user_id, {section_title: entry})
+        else:
+            with self._lock:
+                self.progress["sections"][section_title] = entry
+                self._dirty_sections.add(section_title)
+            self._save()
 
     def get_section_progress(self, section_title: str) -> Dict:
         """Retrieve stored progress for a specific section."""
@@ -94,3 +204,20 @@ class ProgressManager:
                 if total_sections > 0 else 0.0
             )
         }
+
+    # -------------------------
+    # Event log view
+    # -------------------------
+
+    def restore_state(self, state) -> None:
+        self.progress = self._to_models(state or self._empty_progress())
+
+    def snapshot_state(self) -> Dict:
+        return self.progress
+
+    def apply_event(self, event: Dict) -> None:
+        if event["type"] == "section_completed":
+            self.progress["sections"][event["section"]] = SectionProgress.coerce(event["entry"])
+        elif event["type"] == "progress_saved":
+            self.progress["sections"] = dict(event["sections"])
+            self._to_models(self.progress)
@@ -0,0 +1,289 @@
+# question_bank.py
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import data_layout
+from llm import fallback_quiz
+from persistence import read_json, update_json
+
+
+def question_key(text: str) -> str:
+    """
+    Hash of a question's normalized text (case, punctuation and spacing
+    ignored), so rephrasings that only differ in those count as one.
+    """
+    normalized = " ".join(re.sub(r"[^\w\s]", " ", text.casefold()).split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def validate_question(question) -> dict | None:
+    """
+    {"question", "correct_answer"} with both non-empty, else None.
+    """
+    if not isinstance(question, Mapping):
+        return None
+    text = question.get("question")
+    answer = question.get("correct_answer")
+    if not isinstance(text, str) or not text.strip():
+        return None
+    if not isinstance(answer, str) or not answer.strip():
+        return None
+    return {"question": text.strip(), "correct_answer": answer.strip()}
+
+
+class QuestionBank:
+    """
+    Pre-generated quiz questions per (section, difficulty), shared by all
+    learners, so starting a quiz does not wait for the LLM.
+
+    - draw() samples a quiz from the pool, preferring questions not in
+      the learner's `exclude` set (recently seen), and only calls the LLM
+      itself when the pool cannot fill a quiz yet (cold start).
+    - When fewer than `low_water` unseen questions are left after a draw,
+      a refill runs on a background worker: one generate_quiz() call of
+      `batch_size` questions, validated and deduplicated by question_key().
+    - Pools keep their newest `max_pool_size` questions and are saved to
+      one JSON file under the data root (QUESTION_BANK_FILE), merged under
+      a lock so several processes can fill it; section contents are kept
+      too, for refills and the offline fill job (see main).
+
+    Each generation request lists up to `avoid_limit` of the pool's
+    newest questions to avoid, which steers the model towards new ones
+    (and keeps it from being answered by the LLM response cache).
+
+    served / cold_misses / refills / added / duplicates / invalid are
+    counted in `counters`.
+    """
+
+    def __init__(
+        self,
+        llm,
+        path: str | None = None,
+        data_root: str | None = None,
+        low_water: int = 6,
+        batch_size: int = 5,
+        max_pool_size: int = 200,
+        avoid_limit: int = 30,
+        workers: int = 1
+    ):
+        self.llm = llm
+        self.path = path or os.path.join(
+            data_layout.resolve_data_root(data_root), data_layout.QUESTION_BANK_FILE
+        )
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.max_pool_size = max_pool_size
+        self.avoid_limit = avoid_limit
+
+        self.pools = {}     # section -> difficulty -> key -> question
+        self.contents = {}  # section -> content
+        self._adopt(read_json(self.path, {}))
+
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="question-bank")
+        self._refilling = set()
+        self._lock = threading.RLock()
+        self.counters = {"served": 0, "cold_misses": 0, "refills": 0, "added": 0, "duplicates": 0, "invalid": 0}
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def size(self, section_title: str, difficulty: str) -> int:
+        with self._lock:
+            return len(self.pools.get(section_title, {}).get(difficulty, {}))
+
+    def draw(
+        self,
+        section_title: str,
+        section_content: str,
+        difficulty: str = "normal",
+        num_questions: int = 3,
+        exclude: set = frozenset()
+    ) -> dict:
+        """
+        A quiz ({"questions": [...]}) of num_questions from the pool.
+        Unseen questions (keys not in `exclude`) come first; seen ones
+        only fill the gap.
+        """
+        self._remember_content(section_title, section_content)
+
+        if self.size(section_title, difficulty) < num_questions:
+            with self._lock:
+                self.counters["cold_misses"] += 1
+            quiz = self.fill_once(section_title, difficulty, max(num_questions, self.batch_size))
+            if self.size(section_title, difficulty) < num_questions:
+                return quiz  # LLM unavailable or too few valid questions: serve as generated
+
+        with self._lock:
+            pool = self.pools[section_title][difficulty]
+            fresh = [key for key in pool if key not in exclude]
+            seen = [key for key in pool if key in exclude]
+            picked = random.sample(fresh, min(num_questions, len(fresh)))
+            if len(picked) < num_questions:
+                picked += random.sample(seen, num_questions - len(picked))
+            questions = [dict(pool[key]) for key in picked]
+            self.counters["served"] += 1
+
+        if len(fresh) - len(questions) < self.low_water:
+            self.refill_async(section_title, difficulty)
+        return {"questions": questions}
+
+    def ensure(self, section_title: str, section_content: str, difficulty: str, num_questions: int = 3):
+        """
+        Refill in the background if the pool holds fewer than
+        num_questions + low_water questions (e.g. ahead of a quiz).
+        """
+        self._remember_content(section_title, section_content)
+        if self.size(section_title, difficulty) < num_questions + self.low_water:
+            self.refill_async(section_title, difficulty)
+
+    def refill_async(self, section_title: str, difficulty: str):
+        """
+        Schedule one refill of the pool unless one is already pending.
+        """
+        key = (section_title, difficulty)
+        with self._lock:
+            if key in self._refilling or section_title not in self.contents:
+                return
+            self._refilling.add(key)
+        self.executor.submit(self._refill, section_title, difficulty)
+
+    def fill_once(self, section_title: str, difficulty: str, count: int | None = None) -> dict:
+        """
+        Generate one batch of questions into the pool; returns the quiz
+        as generated.
+        """
+        count = count or self.batch_size
+        with self._lock:
+            pool = self.pools.get(section_title, {}).get(difficulty, {})
+            avoid = [question["question"] for question in list(pool.values())[-self.avoid_limit:]]
+        quiz = self.llm.generate_quiz(
+            section_title,
+            self.contents.get(section_title, ""),
+            difficulty=difficulty,
+            num_questions=count,
+            avoid=avoid or None
+        )
+        if quiz != fallback_quiz(section_title):  # the offline placeholder is never banked
+            self.add(section_title, difficulty, quiz.get("questions", []))
+        return quiz
+
+    def fill(self, section_title: str, section_content: str, difficulty: str, target: int, max_rounds: int = 20) -> int:
+        """
+        Fill a pool up to `target` questions (offline job); stops early
+        when rounds stop adding new questions. Returns the pool size.
+        """
+        self._remember_content(section_title, section_content)
+        stale_rounds = 0
+        for _ in range(max_rounds):
+            before = self.size(section_title, difficulty)
+            if before >= target or stale_rounds >= 3:
+                break
+            self.fill_once(section_title, difficulty)
+            stale_rounds = stale_rounds + 1 if self.size(section_title, difficulty) == before else 0
+        return self.size(section_title, difficulty)
+
+    def add(self, section_title: str, difficulty: str, questions: list) -> int:
+        """
+        Validate, deduplicate and store questions; returns how many were new.
+        """
+        added = {}
+        with self._lock:
+            pool = self.pools.setdefault(section_title, {}).setdefault(difficulty, {})
+            for question in questions:
+                question = validate_question(question)
+                if question is None:
+                    self.counters["invalid"] += 1
+                    continue
+                key = question_key(question["question"])
+                if key in pool or key in added:
+                    self.counters["duplicates"] += 1
+                    continue
+                added[key] = question
+            self.counters["added"] += len(added)
+
+        if added:
+            self._save(section_title, difficulty, added)
+        return len(added)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+
+    def _refill(self, section_title: str, difficulty: str):
+        try:
+            with self._lock:
+                self.counters["refills"] += 1
+            self.fill_once(section_title, difficulty)
+        except Exception:
+            pass  # the next draw below the low-water mark retries
+        finally:
+            with self._lock:
+                self._refilling.discard((section_title, difficulty))
+
+    def _remember_content(self, section_title: str, section_content: str):
+        with self._lock:
+            if self.contents.get(section_title) == section_content:
+                return
+            self.contents[section_title] = section_content
+        self._save()
+
+    def _adopt(self, state: dict):
+        self.pools = state.get("pools", {})
+        self.contents = state.get("contents", {})
+
+    def _save(self, section_title: str | None = None, difficulty: str | None = None, added: dict | None = None):
+        with self._lock:
+            contents = dict(self.contents)
+
+        def merge(current):
+            current = current or {}
+            pools = current.setdefault("pools", {})
+            current.setdefault("contents", {}).update(contents)
+            if added:
+                pool = pools.setdefault(section_title, {}).setdefault(difficulty, {})
+                pool.update(added)
+                # Newest last: keep the last max_pool_size
+                for key in list(pool)[:max(0, len(pool) - self.max_pool_size)]:
+                    del pool[key]
+            return current
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        merged = update_json(self.path, merge, indent=None)
+        with self._lock:
+            self._adopt(merged)  # questions other processes added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate the quiz question bank.")
+    parser.add_argument("--sections", required=True, help='JSON file: [{"title": ..., "content": ...}]')
+    parser.add_argument("--difficulty", nargs="+", default=["easy", "normal", "hard"])
+    parser.add_argument("--per-pool", type=int, default=30, help="target questions per (section, difficulty)")
+    parser.add_argument("--data-root", default=None)
+    args = parser.parse_args()
+
+    from llm_pool import get_llm
+
+    with open(args.sections, encoding="utf-8") as f:
+        sections = json.load(f)
+
+    bank = QuestionBank(get_llm(), data_root=args.data_root)
+    for section in sections:
+        for difficulty in args.difficulty:
+            size = bank.fill(section["title"], section["content"], difficulty, args.per_pool)
+            print(f"{section['title']} [{difficulty}]: {size} questions")
+    bank.close()
+
+
+if __name__ == "__main__":
+    main()
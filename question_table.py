@@ -0,0 +1,68 @@
+# question_table.py
+import hashlib
+import json
+
+
+def question_id(question: dict) -> str:
+    """
+    Content hash of a quiz question: the same question text, answer and
+    options always get the same id, whichever quiz they came from.
+    """
+    normalized = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in question.items()
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class QuestionTable:
+    """
+    Content-addressed table of quiz questions (id -> question dict).
+
+    Quiz attempts refer to questions by id, so a question asked in many
+    attempts (retakes, banked questions) is stored once. Questions added
+    since the last save are tracked so only they need to be persisted.
+    """
+
+    def __init__(self, questions: dict | None = None):
+        self.questions = dict(questions or {})
+        self._unsaved = {}
+
+    def __contains__(self, qid):
+        return qid in self.questions
+
+    def __len__(self):
+        return len(self.questions)
+
+    def get(self, qid: str, default=None):
+        return self.questions.get(qid, default)
+
+    def add(self, question: dict) -> str:
+        """
+        Store a question (if new) and return its id.
+        """
+        qid = question_id(question)
+        if qid not in self.questions:
+            self.questions[qid] = question
+            self._unsaved[qid] = question
+        return qid
+
+    def update(self, questions: dict):
+        """
+        Merge questions loaded from storage (they are already saved).
+        """
+        self.questions.update(questions)
+
+    def take_unsaved(self) -> dict:
+        """
+        Return the questions added since the last call and forget them.
+        """
+        unsaved, self._unsaved = self._unsaved, {}
+        return unsaved
+
+    def restore_unsaved(self, questions: dict):
+        """
+        Put back questions whose save failed.
+        """
+        self._unsaved.update(questions)
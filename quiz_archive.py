@@ -0,0 +1,121 @@
+# quiz_archive.py
+import argparse
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import shutil
+
+from persistence import atomic_write
+from serialization import json_default
+
+CODECS = {
+    "gzip": (".jsonl.gz", gzip.open),
+    "lzma": (".jsonl.xz", lzma.open),
+}
+
+
+class QuizArchive:
+    """
+    Cold storage for old quiz attempts.
+
+    Each archival run writes one compressed, immutable segment per section
+    (JSON lines, gzip or lzma) next to the earlier ones:
+
+        <directory>/<section hash>/<seq>.jsonl.gz
+
+    Nothing is read until a section's archived attempts are asked for,
+    and then they are streamed one segment at a time.
+    """
+
+    def __init__(self, directory: str, codec: str = "gzip"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec!r} (expected one of {sorted(CODECS)})")
+        self.directory = directory
+        self.codec = codec
+
+    @staticmethod
+    def _section_dir_name(section: str) -> str:
+        return hashlib.sha1(section.encode("utf-8")).hexdigest()[:16]
+
+    def _section_dir(self, section: str) -> str:
+        return os.path.join(self.directory, self._section_dir_name(section))
+
+    def segments(self, section: str) -> list:
+        """
+        Segment paths of a section, oldest first.
+        """
+        directory = self._section_dir(section)
+        if not os.path.isdir(directory):
+            return []
+        names = [
+            name for name in os.listdir(directory)
+            if any(name.endswith(ext) for ext, _ in CODECS.values())
+        ]
+        return [os.path.join(directory, name) for name in sorted(names)]
+
+    def append(self, section: str, attempts: list) -> str | None:
+        """
+        Write attempts as a new segment of the section. Returns its path.
+        """
+        if not attempts:
+            return None
+
+        directory = self._section_dir(section)
+        os.makedirs(directory, exist_ok=True)
+        existing = self.segments(section)
+        seq = int(os.path.basename(existing[-1]).split(".")[0]) + 1 if existing else 1
+
+        ext, opener = CODECS[self.codec]
+        path = os.path.join(directory, f"{seq:06d}{ext}")
+        tmp_path = path + ".tmp"
+        with opener(tmp_path, "wt", encoding="utf-8") as f:
+            for attempt in attempts:
+                f.write(json.dumps(attempt, separators=(",", ":"), default=json_default) + "\n")
+        os.replace(tmp_path, path)
+
+        # Readable pointer back to the section name
+        atomic_write(os.path.join(directory, "section.txt"), section)
+        return path
+
+    def iter_attempts(self, section: str):
+        """
+        Yield the section's archived attempts, oldest first, streaming.
+        """
+        for path in self.segments(section):
+            opener = gzip.open if path.endswith(".gz") else lzma.open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def delete(self, section: str | None = None):
+        """
+        Drop the archive of one section, or of every section.
+        """
+        path = self.directory if section is None else self._section_dir(section)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move old quiz attempts into compressed archive segments."
+    )
+    parser.add_argument("--user", action="append", required=True, help="user id (repeatable)")
+    parser.add_argument("--days", type=int, default=180, help="archive attempts older than this")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="gzip")
+    parser.add_argument("--data-root", default=None)
+    args = parser.parse_args()
+
+    from quiz_store import QuizStore
+
+    for user_id in args.user:
+        store = QuizStore(user_id=user_id, data_root=args.data_root)
+        moved = store.archive_older_than(days=args.days, codec=args.codec)
+        print(f"{user_id}: archived {moved} attempts")
+
+
+if __name__ == "__main__":
+    main()
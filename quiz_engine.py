@@ -1,11 +1,20 @@
 from learning_stats import LearningStats
-
-def run_quiz(quiz: dict, *, section: str, user_id: str = "user_id") -> tuple[int, int, list]:
+from store_registry import get_store
+
+def run_quiz(
+    quiz: dict,
+    *,
+    section: str,
+    user_id: str = "user_id",
+    stats: LearningStats | None = None
+) -> tuple[int, int, list]:
     score = 0
     total = len(quiz["questions"])
     user_answers = []
 
-    stats = LearningStats(user_id=user_id)
+    # Share the caller's stats instance so updates are not lost between copies
+    if stats is None:
+        stats = get_store(LearningStats, user_id)
 
 
     for q in quiz["questions"]:
@@ -29,6 +38,9 @@ def run_quiz(quiz: dict, *, section: str, user_id: str = "user_id") -> tuple[int
             correct=correct
         )
 
+    if stats.write_behind is not None:
+        stats.write_behind.flush()  # end of quiz
+
     print("\n--- Quiz Results ---")
     print(f"Score: {score} / {total}")
 
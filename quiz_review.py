@@ -1,4 +1,5 @@
 from quiz_store import QuizStore
+from store_registry import default_registry
 import random
 
 
@@ -7,8 +8,13 @@ class QuizReview:
     Handles reviewing past quizzes outside the AI tutoring flow.
     """
 
-    def __init__(self, user_id="default"):
-        self.store = QuizStore(user_id=user_id)
+    def __init__(self, user_id="default", registry=None, llm=None):
+        """
+        llm: optional client (e.g. llm_pool.get_llm()) used to explain
+        missed questions; see explain_missed.
+        """
+        self.store = (registry or default_registry).get(QuizStore, user_id)
+        self.llm = llm
 
     def list_sections(self):
         """
@@ -19,17 +25,18 @@ class QuizReview:
 
     def review_section(self, section_title: str):
         """
-        Review all quiz attempts for a given section.
+        Review all quiz attempts for a given section, archived ones
+        included (see QuizStore.iter_attempts).
         """
-        quizzes = self.store.get_quizzes_for_section(section_title)
-
-        if not quizzes:
+        if not self.store.has_section(section_title):
             print(f"No quizzes found for section '{section_title}'.")
             return []
 
         print(f"\n=== Quiz Review: {section_title} ===")
 
-        for attempt_idx, attempt in enumerate(quizzes, start=1):
+        quizzes = []
+        for attempt_idx, attempt in enumerate(self.store.iter_attempts(section_title), start=1):
+            quizzes.append(attempt)
             score = attempt["score"]
             total = attempt["total"]
             answers = attempt["user_answers"]
@@ -44,19 +51,47 @@ class QuizReview:
 
         return quizzes
 
-    def random_question_review(self, section_title: str, limit: int = 3):
+    def explain_missed(self, section_title: str, quizzes=None):
         """
-        Randomly review past questions from a section.
+        Explain each distinct question missed in a section's attempts
+        (`quizzes`, e.g. review_section's result; default: all of them),
+        all in one batched request. Needs an llm.
+        Returns the explained (question, correct answer) pairs.
         """
-        quizzes = self.store.get_quizzes_for_section(section_title)
+        if self.llm is None:
+            return []
+        if quizzes is None:
+            quizzes = self.store.iter_attempts(section_title)
 
-        if not quizzes:
+        missed = {}  # question -> correct answer, first seen first
+        for attempt in quizzes:
+            for r in attempt["user_answers"]:
+                if not r["is_correct"]:
+                    missed.setdefault(r["question"], r["correct_answer"])
+        if not missed:
+            return []
+
+        batch = list(missed.items())
+        print(f"\n--- Explanations ({len(batch)} missed question(s)) ---")
+        try:
+            explanations = self.llm.explain_mistakes(batch)
+        except Exception:
+            print("Review unavailable (LLM offline). Please revisit the section content.")
+            return []
+        for (question, _), explanation in zip(batch, explanations):
+            print(f"\n{question}\n{explanation}")
+        return batch
+
+    def random_question_review(self, section_title: str, limit: int = 3):
+        """
+        Randomly review past questions from a section
+        (each distinct question at most once).
+        """
+        if not self.store.has_section(section_title):
             print(f"No quizzes found for section '{section_title}'.")
             return []
 
-        all_questions = []
-        for attempt in quizzes:
-            all_questions.extend(attempt["user_answers"])
+        all_questions = self.store.get_questions_for_section(section_title)
 
         if not all_questions:
             print("No questions available.")
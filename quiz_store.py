@@ -1,26 +1,242 @@
 # quiz_store.py
-import json
+import os
+import time
+from collections.abc import Mapping
+from contextlib import nullcontext
 from pathlib import Path
-from datetime import datetime
+
+import data_layout
+from due_index import DAY_SECONDS, epoch_from_iso
+from models import Answer, QuizAttempt
+from persistence import file_lock, read_json, update_json
+from question_table import QuestionTable
+from quiz_archive import QuizArchive
+from sharded_storage import ShardedSections
 
 
 class QuizStore:
-    def __init__(self, user_id="default"):
-        self.base_path = Path("data/quizzes")
-        self.base_path.mkdir(parents=True, exist_ok=True)
+    """
+    Quiz attempt history per user, grouped by section.
+
+    Without a database or event log, each section's attempts live in their
+    own file in the user's quizzes/ directory (see data_layout) and are
+    read the first time the section is accessed (see ShardedSections).
+    Attempts saved by another process to the same section are merged in
+    on save, ordered by timestamp.
+
+    Questions are kept once in a content-addressed QuestionTable; an
+    attempt (a models.QuizAttempt) only stores their ids, the learner's
+    answers and a string of correctness bits:
+    {"ts", "score", "total", "question_ids": [...], "answers": [...], "correct": "101"}
+    Older attempts with full "questions" / "user_answers" lists are
+    converted when loaded. Readers get the full layout back from
+    expand_attempt().
 
-        self.file_path = self.base_path / f"{user_id}_quizzes.json"
-        self.data = self._load()
+    archive_older_than() moves old attempts into compressed segments
+    (see QuizArchive). The section's manifest entry keeps a summary of
+    them ("archived", "archived_score", "archived_total",
+    "archived_until_ts"), and readers stream them back only when asked.
+    """
+
+    VIEW_NAME = "quizzes"  # event log view
+
+    def __init__(self, user_id="default", db=None, event_log=None, write_behind=None, data_root=None):
+        self.user_id = user_id
+        self.data_root = data_root
+        self.db = db  # optional database.Database
+        self.event_log = event_log  # optional event_log.EventLog
+        self.write_behind = write_behind  # optional persistence.WriteBehindQueue
+        self.questions = QuestionTable()
+        self.archive = None  # QuizArchive (file mode)
+        if self.event_log is not None:
+            self.event_log.attach(self)
+        else:
+            self.data = self._load()
 
     def _load(self) -> dict:
-        if self.file_path.exists():
-            with open(self.file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return {}
+        if self.db is not None:
+            self.questions.update(self.db.load_questions(self.user_id))
+            data = self.db.load_quiz_attempts(self.user_id)
+            for attempts in data.values():
+                self._compact_attempts(attempts)
+            self.db.upsert_questions(self.user_id, self.questions.take_unsaved())
+            return data
+
+        self.file_path = Path(data_layout.user_path(self.user_id, data_layout.QUIZZES_FILE, self.data_root))
+        self.shard_dir = Path(data_layout.user_path(self.user_id, data_layout.QUIZZES_DIR, self.data_root))
+        self.questions_path = data_layout.user_path(self.user_id, data_layout.QUESTIONS_FILE, self.data_root)
+        self.questions.update(read_json(self.questions_path, {}))
+        self.archive_dir = data_layout.user_path(self.user_id, data_layout.QUIZ_ARCHIVE_DIR, self.data_root)
+        self.archive = QuizArchive(self.archive_dir)
 
-    def _save(self):
-        with open(self.file_path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=2)
+        sections = ShardedSections(
+            str(self.shard_dir),
+            on_load=self._on_shard_load,
+            merge=self._merge_attempts
+        )
+        if not len(sections) and self.file_path.exists():
+            # Split an old single-file history into per-section shards
+            legacy = read_json(self.file_path)
+            for attempts in legacy.values():
+                self._compact_attempts(attempts)
+            sections.import_sections(legacy)
+            self._save_questions()
+            sections.save()
+            os.replace(self.file_path, str(self.file_path) + ".migrated")
+        return sections
+
+    def _on_shard_load(self, section_title: str, attempts: list):
+        if self._compact_attempts(attempts):
+            self._save(section_title)
+
+    # -------------------------
+    # Question table
+    # -------------------------
+
+    def _build_attempt(self, ts: int | None, score: int, total: int, questions: list, user_answers: list) -> QuizAttempt:
+        """
+        Compact attempt: questions go to the table, the attempt keeps ids.
+        """
+        question_ids = [self.questions.add(question) for question in questions]
+
+        answers = []
+        correct = []
+        for i, ua in enumerate(user_answers):
+            if isinstance(ua, Mapping):
+                answer = ua.get("answer", "")
+                is_correct = ua.get("is_correct")
+            else:
+                answer, is_correct = ua, None
+            if is_correct is None and i < len(questions):
+                is_correct = str(answer).strip().lower() == str(questions[i].get("correct_answer", "")).strip().lower()
+            answers.append(answer)
+            correct.append("1" if is_correct else "0")
+
+        return QuizAttempt(
+            ts=ts,
+            score=score,
+            total=total,
+            question_ids=question_ids,
+            answers=answers,
+            correct="".join(correct),
+        )
+
+    def _compact_attempts(self, attempts: list) -> bool:
+        """
+        Convert stored attempts to QuizAttempt records in place.
+        Returns True if any was in the full layout (and so changed).
+        """
+        changed = False
+        for i, attempt in enumerate(attempts):
+            if isinstance(attempt, QuizAttempt):
+                continue
+            if "question_ids" in attempt:
+                attempts[i] = QuizAttempt.from_dict(attempt)
+            else:
+                timestamp = attempt.get("timestamp")
+                attempts[i] = self._build_attempt(
+                    epoch_from_iso(timestamp) if timestamp else None,
+                    attempt.get("score"),
+                    attempt.get("total"),
+                    attempt.get("questions", []),
+                    attempt.get("user_answers", [])
+                )
+                changed = True
+        return changed
+
+    def _save_questions(self):
+        unsaved = self.questions.take_unsaved()
+        if not unsaved:
+            return
+        try:
+            merged = update_json(self.questions_path, lambda current: {**(current or {}), **unsaved}, indent=None)
+        except BaseException:
+            self.questions.restore_unsaved(unsaved)
+            raise
+        self.questions.update(merged)  # questions other processes added
+
+    def get_question(self, question_id: str) -> dict:
+        """
+        Question by id (re-reading the table once if another process added it).
+        """
+        question = self.questions.get(question_id)
+        if question is None and self.db is None and self.event_log is None:
+            self.questions.update(read_json(self.questions_path, {}))
+            question = self.questions.get(question_id)
+        return question or {"question": "", "correct_answer": ""}
+
+    def expand_attempt(self, attempt: QuizAttempt) -> dict:
+        """
+        Full layout of an attempt: "questions" and "user_answers" (Answer
+        records) with the question text and correct answer of each answer.
+        """
+        questions = [self.get_question(qid) for qid in attempt.question_ids]
+        user_answers = [
+            Answer(
+                question=question.get("question"),
+                answer=answer,
+                correct_answer=question.get("correct_answer"),
+                is_correct=bit == "1",
+            )
+            for question, answer, bit in zip(questions, attempt.answers, attempt.correct)
+        ]
+        return {
+            "timestamp": attempt.get("timestamp"),
+            "score": attempt.score,
+            "total": attempt.total,
+            "questions": questions,
+            "user_answers": user_answers,
+        }
+
+    def _merge_attempts(self, section_title: str, disk_attempts: list, attempts: list) -> list:
+        """
+        Our attempts plus those only on disk (saved by another process),
+        leaving out attempts that have been archived.
+        """
+        self._compact_attempts(disk_attempts)
+
+        # Timestamps are whole seconds: compare the attempt's content too
+        def key(attempt):
+            return (
+                attempt.ts, attempt.score, attempt.total, attempt.correct,
+                tuple(attempt.question_ids or ()), tuple(map(str, attempt.answers or ()))
+            )
+
+        ours = {key(attempt) for attempt in attempts}
+        merged = attempts + [a for a in disk_attempts if key(a) not in ours]
+
+        archived_until = self._archived_until(section_title)
+        if archived_until:
+            merged = [a for a in merged if (a.ts or 0) > archived_until]
+        merged.sort(key=lambda attempt: attempt.ts or 0)
+        return merged
+
+    def _data_lock(self):
+        """
+        Lock of the sharded history (see ShardedSections.lock), so the
+        write-behind thread never snapshots a half-applied change.
+        """
+        if isinstance(self.data, ShardedSections):
+            return self.data.lock
+        return nullcontext()
+
+    def _save(self, section_title: str | None = None):
+        if section_title is not None:
+            self.data.mark_dirty(section_title)
+        if self.write_behind is not None:
+            self.write_behind.mark_dirty(self)
+        else:
+            self.flush()
+
+    def flush(self):
+        """
+        Write changed sections of the quiz history to disk now.
+        With a database or event log every change is already persisted.
+        """
+        if self.db is not None or self.event_log is not None:
+            return
+        self._save_questions()  # before attempts that refer to them
+        self.data.save()
 
     def save_quiz_attempt(
         self,
@@ -30,19 +246,148 @@ class QuizStore:
         total: int,
         user_answers: list
     ):
-        attempt = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "score": score,
-            "total": total,
-            "questions": quiz["questions"],
-            "user_answers": user_answers
-        }
+        attempt = self._build_attempt(
+            int(time.time()), score, total, quiz["questions"], user_answers
+        )
 
-        self.data.setdefault(section_title, []).append(attempt)
-        self._save()
+        if self.event_log is not None:
+            self.event_log.append(
+                self.VIEW_NAME, "attempt_saved", section=section_title,
+                attempt=attempt, questions=self.questions.take_unsaved()
+            )
+            return
 
-    def get_quizzes_for_section(self, section_title: str):
-        return self.data.get(section_title, [])
+        with self._data_lock():
+            self.data.setdefault(section_title, []).append(attempt)
+        if self.db is not None:
+            self.db.upsert_questions(self.user_id, self.questions.take_unsaved())
+            self.db.insert_quiz_attempt(self.user_id, section_title, attempt)
+        else:
+            self._save(section_title)
+
+    def get_quizzes_for_section(self, section_title: str, include_archived: bool = True):
+        """
+        All attempts of a section in the full layout (see expand_attempt),
+        archived ones included unless include_archived=False.
+        """
+        return list(self.iter_attempts(section_title, include_archived))
+
+    def iter_attempts(self, section_title: str, include_archived: bool = True):
+        """
+        Yield a section's attempts oldest first in the full layout;
+        archived attempts are streamed from their segments.
+        """
+        for attempt in self._iter_compact(section_title, include_archived):
+            yield self.expand_attempt(attempt)
+
+    def iter_stored_attempts(self, section_title: str, include_archived: bool = True):
+        """
+        Yield a section's attempts oldest first as stored (QuizAttempt
+        records, question ids only), archived ones included unless
+        include_archived=False.
+        """
+        return self._iter_compact(section_title, include_archived)
+
+    def _iter_compact(self, section_title: str, include_archived: bool = True):
+        archived_until = 0
+        if include_archived and self._archived_count(section_title):
+            for attempt in self.archive.iter_attempts(section_title):
+                yield QuizAttempt.from_dict(attempt)
+            archived_until = self._archived_until(section_title)
+
+        for attempt in self.data.get(section_title, []):
+            # Left in the hot shard by a writer that had not seen the archival yet
+            if archived_until and (attempt.ts or 0) <= archived_until:
+                continue
+            yield attempt
+
+    def _archive_meta(self, section_title: str) -> dict:
+        if self.archive is None or not isinstance(getattr(self, "data", None), ShardedSections):
+            return {}
+        return self.data.meta(section_title)
+
+    def _archived_count(self, section_title: str) -> int:
+        return self._archive_meta(section_title).get("archived", 0)
+
+    def _archived_until(self, section_title: str) -> int:
+        return self._archive_meta(section_title).get("archived_until_ts", 0)
+
+    def _latest_compact(self, section_title: str):
+        attempts = self.data.get(section_title, [])
+        if attempts:
+            return attempts[-1]
+        latest = None
+        for latest in self._iter_compact(section_title):
+            pass
+        return latest
+
+    def archive_older_than(self, days: int = 180, codec: str = "gzip", now: float | None = None) -> int:
+        """
+        Move attempts older than `days` into compressed archive segments,
+        leaving a summary per section. Returns how many were moved.
+
+        Only the JSON file store has an archive; the database keeps
+        history in indexed rows and the event log is its own archive.
+        """
+        if self.archive is None:
+            return 0
+
+        now = time.time() if now is None else now
+        cutoff = int(now) - days * DAY_SECONDS
+        archive = QuizArchive(self.archive_dir, codec)
+        moved = 0
+
+        with file_lock(self.archive_dir):
+            for section_title in list(self.data):
+                attempts = self.data[section_title]
+                old = [a for a in attempts if (a.ts or 0) < cutoff]
+                if not old:
+                    continue
+
+                # An interrupted run may have archived some without saving the shard
+                meta = self.data.meta(section_title)
+                archived_until = meta.get("archived_until_ts", 0)
+                new = [a for a in old if (a.ts or 0) > archived_until]
+                archive.append(section_title, new)
+
+                with self.data.lock:
+                    attempts[:] = [a for a in attempts if (a.ts or 0) >= cutoff]
+                if new:
+                    self.data.update_meta(
+                        section_title,
+                        archived=meta.get("archived", 0) + len(new),
+                        archived_score=meta.get("archived_score", 0) + sum(a.score or 0 for a in new),
+                        archived_total=meta.get("archived_total", 0) + sum(a.total or 0 for a in new),
+                        archived_until_ts=max(a.ts or 0 for a in new)
+                    )
+                else:
+                    self.data.mark_dirty(section_title)
+                moved += len(new)
+
+            self.flush()
+
+        return moved
+
+    def recent_questions(self, section_title: str, attempts: int = 3) -> list:
+        """
+        Questions of the section's last `attempts` stored attempts.
+        """
+        return [
+            self.get_question(qid)
+            for attempt in self.data.get(section_title, [])[-attempts:]
+            for qid in attempt["question_ids"]
+        ]
+
+    def get_questions_for_section(self, section_title: str) -> list:
+        """
+        Distinct questions asked in a section, in first-asked order.
+        """
+        seen = {}
+        for attempt in self._iter_compact(section_title):
+            for qid in attempt["question_ids"]:
+                if qid not in seen:
+                    seen[qid] = self.get_question(qid)
+        return list(seen.values())
 
     # -------------------------
     # Step 4: Review & Access Helpers
@@ -58,21 +403,26 @@ class QuizStore:
         """
         Check if a section has any quiz attempts.
         """
-        return section_title in self.data and len(self.data[section_title]) > 0
+        return self.get_attempt_count(section_title) > 0
 
     def get_latest_attempt(self, section_title: str):
         """
         Return the most recent quiz attempt for a section.
         """
-        attempts = self.data.get(section_title, [])
-        return attempts[-1] if attempts else None
+        latest = self._latest_compact(section_title)
+        return self.expand_attempt(latest) if latest else None
 
     def get_attempt_count(self, section_title: str | None = None) -> int:
         """
-        Count quiz attempts.
+        Count quiz attempts (archived ones included).
         - Per section if provided
         - Total otherwise
         """
+        if isinstance(self.data, ShardedSections):
+            if section_title:
+                return self.data.count(section_title) + self._archived_count(section_title)
+            return sum(self.data.count(s) + self._archived_count(s) for s in self.data)
+
         if section_title:
             return len(self.data.get(section_title, []))
 
@@ -82,16 +432,17 @@ class QuizStore:
         """
         Return incorrectly answered questions from the latest attempt.
         """
-        latest = self.get_latest_attempt(section_title)
+        latest = self._latest_compact(section_title)
         if not latest:
             return []
 
         incorrect = []
-        for q, ua in zip(latest["questions"], latest["user_answers"]):
-            if ua.lower() != q["correct_answer"].lower():
+        for qid, answer, bit in zip(latest["question_ids"], latest["answers"], latest["correct"]):
+            if bit == "0":
+                q = self.get_question(qid)
                 incorrect.append({
                     "question": q["question"],
-                    "your_answer": ua,
+                    "your_answer": answer,
                     "correct_answer": q["correct_answer"]
                 })
 
@@ -101,14 +452,56 @@ class QuizStore:
         """
         Delete all quiz attempts for a section.
         """
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "attempts_cleared", section=section_title)
+            return
         if section_title in self.data:
             del self.data[section_title]
-            self._save()
+            if self.db is not None:
+                self.db.delete_quiz_attempts(self.user_id, section_title)
+            else:
+                self.archive.delete(section_title)
+                self._save()
 
     def clear_all(self):
         """
         Delete all quiz history.
         """
-        self.data = {}
-        self._save()
+        if self.event_log is not None:
+            self.event_log.append(self.VIEW_NAME, "attempts_cleared", section=None)
+            return
+        self.data.clear()
+        if self.db is not None:
+            self.db.delete_quiz_attempts(self.user_id)
+        else:
+            self.archive.delete()
+            self._save()
+
+    # -------------------------
+    # Event log view
+    # -------------------------
+
+    def restore_state(self, state):
+        state = state or {}
+        if state.get("version") == 2:
+            self.questions = QuestionTable(state["questions"])
+            self.data = state["attempts"]
+        else:
+            self.data = state  # snapshot from before the question table
+        for attempts in self.data.values():
+            self._compact_attempts(attempts)
+
+    def snapshot_state(self) -> dict:
+        return {"version": 2, "attempts": self.data, "questions": self.questions.questions}
 
+    def apply_event(self, event: dict):
+        if event["type"] == "attempt_saved":
+            self.questions.update(event.get("questions", {}))
+            added = [event["attempt"]]
+            self._compact_attempts(added)
+            self.data.setdefault(event["section"], []).extend(added)
+        elif event["type"] == "attempts_cleared":
+            if event["section"] is None:
+                self.data = {}
+            else:
+                self.data.pop(event["section"], None)
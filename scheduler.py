@@ -0,0 +1,226 @@
+# scheduler.py
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # optional: batches fall back to plain Python
+    np = None
+
+DAY_SECONDS = 24 * 60 * 60
+DEFAULT_EASE = 2.5
+MIN_EASE_FACTOR = 1.3
+
+# Batches at least this large use NumPy when it is installed
+VECTORIZE_THRESHOLD = 64
+
+
+# -------------------------
+# Batch SM-2 core
+# -------------------------
+
+def sm2_batch(ease, repetitions, interval, quality, now: int | None = None, max_interval: int | None = None):
+    """
+    Apply one SM-2 Lite review to a batch of cards.
+
+    All arguments are equal-length sequences (lists, arrays or NumPy
+    arrays): ease factor, repetitions, interval in days and review quality
+    (0–5). Returns (ease, repetitions, interval, due_ts) with due_ts in
+    epoch seconds. Large batches are computed with NumPy in one pass.
+    """
+    now = int(time.time()) if now is None else now
+
+    if np is not None and len(quality) >= VECTORIZE_THRESHOLD:
+        return _sm2_numpy(ease, repetitions, interval, quality, now, max_interval)
+    return _sm2_python(ease, repetitions, interval, quality, now, max_interval)
+
+
+def _sm2_numpy(ease, repetitions, interval, quality, now, max_interval):
+    q = np.asarray(quality, dtype=np.int64)
+    if ((q < 0) | (q > 5)).any():
+        raise ValueError("Quality must be between 0 and 5")
+
+    ef = np.asarray(ease, dtype=np.float64)
+    reps = np.asarray(repetitions, dtype=np.int64)
+    iv = np.asarray(interval, dtype=np.int64)
+
+    success = q >= 3
+    reps = np.where(success, reps + 1, 0)
+    grown = np.rint(iv * ef).astype(np.int64)
+    iv = np.where(reps <= 1, 1, np.where(reps == 2, 6, grown))
+    if max_interval is not None:
+        iv = np.minimum(iv, max_interval)
+
+    miss = 5 - q
+    ef = np.maximum(MIN_EASE_FACTOR, np.round(ef + (0.1 - miss * (0.08 + miss * 0.02)), 2))
+
+    return ef, reps, iv, now + iv * DAY_SECONDS
+
+
+def _sm2_python(ease, repetitions, interval, quality, now, max_interval):
+    out_ef, out_reps, out_iv, out_due = [], [], [], []
+
+    for ef, reps, iv, q in zip(ease, repetitions, interval, quality):
+        if not 0 <= q <= 5:
+            raise ValueError("Quality must be between 0 and 5")
+
+        if q < 3:
+            reps = 0
+            iv = 1
+        else:
+            reps += 1
+            if reps == 1:
+                iv = 1
+            elif reps == 2:
+                iv = 6
+            else:
+                iv = round(iv * ef)
+        if max_interval is not None:
+            iv = min(iv, max_interval)
+
+        ef = ef + (0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+        ef = max(MIN_EASE_FACTOR, round(ef, 2))
+
+        out_ef.append(ef)
+        out_reps.append(reps)
+        out_iv.append(iv)
+        out_due.append(now + iv * DAY_SECONDS)
+
+    return out_ef, out_reps, out_iv, out_due
+
+
+# -------------------------
+# Per-card wrapper
+# -------------------------
+
+def schedule_card(
+    card: dict,
+    quality: int,
+    *,
+    ease_key: str = "ease_factor",
+    repetitions_key: str = "repetitions",
+    interval_key: str = "interval",
+    now: int | None = None,
+    max_interval: int | None = None
+) -> dict:
+    """
+    Apply one review to a single card dict through sm2_batch.
+
+    The key arguments name the card fields that hold the scheduling
+    state. Writes those fields plus "due_ts" and returns the card.
+    """
+    ef, reps, iv, due = sm2_batch(
+        [card.get(ease_key, DEFAULT_EASE)],
+        [card.get(repetitions_key, 0)],
+        [card.get(interval_key, 1)],
+        [quality],
+        now=now,
+        max_interval=max_interval
+    )
+
+    card[ease_key] = float(ef[0])
+    card[repetitions_key] = int(reps[0])
+    card[interval_key] = int(iv[0])
+    card["due_ts"] = int(due[0])
+    return card
+
+
+# -------------------------
+# Column store for whole decks
+# -------------------------
+
+class CardColumns:
+    """
+    Scheduling state of many cards held in parallel columns
+    (NumPy arrays when available, compact `array` columns otherwise).
+
+    Used for fleet-wide operations such as rescheduling every card of
+    every learner: build the columns once, apply a whole batch of
+    (card, quality) reviews in one call, then write the results back.
+    """
+
+    def __init__(self, ids, ease, repetitions, interval, due_ts):
+        self.ids = list(ids)
+        self._position = {card_id: i for i, card_id in enumerate(self.ids)}
+
+        if np is not None:
+            self.ease = np.asarray(ease, dtype=np.float64)
+            self.repetitions = np.asarray(repetitions, dtype=np.int64)
+            self.interval = np.asarray(interval, dtype=np.int64)
+            self.due_ts = np.asarray(due_ts, dtype=np.int64)
+        else:
+            self.ease = array("d", ease)
+            self.repetitions = array("q", repetitions)
+            self.interval = array("q", interval)
+            self.due_ts = array("q", due_ts)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_cards(cls, cards: list) -> "CardColumns":
+        """
+        Build columns from card dicts (they must have an "id").
+        """
+        return cls(
+            [card["id"] for card in cards],
+            [card.get("ease_factor", DEFAULT_EASE) for card in cards],
+            [card.get("repetitions", 0) for card in cards],
+            [card.get("interval", 1) for card in cards],
+            [card.get("due_ts", 0) for card in cards],
+        )
+
+    def review(self, card_ids: list, qualities: list, now: int | None = None, max_interval: int | None = None):
+        """
+        Apply a batch of (card id, quality) reviews in one vectorized call.
+        """
+        positions = [self._position[card_id] for card_id in card_ids]
+
+        if np is not None:
+            idx = np.asarray(positions, dtype=np.int64)
+            ef, reps, iv, due = sm2_batch(
+                self.ease[idx], self.repetitions[idx], self.interval[idx], qualities,
+                now=now, max_interval=max_interval
+            )
+            self.ease[idx] = ef
+            self.repetitions[idx] = reps
+            self.interval[idx] = iv
+            self.due_ts[idx] = due
+            return
+
+        ef, reps, iv, due = sm2_batch(
+            [self.ease[i] for i in positions],
+            [self.repetitions[i] for i in positions],
+            [self.interval[i] for i in positions],
+            qualities,
+            now=now,
+            max_interval=max_interval
+        )
+        for j, i in enumerate(positions):
+            self.ease[i] = ef[j]
+            self.repetitions[i] = reps[j]
+            self.interval[i] = iv[j]
+            self.due_ts[i] = due[j]
+
+    def write_back(self, cards: list):
+        """
+        Copy the columns back into the card dicts (matched by "id").
+        """
+        for card in cards:
+            i = self._position.get(card["id"])
+            if i is None:
+                continue
+            card["ease_factor"] = float(self.ease[i])
+            card["repetitions"] = int(self.repetitions[i])
+            card["interval"] = int(self.interval[i])
+            card["due_ts"] = int(self.due_ts[i])
+
+
+def review_cards(cards: list, qualities: list, now: int | None = None, max_interval: int | None = None) -> list:
+    """
+    Apply one review to each card (quality per card) in a single batch.
+    """
+    columns = CardColumns.from_cards(cards)
+    columns.review([card["id"] for card in cards], qualities, now=now, max_interval=max_interval)
+    columns.write_back(cards)
+    return cards
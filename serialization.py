@@ -0,0 +1,336 @@
+# serialization.py
+import argparse
+import json
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+import models
+
+# -------------------------
+# Formats
+# -------------------------
+
+# On-disk formats for user state, selected process-wide:
+# - "json":         pretty-printed JSON (the default; easiest to inspect)
+# - "json-compact": JSON without indentation or spaces
+# - "binary":       MAGIC header, then lists of model records as typed
+#                   columns plus one string table; other values as
+#                   compact JSON (see dumps_binary)
+# Readers detect the format from the first bytes, so files written in
+# different formats can be mixed and converted one at a time. File
+# names keep their .json extension whatever the format.
+FORMATS = ("json", "json-compact", "binary")
+FORMAT_ENV = "AI_TUTOR_FORMAT"
+MAGIC = b"ATB1"
+
+_format = os.environ.get(FORMAT_ENV, "json")
+if _format not in FORMATS:
+    _format = "json"
+
+
+def set_format(fmt: str):
+    """
+    Set the process-wide format new files are written in (see FORMATS).
+    """
+    global _format
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt!r} (expected one of {FORMATS})")
+    _format = fmt
+
+
+def get_format() -> str:
+    return _format
+
+
+def json_default(value):
+    """
+    json.dumps hook for the model records (see models.Record.to_dict).
+    """
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_dict()
+
+
+def dumps(data, fmt: str | None = None, indent: int | None = 2) -> bytes:
+    """
+    Encode `data` in `fmt` (default: the process-wide format).
+    `indent` applies to "json" only; callers pass None for files that
+    are never meant to be read by people.
+    """
+    fmt = fmt or _format
+    if fmt == "binary":
+        return dumps_binary(data)
+    if fmt == "json-compact":
+        return json.dumps(data, separators=(",", ":"), default=json_default).encode("utf-8")
+    if fmt == "json":
+        return json.dumps(data, indent=indent, default=json_default).encode("utf-8")
+    raise ValueError(f"Unknown format: {fmt!r} (expected one of {FORMATS})")
+
+
+def loads(payload: bytes):
+    """
+    Decode a payload written by dumps() in any format.
+    """
+    if payload[:len(MAGIC)] == MAGIC:
+        return loads_binary(payload)
+    return json.loads(payload)
+
+
+def detect_format(payload: bytes) -> str:
+    """
+    "binary" if the payload starts with MAGIC. Otherwise JSON, which is
+    "json-compact" if re-encoding it compactly gives the same bytes.
+    Short values such as [] read the same in both JSON formats and are
+    reported as "json-compact".
+    """
+    if payload[:len(MAGIC)] == MAGIC:
+        return "binary"
+    data = json.loads(payload)
+    return "json-compact" if dumps(data, "json-compact") == payload.strip() else "json"
+
+
+# -------------------------
+# Binary format
+# -------------------------
+
+# MAGIC, then one kind byte:
+#   b"J": compact JSON (values that are not a list of records)
+#   b"R": a record table, all integers little-endian:
+#       u16 length + model class name
+#       u32 rows, u16 columns
+#       string table: u32 count, u32 length (in characters) per string,
+#                     u32 byte length + the strings' UTF-8 concatenated
+#       per column (the class's FIELDS, then "extra"), one type byte:
+#         b"q" int64 / b"d" float64: u8 has-nulls, rows values,
+#                                    then rows null flags if has-nulls
+#                                    (columns of one type only, so ints
+#                                    and floats read back as written)
+#         b"s" string: rows int32 indexes into the table + 1 (0 = None)
+#         b"j" anything else: u32 byte length + one JSON array of values
+
+_HEADER = struct.Struct("<IH")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+
+def _packed(typecode: str, values) -> bytes:
+    column = array(typecode, values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column.tobytes()
+
+
+def _unpacked(typecode: str, payload) -> array:
+    column = array(typecode)
+    column.frombytes(payload)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+MODELS = {
+    cls.__name__: cls
+    for cls in (models.Flashcard, models.QuizAttempt, models.Answer, models.SectionStats, models.SectionProgress)
+}
+
+
+def _record_class(data):
+    """
+    The model class if `data` is a non-empty list of records of one class.
+    """
+    if not isinstance(data, list) or not data:
+        return None
+    cls = type(data[0])
+    if cls.__name__ not in MODELS or any(type(item) is not cls for item in data):
+        return None
+    return cls
+
+
+def _column_type(values) -> bytes:
+    kinds = {type(value) for value in values} - {type(None)}
+    if not kinds:
+        return b"s"
+    if kinds == {int}:
+        present = [value for value in values if value is not None]
+        if -2**63 <= min(present) and max(present) < 2**63:
+            return b"q"
+        return b"j"
+    if kinds == {float}:
+        return b"d"
+    if kinds == {str}:
+        return b"s"
+    return b"j"
+
+
+def dumps_binary(data) -> bytes:
+    cls = _record_class(data)
+    if cls is None:
+        return MAGIC + b"J" + json.dumps(data, separators=(",", ":"), default=json_default).encode("utf-8")
+
+    names = cls.FIELDS + ("extra",)
+    strings = {}  # string -> index
+    columns = []
+
+    for name in names:
+        values = [getattr(record, name) for record in data]
+        kind = _column_type(values)
+        if kind in (b"q", b"d"):
+            nulls = bytes(value is None for value in values)
+            has_nulls = any(nulls)
+            if has_nulls:
+                values = [0 if value is None else value for value in values]
+            column = [kind, _U8.pack(has_nulls), _packed(kind.decode(), values)]
+            if has_nulls:
+                column.append(nulls)
+        elif kind == b"s":
+            indexes = _packed("i", [
+                0 if value is None else strings.setdefault(value, len(strings)) + 1
+                for value in values
+            ])
+            column = [kind, indexes]
+        else:
+            blob = json.dumps(values, separators=(",", ":"), default=json_default).encode("utf-8")
+            column = [kind, _U32.pack(len(blob)), blob]
+        columns.append(b"".join(column))
+
+    name = cls.__name__.encode("utf-8")
+    table = "".join(strings).encode("utf-8")
+    return b"".join([
+        MAGIC, b"R",
+        _U16.pack(len(name)), name,
+        _HEADER.pack(len(data), len(names)),
+        _U32.pack(len(strings)), _packed("I", map(len, strings)),
+        _U32.pack(len(table)), table,
+        *columns,
+    ])
+
+
+def loads_binary(payload: bytes):
+    view = memoryview(payload)
+    kind = bytes(view[len(MAGIC):len(MAGIC) + 1])
+    pos = len(MAGIC) + 1
+    if kind == b"J":
+        return json.loads(bytes(view[pos:]))
+    if kind != b"R":
+        raise ValueError(f"Unknown binary payload kind: {kind!r}")
+
+    (name_len,) = _U16.unpack_from(view, pos)
+    pos += _U16.size
+    cls = MODELS[bytes(view[pos:pos + name_len]).decode("utf-8")]
+    pos += name_len
+    rows, column_count = _HEADER.unpack_from(view, pos)
+    pos += _HEADER.size
+
+    (count,) = _U32.unpack_from(view, pos)
+    pos += _U32.size
+    lengths = _unpacked("I", view[pos:pos + 4 * count])
+    pos += 4 * count
+    (table_len,) = _U32.unpack_from(view, pos)
+    pos += _U32.size
+    text = bytes(view[pos:pos + table_len]).decode("utf-8")
+    pos += table_len
+    ends = list(accumulate(lengths))
+    strings = [None] + [text[end - length:end] for end, length in zip(ends, lengths)]
+
+    columns = []
+    for _ in range(column_count):
+        kind = bytes(view[pos:pos + 1])
+        pos += 1
+        if kind in (b"q", b"d"):
+            (has_nulls,) = _U8.unpack_from(view, pos)
+            pos += _U8.size
+            values = _unpacked(kind.decode(), view[pos:pos + 8 * rows]).tolist()
+            pos += 8 * rows
+            if has_nulls:
+                nulls = bytes(view[pos:pos + rows])
+                pos += rows
+                values = [None if null else value for value, null in zip(values, nulls)]
+        elif kind == b"s":
+            indexes = _unpacked("i", view[pos:pos + 4 * rows])
+            pos += 4 * rows
+            values = list(map(strings.__getitem__, indexes))
+        elif kind == b"j":
+            (blob_len,) = _U32.unpack_from(view, pos)
+            pos += _U32.size
+            values = json.loads(bytes(view[pos:pos + blob_len]))
+            pos += blob_len
+        else:
+            raise ValueError(f"Unknown column type: {kind!r}")
+        columns.append(values)
+
+    # Columns are the dataclass fields in order, "extra" last
+    return [cls(*row) for row in zip(*columns)]
+
+
+# -------------------------
+# Converter
+# -------------------------
+
+def _shard_records(path: str, data):
+    """
+    A flashcard or quiz shard's items as model records, so "binary"
+    stores them as a record table the way the stores write them. Quiz
+    attempts still in the full layout are left for QuizStore to compact.
+    Any other data is returned unchanged.
+    """
+    import data_layout
+
+    if not isinstance(data, list) or not data or not all(isinstance(item, dict) for item in data):
+        return data
+    shard_dir = os.path.basename(os.path.dirname(path))
+    if shard_dir == data_layout.FLASHCARDS_DIR:
+        return [models.Flashcard.from_dict(item) for item in data]
+    if shard_dir == data_layout.QUIZZES_DIR and all("question_ids" in item for item in data):
+        return [models.QuizAttempt.from_dict(item) for item in data]
+    return data
+
+
+def convert_file(path: str, fmt: str) -> bool:
+    """
+    Rewrite one state file in `fmt`. Returns False if it already was.
+    """
+    from persistence import atomic_write, file_lock
+
+    with file_lock(path):
+        with open(path, "rb") as f:
+            payload = f.read()
+        indent = 2 if fmt == "json" else None
+        converted = dumps(_shard_records(path, loads(payload)), fmt, indent)
+        if converted == payload:
+            return False
+        atomic_write(path, converted)
+    return True
+
+
+def state_files(directory: str):
+    """
+    Yield the JSON-named state files under a directory.
+    """
+    for parent, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name.endswith(".json"):
+                yield os.path.join(parent, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert stored user state between formats.")
+    parser.add_argument("--to", choices=FORMATS, required=True, help="target format")
+    parser.add_argument("--data-root", default=None)
+    parser.add_argument("--user", action="append", help="user id (repeatable; default: every user)")
+    args = parser.parse_args()
+
+    import data_layout
+
+    users = args.user or list(data_layout.user_ids(args.data_root))
+    for user_id in users:
+        directory = data_layout.user_dir(user_id, args.data_root)
+        converted = sum(convert_file(path, args.to) for path in state_files(directory))
+        print(f"{user_id}: converted {converted} files to {args.to}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# sharded_storage.py
+import hashlib
+import os
+import threading
+from collections.abc import MutableMapping
+
+from persistence import atomic_write, file_lock, read_json, write_json
+from serialization import dumps
+
+
+class ShardedSections(MutableMapping):
+    """
+    Dict-like map of section -> list stored as one file per section
+    (in the process-wide format, see serialization) plus a small manifest.
+
+    Only the manifest is read at construction. A section's file is parsed
+    the first time the section is accessed, and save() rewrites only the
+    sections marked dirty, so startup and save cost scale with the
+    sections touched in a session rather than with lifetime history.
+
+    manifest.json:
+    {"sections": {section: {"file": "<hash>.json", "count": n, ...summary}}}
+
+    Files are replaced atomically and save() holds the manifest's lock
+    while it re-reads the manifest and merges in sections added or
+    removed by other processes. With a `merge` function, a dirty shard
+    that another process also changed is merged item-wise too;
+    otherwise the last writer of that section wins.
+
+    `lock` guards the dirty marks and is held while save() snapshots the
+    dirty sections; hold it to change a loaded section's items from one
+    thread while another (the write-behind queue) may be saving.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, directory: str, summarize=None, on_load=None, merge=None):
+        """
+        summarize(section, items) -> dict of extra manifest fields
+        on_load(section, items) is called when a section is first loaded
+        merge(section, disk_items, items) -> items to write
+        """
+        self.directory = directory
+        self.summarize = summarize
+        self.on_load = on_load
+        self.merge = merge
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.manifest_path = os.path.join(self.directory, self.MANIFEST)
+        self.manifest = read_json(self.manifest_path) or {"sections": {}}
+
+        self._loaded = {}         # section -> list
+        self._dirty = set()
+        self._removed = {}        # section -> file, deleted since the last save
+        self._meta_updates = {}   # section -> fields set by update_meta since the last save
+        self._manifest_dirty = False
+        self.lock = threading.RLock()
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+
+    @staticmethod
+    def _shard_file(section: str) -> str:
+        return hashlib.sha1(section.encode("utf-8")).hexdigest()[:16] + ".json"
+
+    def _entries(self) -> dict:
+        return self.manifest["sections"]
+
+    # -------------------------
+    # Mapping interface
+    # -------------------------
+
+    def __getitem__(self, section):
+        items = self._loaded.get(section)
+        if items is not None:
+            return items
+
+        entry = self._entries().get(section)
+        if entry is None:
+            raise KeyError(section)
+
+        items = read_json(os.path.join(self.directory, entry["file"])) or []
+        self._loaded[section] = items
+        if self.on_load is not None:
+            self.on_load(section, items)
+        return items
+
+    def __setitem__(self, section, items):
+        with self.lock:
+            self._loaded[section] = items
+            if section not in self._entries():
+                entry = {"file": self._shard_file(section), "count": 0}
+                self._entries()[section] = entry
+                self._removed.pop(section, None)
+            self.mark_dirty(section)
+
+    def __delitem__(self, section):
+        with self.lock:
+            entry = self._entries().pop(section)
+            self._loaded.pop(section, None)
+            self._dirty.discard(section)
+            self._removed[section] = entry["file"]
+            self._manifest_dirty = True
+
+    def __iter__(self):
+        return iter(list(self._entries()))
+
+    def __len__(self):
+        return len(self._entries())
+
+    def __contains__(self, section):
+        return section in self._entries()
+
+    def clear(self):
+        for section in list(self._entries()):
+            del self[section]
+
+    # -------------------------
+    # Sharding helpers
+    # -------------------------
+
+    def is_loaded(self, section: str) -> bool:
+        return section in self._loaded
+
+    def loaded(self) -> dict:
+        """Sections already in memory, without loading the others."""
+        return dict(self._loaded)
+
+    def meta(self, section: str) -> dict:
+        """Manifest entry of a section (count and summary), without loading it."""
+        return self._entries().get(section, {})
+
+    def count(self, section: str) -> int:
+        if section in self._loaded:
+            return len(self._loaded[section])
+        return self.meta(section).get("count", 0)
+
+    def update_meta(self, section: str, **fields):
+        """
+        Set extra manifest fields of a section (saved with the section).
+        """
+        with self.lock:
+            self._entries()[section].update(fields)
+            self._meta_updates.setdefault(section, {}).update(fields)
+            self.mark_dirty(section)
+
+    def mark_dirty(self, section: str):
+        with self.lock:
+            if section in self._entries():
+                self._dirty.add(section)
+                self._manifest_dirty = True
+
+    def save(self):
+        """
+        Write dirty sections and, if anything changed, the manifest.
+
+        The dirty marks are taken, and the sections serialized, under
+        `lock`; a section marked dirty again while the files are being
+        written therefore stays dirty for the next save. A failed save
+        restores its marks.
+        """
+        with self.lock:
+            dirty, self._dirty = self._dirty, set()
+            manifest_dirty, self._manifest_dirty = self._manifest_dirty, False
+            removed, self._removed = self._removed, {}
+            meta_updates = {section: self._meta_updates.pop(section) for section in dirty if section in self._meta_updates}
+            try:
+                # Serialize before touching any file
+                shards = {section: self._snapshot(section) for section in dirty}
+            except BaseException:
+                self._restore_marks(dirty, removed, meta_updates)
+                raise
+        if not shards and not removed and not manifest_dirty:
+            return
+
+        try:
+            manifest = self._write(shards, removed, meta_updates)
+        except BaseException:
+            with self.lock:
+                self._restore_marks(dirty, removed, meta_updates)
+            raise
+
+        # Pick up sections other processes added or removed
+        with self.lock:
+            entries = manifest["sections"]
+            previous = self._entries()
+            self.manifest = manifest
+            for section in self._dirty:  # changed while we were writing
+                if section in previous:
+                    entries[section] = previous[section]
+            for section in self._removed:  # deleted while we were writing
+                entries.pop(section, None)
+            for section in list(self._loaded):
+                if section not in entries and section not in self._dirty:
+                    del self._loaded[section]
+
+    def _snapshot(self, section: str):
+        items = self._loaded[section]
+        if self.merge is not None:
+            return list(items)  # merged with the file when written
+        return dumps(items), self._summary(section, items)
+
+    def _summary(self, section: str, items: list) -> dict:
+        summary = {"count": len(items)}
+        if self.summarize is not None:
+            summary.update(self.summarize(section, items))
+        return summary
+
+    def _restore_marks(self, dirty: set, removed: dict, meta_updates: dict):
+        self._dirty |= {section for section in dirty if section in self._entries()}
+        self._manifest_dirty = True
+        for section, name in removed.items():
+            if section not in self._entries():
+                self._removed.setdefault(section, name)
+        for section, fields in meta_updates.items():
+            self._meta_updates[section] = {**fields, **self._meta_updates.get(section, {})}
+
+    def _write(self, shards: dict, removed: dict, meta_updates: dict) -> dict:
+        """
+        Write the snapshot taken by save() under the manifest's lock and
+        return the merged manifest.
+        """
+        with file_lock(self.manifest_path):
+            manifest = read_json(self.manifest_path) or {"sections": {}}
+            entries = manifest["sections"]
+
+            for section, snapshot in shards.items():
+                with self.lock:
+                    entry = self._entries().get(section)
+                if entry is None:
+                    continue  # deleted since the snapshot
+                path = os.path.join(self.directory, entry["file"])
+
+                if self.merge is None:
+                    payload, summary = snapshot
+                    entry = {**entry, **summary}
+                else:
+                    disk_items = read_json(path, []) if section in entries else None
+                    with self.lock:
+                        items = self._loaded[section]
+                        if disk_items is not None:
+                            # Keep fields another process set since we loaded,
+                            # unless we set them ourselves (update_meta)
+                            entry = {**entries[section], **meta_updates.get(section, {})}
+                            self._entries()[section] = entry
+                            # Items added since the snapshot stay (the section is dirty again)
+                            taken = {id(item) for item in snapshot}
+                            later = [item for item in items if id(item) not in taken]
+                            items[:] = self.merge(section, disk_items, snapshot) + later
+                        payload = dumps(items)
+                        entry.update(self._summary(section, items))
+
+                atomic_write(path, payload)
+                entries[section] = entry
+
+            for section, name in removed.items():
+                entries.pop(section, None)
+                path = os.path.join(self.directory, name)
+                if os.path.exists(path):
+                    os.remove(path)
+
+            write_json(self.manifest_path, manifest)
+        return manifest
+
+    def import_sections(self, sections: dict):
+        """
+        Bulk-load a {section: items} dict (e.g. a legacy single-file store).
+        """
+        for section, items in sections.items():
+            self[section] = items
@@ -0,0 +1,102 @@
+# store_registry.py
+import threading
+
+from event_log import EventLog
+
+
+class StoreRegistry:
+    """
+    Identity map for the persistent stores.
+
+    Returns one shared instance per (store class, user_id), created on
+    first use. Tutor, FlashcardReview and the quiz engine all read and
+    write the same objects instead of each parsing the user's files and
+    later overwriting each other's updates.
+
+    The backend options are passed to every store the registry creates:
+    - db: database.Database
+    - write_behind: persistence.WriteBehindQueue
+    - event_log_dir: keep one event_log.EventLog per user in this directory
+    - data_root: root of the per-user JSON layout (see data_layout)
+    """
+
+    def __init__(
+        self,
+        db=None,
+        write_behind=None,
+        event_log_dir: str | None = None,
+        data_root: str | None = None
+    ):
+        self.db = db
+        self.write_behind = write_behind
+        self.event_log_dir = event_log_dir
+        self.data_root = data_root
+
+        self._stores = {}
+        self._event_logs = {}
+        self._lock = threading.RLock()
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def get(self, store_cls, user_id: str = "default"):
+        """
+        Return the shared store_cls instance for user_id, loading it once.
+        """
+        key = (store_cls, user_id)
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                store = store_cls(
+                    user_id=user_id,
+                    db=self.db,
+                    event_log=self.event_log(user_id),
+                    write_behind=self.write_behind,
+                    data_root=self.data_root
+                )
+                self._stores[key] = store
+            return store
+
+    def event_log(self, user_id: str):
+        """
+        Return the user's event log, or None when event logging is off.
+        """
+        with self._lock:
+            log = self._event_logs.get(user_id)
+            if log is None and self.event_log_dir is not None:
+                log = EventLog(user_id=user_id, base_dir=self.event_log_dir)
+                self._event_logs[user_id] = log
+            return log
+
+    def register_event_log(self, log: EventLog):
+        """
+        Use an existing event log for its user.
+        """
+        with self._lock:
+            self._event_logs[log.user_id] = log
+
+    def flush(self):
+        """
+        Write pending changes of every store to disk.
+        """
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    def clear(self):
+        """
+        Flush and forget all instances; the next get() reloads from disk.
+        """
+        self.flush()
+        with self._lock:
+            self._stores.clear()
+
+
+default_registry = StoreRegistry()
+
+
+def get_store(store_cls, user_id: str = "default"):
+    """
+    Shortcut for default_registry.get().
+    """
+    return default_registry.get(store_cls, user_id)
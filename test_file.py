@@ -1,5 +1,7 @@
 # test_file.py
-from llm import OpenAIClient
+from llm_cache import LLMCache
+from llm_pool import LLMClientFactory
+from prefetch import Prefetcher
 from tutor import Tutor
 from quiz_engine import run_quiz
 from quiz_store import QuizStore
@@ -26,14 +28,16 @@ if __name__ == "__main__":
     user_id = "test_user"
 
     # Initialize components
+    llm_factory = LLMClientFactory(cache=LLMCache())
     tutor = Tutor(
-        llm=OpenAIClient(),
+        llm_factory=llm_factory,
+        prefetcher=Prefetcher(),
         quiz_engine=run_quiz,
         user_id=user_id
     )
 
     flashcard_review = FlashcardReview(user_id=user_id)
-    quiz_review = QuizReview(user_id=user_id)
+    quiz_review = QuizReview(user_id=user_id, llm=tutor.llm)
 
     print("=== RESUMING SESSION ===")
     print("Completed sections:", tutor.get_completed_sections())
@@ -52,9 +56,14 @@ if __name__ == "__main__":
         [s["title"] for s in sections]
     )
 
-    for title in ordered_titles:
-        section = next(s for s in sections if s["title"] == title)
-        tutor.resume_or_explain_section(section["title"], section["content"])
+    by_title = {s["title"]: s for s in sections}
+    route = [by_title[title] for title in ordered_titles]
+    for section, upcoming in zip(route, route[1:] + [None]):
+        tutor.resume_or_explain_section(
+            section["title"],
+            section["content"],
+            next_section=(upcoming["title"], upcoming["content"]) if upcoming else None
+        )
 
     print("\n=== FINAL PROGRESS ===")
     print(tutor.get_progress_summary())
@@ -91,3 +100,5 @@ if __name__ == "__main__":
     print("Weak sections:", weak)
 
     tutor.report_weak_sections()
+
+    print("\nLLM connection pool:", llm_factory.stats())
@@ -0,0 +1,38 @@
+# tests/test_data_layout.py
+import json
+import os
+
+import data_layout
+from progress_manager import ProgressManager
+
+
+def test_users_are_partitioned_under_the_root(tmp_path):
+    root = str(tmp_path)
+    path = data_layout.user_dir("alice/../bob", root)
+    assert os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(path)))) == root
+    assert os.path.basename(path) == "alice%2F..%2Fbob"  # never escapes its directory
+
+    for user_id in ("alice", "alice/../bob", "émile"):
+        data_layout.user_path(user_id, data_layout.PROGRESS_FILE, root)
+    assert sorted(data_layout.user_ids(root)) == ["alice", "alice/../bob", "émile"]
+
+
+def test_progress_is_kept_per_user(tmp_path):
+    root = str(tmp_path)
+    ProgressManager(user_id="alice", data_root=root).update_section_progress("S", 1, 1)
+
+    assert ProgressManager(user_id="alice", data_root=root).is_section_completed("S")
+    assert not ProgressManager(user_id="bob", data_root=root).is_section_completed("S")
+
+
+def test_legacy_progress_moves_only_for_its_owner(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("progress.json", "w", encoding="utf-8") as f:
+        json.dump({"user_id": "alice", "sections": {}}, f)
+
+    assert data_layout.find_legacy_users() == {"alice"}
+    assert data_layout.legacy_path("bob", data_layout.PROGRESS_FILE) is None
+
+    moved = data_layout.migrate_user("alice", "root")
+    assert moved == [("progress.json", data_layout.user_path("alice", data_layout.PROGRESS_FILE, "root"))]
+    assert not os.path.exists("progress.json")
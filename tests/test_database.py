@@ -0,0 +1,66 @@
+# tests/test_database.py
+from types import SimpleNamespace
+
+import quiz_store
+from database import Database, import_json_files
+from flashcard_store import FlashcardStore
+from learning_stats import LearningStats
+from progress_manager import ProgressManager
+from quiz_store import QuizStore
+
+QUIZ = {"questions": [{"question": "Q?", "correct_answer": "a"}]}
+DAY = 24 * 60 * 60
+
+
+def test_import_after_archive_keeps_archived_attempts(tmp_path, monkeypatch):
+    clock = SimpleNamespace(now=1_700_000_000)
+    monkeypatch.setattr(quiz_store, "time", SimpleNamespace(time=lambda: clock.now))
+
+    store = QuizStore(user_id="u", data_root=str(tmp_path))
+    for score in (1, 0, 1):
+        store.save_quiz_attempt("S", QUIZ, score, 1, ["a" if score else "b"])
+        clock.now += 60
+    store.save_quiz_attempt("T", QUIZ, 1, 1, ["a"])
+
+    clock.now += 200 * DAY
+    assert store.archive_older_than(days=180) == 4
+    store.save_quiz_attempt("S", QUIZ, 0, 1, ["b"])  # hot attempt after the archive
+
+    db = Database(str(tmp_path / "tutor.db"))
+    db.insert_quiz_attempt("u", "Other", {
+        "timestamp": "2020-01-01T00:00:00", "score": 1, "total": 1,
+        "question_ids": [], "answers": [], "correct": "",
+    })
+
+    assert import_json_files(db, "u", str(tmp_path))["quiz_attempts"] == 5
+    assert import_json_files(db, "u", str(tmp_path))["quiz_attempts"] == 5  # re-runnable
+
+    imported = QuizStore(user_id="u", db=db)
+    assert [a["score"] for a in imported.get_quizzes_for_section("S")] == [1, 0, 1, 0]
+    assert imported.get_attempt_count("T") == 1
+    assert imported.get_attempt_count("Other") == 1  # sections not imported are left alone
+    assert imported.get_quizzes_for_section("S")[0]["questions"] == QUIZ["questions"]
+    db.close()
+
+
+def test_stores_persist_through_the_database(tmp_path):
+    path = str(tmp_path / "tutor.db")
+    db = Database(path)
+    cards = FlashcardStore(user_id="u", db=db)
+    card = cards.add_flashcard("S", "front", "back")
+    cards.update_flashcard(card["id"], {"interval_days": 4})
+    QuizStore(user_id="u", db=db).save_quiz_attempt("S", QUIZ, 1, 1, ["a"])
+    stats = LearningStats(user_id="u", db=db)
+    stats.record_quiz_result("S", correct=False)
+    stats.record_quiz_result("S", correct=True)
+    ProgressManager(user_id="u", db=db).update_section_progress("S", 1, 1)
+    db.close()
+
+    db = Database(path)
+    reloaded = FlashcardStore(user_id="u", db=db).get_flashcard(card["id"])
+    assert reloaded["front"] == "front" and reloaded["interval_days"] == 4
+    assert QuizStore(user_id="u", db=db).get_latest_attempt("S")["score"] == 1
+    assert LearningStats(user_id="u", db=db).get_quiz_accuracy("S") == 0.5
+    assert ProgressManager(user_id="u", db=db).is_section_completed("S")
+    assert FlashcardStore(user_id="other", db=db).count_flashcards() == 0  # per user
+    db.close()
@@ -0,0 +1,55 @@
+# tests/test_due_index.py
+import time
+
+from due_index import DueIndex, card_due_ts, epoch_from_iso
+from flashcard_store import FlashcardStore
+
+
+def test_due_items_come_earliest_first():
+    index = DueIndex()
+    index.schedule("a", 30, "A")
+    index.schedule("b", 10, "B")
+    index.schedule("c", 20, "C")
+    index.schedule("d", 99, "D")
+
+    assert index.due(now=50) == ["B", "C", "A"]
+    assert index.due(now=50, limit=2) == ["B", "C"]
+    assert index.due(now=50) == ["B", "C", "A"]  # reading does not consume
+    assert index.next_due_ts() == 10
+
+
+def test_reschedule_and_remove_skip_stale_entries():
+    index = DueIndex()
+    index.schedule("a", 10, "A")
+    index.schedule("b", 20, "B")
+    index.schedule("a", 40, "A")  # moved later
+    index.remove("b")
+
+    assert index.due(now=30) == []
+    assert index.next_due_ts() == 40 and len(index) == 1
+    for i in range(500):
+        index.schedule("a", i, "A")
+    assert len(index._heap) < 200  # stale entries are compacted
+
+
+def test_older_date_fields_are_parsed_once():
+    card = {"next_review": "2026-01-01T00:00:00"}
+    assert card_due_ts(card) == epoch_from_iso("2026-01-01T00:00:00") == card["due_ts"]
+    assert card_due_ts({}) == 0  # never reviewed: due now
+
+
+def test_store_serves_due_cards_and_reschedules_reviews(tmp_path):
+    store = FlashcardStore(user_id="u", data_root=str(tmp_path))
+    store.add_flashcard("A", "a", "1")
+    store.add_flashcard("B", "b", "2")
+    now = int(time.time())
+
+    due = store.get_due_cards(now=now)
+    assert sorted(card["front"] for _, card in due) == ["a", "b"]
+
+    store.update_review("A", 0, rating=2)  # good: due again tomorrow
+    assert [card["front"] for _, card in store.get_due_cards(now=now)] == ["b"]
+
+    fresh = FlashcardStore(user_id="u", data_root=str(tmp_path))
+    assert [card["front"] for _, card in fresh.get_due_cards(now=now)] == ["b"]
+    assert not fresh.data["sections"].is_loaded("A")  # nothing due there: not loaded
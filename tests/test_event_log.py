@@ -0,0 +1,59 @@
+# tests/test_event_log.py
+import pytest
+
+from event_log import EventLog
+from flashcard_store import FlashcardStore
+from progress_manager import ProgressManager
+
+
+def test_views_are_rebuilt_from_the_log(tmp_path):
+    log = EventLog("u", base_dir=str(tmp_path))
+    progress = ProgressManager(user_id="u", event_log=log)
+    cards = FlashcardStore(user_id="u", event_log=log)
+    progress.update_section_progress("S", 2, 3)
+    cards.add_flashcards("S", [{"front": "a", "back": "1"}, {"front": "b", "back": "2"}])
+    log.close()
+
+    log = EventLog("u", base_dir=str(tmp_path))
+    assert ProgressManager(user_id="u", event_log=log).get_section_progress("S")["quiz_score"] == 2
+    assert FlashcardStore(user_id="u", event_log=log).count_flashcards("S") == 2
+    log.close()
+
+
+def test_compact_then_replay(tmp_path):
+    log = EventLog("u", base_dir=str(tmp_path))
+    progress = ProgressManager(user_id="u", event_log=log)
+    progress.update_section_progress("S", 1, 3)
+    log.compact()
+    progress.update_section_progress("T", 3, 3)
+    log.close()
+
+    log = EventLog("u", base_dir=str(tmp_path))
+    assert [event["type"] for event in log.replay()] == ["section_completed"]
+    sections = ProgressManager(user_id="u", event_log=log).progress["sections"]
+    assert sorted(sections) == ["S", "T"]
+    log.close()
+
+
+def test_compact_refuses_to_drop_unattached_views(tmp_path):
+    log = EventLog("u", base_dir=str(tmp_path))
+    ProgressManager(user_id="u", event_log=log).update_section_progress("S", 1, 1)
+    log.close()
+
+    log = EventLog("u", base_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        log.compact()
+    log.close()
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    log = EventLog("u", base_dir=str(tmp_path))
+    ProgressManager(user_id="u", event_log=log).update_section_progress("S", 1, 1)
+    log.close()
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 2, "view": "progress", "ty')  # crash mid-append
+
+    log = EventLog("u", base_dir=str(tmp_path))
+    assert [event["seq"] for event in log.replay()] == [1]
+    assert ProgressManager(user_id="u", event_log=log).is_section_completed("S")
+    log.close()
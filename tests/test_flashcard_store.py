@@ -0,0 +1,44 @@
+# tests/test_flashcard_store.py
+from flashcard_store import FlashcardStore
+from models import Flashcard
+
+
+def _store(tmp_path) -> FlashcardStore:
+    return FlashcardStore(user_id="u", data_root=str(tmp_path))
+
+
+def test_bulk_add_skips_duplicates(tmp_path):
+    store = _store(tmp_path)
+    store.add_flashcard("S", "What is X?", "x")
+
+    added = store.add_flashcards("S", [
+        {"front": "  what is x? ", "back": "again"},  # same question, different spacing/case
+        {"front": "What is Y?", "back": "y"},
+        {"front": "What is Y?", "back": "y twice"},   # repeated within the batch
+    ])
+    assert [card["front"] for card in added] == ["What is Y?"]
+    assert store.count_flashcards("S") == 2
+    assert store.add_flashcard("S", "What is X?", "x") is None
+
+
+def test_ids_are_stable_and_updates_touch_one_card(tmp_path):
+    store = _store(tmp_path)
+    first, second = store.add_flashcards("S", [{"front": "a", "back": "1"}, {"front": "b", "back": "2"}])
+    assert first["id"] != second["id"]
+
+    store.update_flashcard(second["id"], {"back": "two"})
+    fresh = _store(tmp_path)
+    assert [card["id"] for card in fresh.get_flashcards_for_section("S")] == [first["id"], second["id"]]
+    assert fresh.get_flashcard(second["id"])["back"] == "two"  # loads its section on demand
+    assert fresh.get_flashcard("missing") is None
+
+
+def test_deduplicate_keeps_the_first_card(tmp_path):
+    store = _store(tmp_path)
+    first = store.add_flashcard("S", "Q", "kept")
+    store.data["sections"]["S"].append(Flashcard.from_dict(dict(first.to_dict(), id="dup", back="dropped")))
+
+    assert store.deduplicate(dry_run=True) == {"S": {"before": 2, "after": 1}}
+    assert store.count_flashcards("S") == 2
+    store.deduplicate(dry_run=False)
+    assert [card["back"] for card in _store(tmp_path).get_flashcards_for_section("S")] == ["kept"]
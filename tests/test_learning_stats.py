@@ -0,0 +1,53 @@
+# tests/test_learning_stats.py
+from learning_stats import LearningStats, WeakSectionIndex
+
+
+def _stats(tmp_path) -> LearningStats:
+    return LearningStats(user_id="u", data_root=str(tmp_path))
+
+
+def test_weak_sections_follow_recorded_results(tmp_path):
+    stats = _stats(tmp_path)
+    stats.record_quiz_result("A", correct=False)
+    stats.record_quiz_result("B", correct=True)
+    stats.record_quiz_result("C", correct=True)
+    stats.record_quiz_result("C", correct=False)  # 0.5
+    assert stats.get_weak_sections() == ["A", "C"]
+    assert stats.get_weak_sections(limit=1) == ["A"]
+
+    stats.record_quiz_result("C", correct=True)
+    stats.record_quiz_result("C", correct=True)  # 0.75
+    assert stats.get_weak_sections() == ["A"]
+    assert stats.get_weak_sections(quiz_threshold=0.8) == ["A", "C"]  # registered on first use
+    assert stats.is_weak("C", quiz_threshold=0.8) and not stats.is_weak("C")
+
+
+def test_flush_reapplies_only_sections_changed_elsewhere(tmp_path, monkeypatch):
+    ours, theirs = _stats(tmp_path), _stats(tmp_path)
+    for section in ("A", "B", "C"):
+        ours.record_quiz_result(section, correct=True)
+    theirs.record_quiz_result("B", correct=False)
+    theirs.record_quiz_result("B", correct=False)
+
+    updated = []
+    update = WeakSectionIndex.update
+
+    def counting_update(index, section, *accuracy):
+        updated.append(section)
+        update(index, section, *accuracy)
+
+    monkeypatch.setattr(WeakSectionIndex, "update", counting_update)
+    ours.record_quiz_result("D", correct=True)  # the flush reads the file "theirs" wrote
+
+    assert ours.get_weak_sections() == ["B"]
+    assert sorted(set(updated)) == ["B", "D"]
+
+
+def test_registered_index_survives_a_reload(tmp_path):
+    stats = _stats(tmp_path)
+    index = stats.register_thresholds(0.6, 0.7)
+    stats.record_quiz_result("A", correct=False)
+
+    stats.restore_state({"A": {"quiz_attempts": 2, "quiz_correct": 2}, "B": {"quiz_attempts": 1}})
+    assert stats.register_thresholds(0.6, 0.7) is index
+    assert index.sections() == ["B"]
@@ -0,0 +1,64 @@
+# tests/test_llm_async.py
+import asyncio
+import time
+
+from llm import AsyncOpenAIClient, gather_bounded
+from llm_backends import FakeTransport
+from llm_guard import CircuitBreaker, LLMGuard, RateLimiter
+from store_registry import StoreRegistry
+from tutor import Tutor
+
+
+def _guard() -> LLMGuard:
+    return LLMGuard(RateLimiter(1e9, 1e12), CircuitBreaker())
+
+
+def test_gather_bounded_limits_concurrency_and_keeps_order():
+    running = peak = 0
+
+    async def work(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - i))
+        running -= 1
+        return i
+
+    assert asyncio.run(gather_bounded((work(i) for i in range(5)), limit=2)) == [0, 1, 2, 3, 4]
+    assert peak == 2
+
+
+def test_async_client_has_the_sync_surface():
+    client = AsyncOpenAIClient(client=FakeTransport().async_client, guard=_guard())
+
+    async def run():
+        quiz = await client.generate_quiz("Recursion", "...", num_questions=2)
+        explanation = await client.explain_mistake("Q?", "a")
+        streamed = "".join([chunk async for chunk in client.generate("Recursion", stream=True)])
+        return quiz, explanation, streamed, await client.generate("Recursion")
+
+    quiz, explanation, streamed, text = asyncio.run(run())
+    assert len(quiz["questions"]) == 2
+    assert "'Q?'" in explanation
+    assert streamed == text
+
+
+def test_tutor_explains_mistakes_concurrently_in_question_order(tmp_path, capsys):
+    transport = FakeTransport(latency=0.2)
+    tutor = Tutor(
+        llm=object(),
+        async_llm=AsyncOpenAIClient(client=transport.async_client, guard=_guard()),
+        registry=StoreRegistry(data_root=str(tmp_path))
+    )
+    tutor.BATCH_EXPLANATIONS = False
+    mistakes = [{"question": f"Q{i}?", "correct_answer": f"a{i}"} for i in range(4)]
+
+    start = time.perf_counter()
+    tutor.explain_mistakes(mistakes)
+    elapsed = time.perf_counter() - start
+
+    assert transport.calls == 4
+    assert elapsed < 0.6  # about one call, not four in sequence
+    out = capsys.readouterr().out
+    positions = [out.index(f"'Q{i}?'") for i in range(4)]
+    assert positions == sorted(positions)
@@ -0,0 +1,57 @@
+# tests/test_llm_backends.py
+import pytest
+
+from llm import OpenAIClient
+from llm_backends import FakeTransport, LLMBackend, RecordReplayTransport, latency_sampler
+from llm_cache import LLMCache
+from llm_guard import CircuitBreaker, LLMGuard, RateLimiter
+
+
+def _client(transport, cache=None) -> OpenAIClient:
+    return OpenAIClient(client=transport, cache=cache, guard=LLMGuard(RateLimiter(1e9, 1e12), CircuitBreaker()))
+
+
+def test_fake_transport_answers_every_prompt():
+    client = _client(FakeTransport())
+    assert isinstance(client, LLMBackend)
+
+    quiz = client.generate_quiz("Recursion", "A function calling itself.", num_questions=4)
+    assert len(quiz["questions"]) == 4
+
+    avoided = client.generate_quiz("Recursion", "A function calling itself.", num_questions=2,
+                                   avoid=[q["question"] for q in quiz["questions"]])
+    assert not {q["question"] for q in avoided["questions"]} & {q["question"] for q in quiz["questions"]}
+
+    explanations = client.explain_mistakes([("Q1?", "a"), ("Q2?", "b")])
+    assert len(explanations) == 2 and "Q2?" in explanations[1]
+    assert len(client.generate_flashcards("Recursion", "...")) == 3
+    assert "".join(client.generate("Recursion", stream=True)) == client.generate("Recursion")
+
+
+def test_record_then_replay(tmp_path):
+    path = str(tmp_path / "recordings.json")
+    recorded = _client(RecordReplayTransport(path, "record", inner=FakeTransport()))
+    explanation = recorded.generate("Sorting")
+
+    replay = RecordReplayTransport(path, "replay")
+    assert _client(replay).generate("Sorting") == explanation
+    assert replay.calls == 1
+    with pytest.raises(LookupError):
+        _client(replay).explain_mistake("never", "recorded")
+
+
+def test_cache_answers_repeated_requests():
+    transport = FakeTransport()
+    client = _client(transport, cache=LLMCache(None))
+    client.generate("Graphs")
+    client.generate("Graphs")
+    assert transport.calls == 1
+
+
+def test_latency_sampler_is_reproducible():
+    first = latency_sampler(("lognormal", 0.5, 0.4), seed=3)
+    second = latency_sampler(("lognormal", 0.5, 0.4), seed=3)
+    assert [first() for _ in range(5)] == [second() for _ in range(5)]
+    assert latency_sampler(0.25)() == 0.25
+    with pytest.raises(ValueError):
+        latency_sampler(("pareto", 1))
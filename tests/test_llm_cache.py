@@ -0,0 +1,73 @@
+# tests/test_llm_cache.py
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_700_000_000.0)
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def _messages(i: int) -> list:
+    return [{"role": "user", "content": f"q{i}"}]
+
+
+def test_hits_survive_a_restart(tmp_path, clock):
+    path = str(tmp_path / "cache.db")
+    cache = LLMCache(path)
+    assert cache.get("m", MESSAGES, 0.2) is None
+    cache.put("m", MESSAGES, 0.2, "hello")
+    assert cache.get("m", MESSAGES, 0.2) == "hello"
+    assert cache.get("other", MESSAGES, 0.2) is None  # the model is part of the key
+    cache.close()
+
+    cache = LLMCache(path)
+    assert cache.get("m", MESSAGES, 0.2) == "hello"
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 0, 0)
+    cache.close()
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.db"), ttl_seconds=60)
+    cache.put("m", MESSAGES, 0.2, "hello")
+    clock.now += 59
+    assert cache.get("m", MESSAGES, 0.2) == "hello"
+    clock.now += 2
+    assert cache.get("m", MESSAGES, 0.2) is None
+    assert cache.stats()["disk_size"] == 0  # dropped, not just skipped
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = LLMCache(str(tmp_path / "cache.db"), memory_entries=2, max_entries=3)
+    for i in range(3):
+        cache.put("m", _messages(i), 0.2, f"r{i}")
+        clock.now += 1
+    assert cache.get("m", _messages(0), 0.2) == "r0"  # touch the oldest
+    clock.now += 1
+    cache.put("m", _messages(3), 0.2, "r3")
+
+    stats = cache.stats()
+    assert stats["memory_size"] == 2 and stats["disk_size"] == 3
+    assert cache.get("m", _messages(1), 0.2) is None  # least recently used
+    assert cache.get("m", _messages(0), 0.2) == "r0"
+    cache.close()
+
+
+def test_sampled_requests_bypass_the_cache(clock):
+    cache = LLMCache(None, max_temperature=0.5)
+    cache.put("m", MESSAGES, 0.9, "varied")
+    assert cache.get("m", MESSAGES, 0.9) is None
+    assert cache.stats()["bypassed"] == 1 and cache.stats()["memory_size"] == 0
+
+    cache.put("m", MESSAGES, 0.2, "stable")
+    assert cache.get("m", MESSAGES, 0.2) == "stable"
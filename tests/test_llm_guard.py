@@ -0,0 +1,147 @@
+# tests/test_llm_guard.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from openai import APIConnectionError, BadRequestError
+
+import llm_guard
+from llm_guard import CircuitBreaker, CircuitOpenError, LLMGuard, LLMUnavailableError, RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(llm_guard.time, "monotonic", lambda: clock.now)
+    return clock
+
+
+def _guard(**options) -> LLMGuard:
+    guard = LLMGuard(RateLimiter(1e9, 1e12), CircuitBreaker(failure_threshold=2, reset_timeout=30), **options)
+    guard.sleep = lambda seconds: None
+    return guard
+
+
+def test_circuit_breaker_transitions(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    breaker.before_call()  # one failure: still closed
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 30
+    assert breaker.state == "half-open"
+    breaker.before_call()  # the single trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # others still fail fast during the trial
+
+    breaker.record_failure()  # trial failed: open again
+    assert breaker.state == "open"
+
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_success()  # trial succeeded: closed
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_guard_retries_connection_errors(clock):
+    guard = _guard(max_attempts=3)
+    failures = [APIConnectionError(request=None)]
+
+    def request():
+        if failures:
+            raise failures.pop()
+        return SimpleNamespace(usage=None)
+
+    assert guard.call(request, [{"content": "hi"}]).usage is None
+    assert guard.breaker.state == "closed"
+
+
+def test_guard_gives_up_and_opens_the_circuit(clock):
+    guard = _guard(max_attempts=2)
+
+    def request():
+        raise APIConnectionError(request=None)
+
+    with pytest.raises(LLMUnavailableError):
+        guard.call(request, [])
+    assert guard.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        guard.call(request, [])
+
+
+def test_guard_does_not_retry_other_errors(clock):
+    guard = _guard()
+    calls = []
+
+    def request():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        guard.call(request, [])
+    assert len(calls) == 1
+
+
+def test_token_bucket_reserves_into_debt(clock):
+    bucket = TokenBucket(per_minute=60, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0)  # one token a second
+    clock.now += 1
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def _open_circuit(guard, clock):
+    guard.breaker.record_failure()
+    guard.breaker.record_failure()
+    clock.now += 30
+    assert guard.breaker.state == "half-open"
+
+
+def test_non_retryable_error_during_half_open_trial(clock):
+    guard = _guard()
+    _open_circuit(guard, clock)
+
+    def bad_request():
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        guard.call(bad_request, [])
+    assert guard.breaker.state == "half-open"  # no verdict: the next call is the trial
+    assert guard.call(lambda: SimpleNamespace(usage=None), []).usage is None
+    assert guard.breaker.state == "closed"
+
+
+def test_api_error_during_half_open_trial_closes_the_circuit(clock):
+    guard = _guard()
+    _open_circuit(guard, clock)
+    response = SimpleNamespace(status_code=400, headers={}, request=None)
+
+    def rejected():
+        raise BadRequestError("bad request", response=response, body=None)
+
+    with pytest.raises(BadRequestError):
+        guard.call(rejected, [])
+    assert guard.breaker.state == "closed"  # the provider answered
+
+
+def test_cancelled_half_open_trial(clock):
+    guard = _guard()
+    _open_circuit(guard, clock)
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    async def ok():
+        return SimpleNamespace(usage=None)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(guard.acall(cancelled, []))
+    asyncio.run(guard.acall(ok, []))
+    assert guard.breaker.state == "closed"
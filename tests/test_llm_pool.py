@@ -0,0 +1,84 @@
+# tests/test_llm_pool.py
+import gc
+import http.server
+import threading
+
+import pytest
+
+from llm_pool import LLMClientFactory, MeteredTransport, PoolMetrics, _httpx
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def _client(max_connections: int = 1):
+    httpx = _httpx()
+    metrics = PoolMetrics()
+    transport = MeteredTransport(httpx.HTTPTransport(limits=httpx.Limits(max_connections=max_connections)), metrics)
+    return httpx, metrics, httpx.Client(transport=transport, timeout=httpx.Timeout(5, pool=0.2))
+
+
+def test_connections_are_reused_and_released(url):
+    _, metrics, client = _client(max_connections=2)
+    for _ in range(5):
+        assert client.get(url).text == "ok"
+    stats = metrics.snapshot()
+    assert stats["requests"] == 5 and stats["in_use"] == 0
+    assert stats["connections_opened"] == 1
+    client.close()
+
+
+def test_unclosed_response_times_out_instead_of_blocking(url):
+    httpx, metrics, client = _client(max_connections=1)
+    response = client.send(client.build_request("GET", url), stream=True)
+    assert metrics.snapshot()["in_use"] == 1
+
+    with pytest.raises(httpx.PoolTimeout):
+        client.get(url)  # the only connection is still held
+
+    del response
+    gc.collect()
+    assert metrics.snapshot()["in_use"] == 0  # released when the stream was collected
+    client.close()
+
+
+def test_closing_the_transport_releases_held_connections(url):
+    _, metrics, client = _client()
+    response = client.send(client.build_request("GET", url), stream=True)  # never closed
+    assert metrics.snapshot()["in_use"] == 1
+    client.close()
+    assert metrics.snapshot()["in_use"] == 0
+    assert response.status_code == 200
+
+
+def test_callers_trace_hook_still_runs(url):
+    _, metrics, client = _client()
+    events = []
+    client.get(url, extensions={"trace": lambda event, info: events.append(event)})
+    assert "connection.connect_tcp.complete" in events
+    assert metrics.snapshot()["connections_opened"] == 1
+    client.close()
+
+
+def test_factory_builds_nothing_until_asked():
+    factory = LLMClientFactory(pool_timeout=1.0)
+    assert factory._openai is None and factory.stats()["requests"] == 0
@@ -0,0 +1,60 @@
+# tests/test_mistake_batch.py
+import asyncio
+import json
+
+import pytest
+
+from llm import AsyncOpenAIClient, OpenAIClient, parse_explanations
+from llm_backends import FakeTransport
+from llm_guard import CircuitBreaker, LLMGuard, RateLimiter
+
+BATCH = [("Q1?", "a"), ("Q2?", "b"), ("Q3?", "c")]
+
+
+def _guard() -> LLMGuard:
+    return LLMGuard(RateLimiter(1e9, 1e12), CircuitBreaker())
+
+
+class MalformedBatchTransport(FakeTransport):
+    """Answers batched prompts with one explanation missing."""
+
+    def content(self, messages: list) -> str:
+        content = super().content(messages)
+        if '"explanations"' in messages[-1]["content"]:
+            data = json.loads(content)
+            return json.dumps({"explanations": data["explanations"][:-1]})
+        return content
+
+
+def test_one_request_for_the_whole_batch():
+    transport = FakeTransport()
+    explanations = OpenAIClient(client=transport, guard=_guard()).explain_mistakes(BATCH)
+    assert transport.calls == 1
+    assert [f"'{q}'" in text for text, (q, _) in zip(explanations, BATCH)] == [True] * 3
+
+
+@pytest.mark.parametrize("raw", [
+    "not json",
+    '{"explanations": {"id": 1}}',
+    '{"explanations": [{"id": 1, "explanation": "x"}, {"id": 1, "explanation": "y"}]}',
+    '{"explanations": [{"id": 1, "explanation": "x"}, {"id": 7, "explanation": "y"}]}',
+    '{"explanations": [{"id": 1, "explanation": "x"}, {"id": 2, "explanation": " "}]}',
+])
+def test_parse_explanations_rejects_malformed_output(raw):
+    with pytest.raises(ValueError):
+        parse_explanations(raw, 2)
+
+
+def test_malformed_batch_falls_back_to_one_call_each():
+    transport = MalformedBatchTransport()
+    explanations = OpenAIClient(client=transport, guard=_guard()).explain_mistakes(BATCH)
+    assert transport.calls == 1 + len(BATCH)
+    assert explanations == [FakeTransport._explanation(q, a) for q, a in BATCH]
+
+
+def test_async_malformed_batch_falls_back_to_one_call_each():
+    transport = MalformedBatchTransport()
+    client = AsyncOpenAIClient(client=transport.async_client, guard=_guard())
+    explanations = asyncio.run(client.explain_mistakes(BATCH))
+    assert transport.calls == 1 + len(BATCH)
+    assert explanations == [FakeTransport._explanation(q, a) for q, a in BATCH]
@@ -0,0 +1,48 @@
+# tests/test_models.py
+from due_index import epoch_from_iso
+from models import Flashcard, QuizAttempt, SectionStats
+
+
+def test_canonical_round_trip():
+    card = Flashcard(id="c1", front="Q?", back="A.", interval_days=6, due_ts=1_700_000_000)
+    data = card.to_dict()
+    assert data == {"id": "c1", "front": "Q?", "back": "A.", "interval_days": 6, "due_ts": 1_700_000_000}
+    assert Flashcard.from_dict(data) == card
+
+
+def test_older_keys_are_read_into_fields():
+    card = Flashcard.from_dict({
+        "front": "Q?",
+        "interval": 3,
+        "ease": 2.6,
+        "next_review": "2026-01-01T00:00:00",
+        "tags": ["x"],
+    })
+    assert card.interval_days == 3 and card.ease_factor == 2.6
+    assert card.due_ts == epoch_from_iso("2026-01-01T00:00:00")
+    assert card["next_review"] == "2026-01-01T00:00:00"
+    assert card.get("interval") == 3
+    assert card.extra == {"tags": ["x"]}
+    assert card.to_dict() == {
+        "front": "Q?", "ease_factor": 2.6, "interval_days": 3,
+        "due_ts": card.due_ts, "tags": ["x"],
+    }
+
+
+def test_field_wins_over_older_key():
+    card = Flashcard.from_dict({"due": "2026-01-01T00:00:00", "due_ts": 5, "interval": 1, "interval_days": 2})
+    assert card.due_ts == 5 and card.interval_days == 2
+
+
+def test_defaults_and_mapping_interface():
+    stats = SectionStats.from_dict({"quiz_attempts": 2})
+    assert stats.quiz_correct == 0 and stats["quiz_attempts"] == 2
+    stats.add(quiz_correct=1)
+    assert stats.get("quiz_correct") == 1
+
+    attempt = QuizAttempt.from_dict({"timestamp": "2026-01-01T00:00:00", "score": 1})
+    assert "total" not in attempt and attempt.get("total", 0) == 0
+    attempt["note"] = "retry"
+    assert dict(attempt) == {"ts": attempt.ts, "score": 1, "note": "retry"}
+    del attempt["note"]
+    assert attempt.extra == {}
@@ -0,0 +1,115 @@
+# tests/test_persistence.py
+import os
+import threading
+
+import pytest
+
+import persistence
+from persistence import CorruptFileError, WriteBehindQueue, atomic_write, read_json, update_json, write_json
+from progress_manager import ProgressManager
+
+
+def test_write_behind_coalesces_changes():
+    class Store:
+        writes = 0
+
+        def flush(self):
+            Store.writes += 1
+
+    queue = WriteBehindQueue(max_staleness=60)
+    store = Store()
+    for _ in range(100):
+        queue.mark_dirty(store)
+    assert queue.pending() == 1
+
+    queue.flush()
+    assert Store.writes == 1 and queue.pending() == 0
+    queue.close()
+
+
+def test_write_behind_survives_failing_store():
+    class Failing:
+        calls = 0
+
+        def flush(self):
+            Failing.calls += 1
+            if Failing.calls == 1:
+                raise ValueError("cannot serialize")
+
+    class Counting:
+        calls = 0
+
+        def flush(self):
+            Counting.calls += 1
+
+    queue = WriteBehindQueue(max_staleness=60)
+    failing, counting = Failing(), Counting()
+    queue.mark_dirty(failing)
+    queue.mark_dirty(counting)
+
+    queue.flush()
+    assert Counting.calls == 1      # the rest of the batch was written
+    assert queue.pending() == 1     # the failing store is still dirty
+
+    queue.flush()
+    assert Failing.calls == 2 and queue.pending() == 0
+    assert queue._thread.is_alive()
+    queue.close()
+
+
+def test_progress_write_behind_keeps_every_section(tmp_path):
+    queue = WriteBehindQueue(max_staleness=0.001)
+    progress = ProgressManager(user_id="u", data_root=str(tmp_path), write_behind=queue)
+    for i in range(100):
+        progress.update_section_progress(f"S{i}", i, 100)
+    queue.close()
+
+    assert len(ProgressManager(user_id="u", data_root=str(tmp_path)).progress["sections"]) == 100
+
+
+def test_failed_write_leaves_the_old_file(tmp_path):
+    path = tmp_path / "state.json"
+    write_json(path, {"v": 1})
+
+    with pytest.raises(TypeError):
+        write_json(path, {"v": object()})  # fails while serializing
+    assert read_json(path) == {"v": 1}
+    assert os.listdir(tmp_path) == ["state.json"]  # no temp files left
+
+
+@pytest.mark.parametrize("level", ["atomic", "fsync-file", "fsync-dir", "none", "flush", "fsync"])
+def test_every_durability_level_writes(tmp_path, level):
+    path = tmp_path / "state.json"
+    atomic_write(path, "{}", durability=level)
+    assert read_json(path) == {}
+
+
+def test_durability_names(monkeypatch):
+    monkeypatch.setattr(persistence, "_durability", persistence.get_durability())
+    persistence.set_durability("fsync")  # earlier name
+    assert persistence.get_durability() == "fsync-dir"
+    with pytest.raises(ValueError):
+        persistence.set_durability("paranoid")
+
+
+def test_corrupt_file_is_reported(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text('{"v": ')
+    with pytest.raises(CorruptFileError):
+        read_json(path)
+    assert read_json(tmp_path / "missing.json", default=[]) == []
+
+
+def test_update_json_merges_concurrent_writers(tmp_path):
+    path = str(tmp_path / "counter.json")
+
+    def bump():
+        for _ in range(20):
+            update_json(path, lambda current: {"n": current["n"] + 1}, default={"n": 0})
+
+    threads = [threading.Thread(target=bump) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert read_json(path) == {"n": 80}
@@ -0,0 +1,56 @@
+# tests/test_prefetch.py
+import threading
+
+import pytest
+
+from prefetch import Prefetcher
+
+
+@pytest.fixture
+def prefetcher():
+    prefetcher = Prefetcher(max_workers=1)
+    yield prefetcher
+    prefetcher.close()
+
+
+def test_prefetched_result_is_handed_over_once(prefetcher):
+    calls = []
+    prefetcher.submit("k", lambda: calls.append("background") or "ready")
+    prefetcher.submit("k", lambda: calls.append("duplicate"))
+
+    assert prefetcher.result("k", lambda: "foreground") == "ready"
+    assert prefetcher.result("k", lambda: "foreground") == "foreground"
+    assert calls == ["background"]
+    assert prefetcher.counters["used"] == 1 and prefetcher.counters["missed"] == 1
+
+
+def test_failed_prefetch_runs_in_the_foreground(prefetcher):
+    prefetcher.submit("k", lambda: 1 / 0)
+    assert prefetcher.result("k", lambda: "foreground") == "foreground"
+    assert prefetcher.counters["failed"] == 1
+
+
+def test_retain_discards_jobs_off_the_route(prefetcher):
+    release = threading.Event()
+    running = prefetcher.submit(("explain", "A"), release.wait)
+    queued = prefetcher.submit(("quiz", "A"), lambda: "stale quiz")
+    prefetcher.submit(("quiz", "B"), lambda: "quiz B")
+
+    prefetcher.retain(lambda key: key[1] == "B")
+    assert prefetcher.pending() == [("quiz", "B")]
+    assert queued.cancelled()
+    assert prefetcher.counters["discarded"] == 2
+
+    release.set()
+    running.result(timeout=5)
+    assert prefetcher.result(("explain", "A"), lambda: "fresh") == "fresh"
+    assert prefetcher.result(("quiz", "B"), lambda: "fresh") == "quiz B"
+
+
+def test_done_reports_finished_jobs(prefetcher):
+    release = threading.Event()
+    future = prefetcher.submit("k", release.wait)
+    assert not prefetcher.done("k") and not prefetcher.done("missing")
+    release.set()
+    future.result(timeout=5)
+    assert prefetcher.done("k")
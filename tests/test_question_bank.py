@@ -0,0 +1,88 @@
+# tests/test_question_bank.py
+import pytest
+
+from llm import OpenAIClient, fallback_quiz
+from llm_backends import FakeTransport
+from llm_guard import CircuitBreaker, LLMGuard, RateLimiter
+from question_bank import QuestionBank, question_key
+from store_registry import StoreRegistry
+from tutor import Tutor
+
+
+@pytest.fixture
+def transport():
+    return FakeTransport()
+
+
+@pytest.fixture
+def bank(transport, tmp_path):
+    llm = OpenAIClient(client=transport, guard=LLMGuard(RateLimiter(1e9, 1e12), CircuitBreaker()))
+    bank = QuestionBank(llm, data_root=str(tmp_path), low_water=0, batch_size=5)
+    yield bank
+    bank.close()
+
+
+def test_questions_are_deduplicated_by_normalized_text(bank):
+    assert question_key("What is  Recursion?") == question_key("what is recursion")
+    added = bank.add("S", "normal", [
+        {"question": "What is recursion?", "correct_answer": "a"},
+        {"question": "what is RECURSION", "correct_answer": "b"},
+        {"question": "", "correct_answer": "c"},
+        {"question": "Base case?", "correct_answer": "d"},
+    ])
+    assert added == 2 and bank.size("S", "normal") == 2
+    assert bank.counters["duplicates"] == 1 and bank.counters["invalid"] == 1
+
+
+def test_draws_after_a_cold_start_need_no_llm(bank, transport):
+    first = bank.draw("S", "content", num_questions=3)
+    assert transport.calls == 1 and bank.size("S", "normal") == 5
+
+    seen = {question_key(q["question"]) for q in first["questions"]}
+    second = bank.draw("S", "content", num_questions=3, exclude=seen)
+    keys = [question_key(q["question"]) for q in second["questions"]]
+    assert transport.calls == 1
+    assert len(set(keys) - seen) == 2  # both unseen questions, then one seen to fill the gap
+
+
+def test_pool_survives_a_restart(bank, tmp_path):
+    bank.fill("S", "content", "hard", target=10)
+    assert bank.size("S", "hard") == 10
+
+    reopened = QuestionBank(None, data_root=str(tmp_path))
+    assert reopened.size("S", "hard") == 10
+    assert reopened.contents["S"] == "content"
+    reopened.close()
+
+
+def test_offline_placeholder_is_never_banked(tmp_path):
+    class OfflineLLM:
+        def generate_quiz(self, section_title, section_content, **kwargs):
+            return fallback_quiz(section_title)
+
+    bank = QuestionBank(OfflineLLM(), data_root=str(tmp_path))
+    assert bank.draw("S", "content") == fallback_quiz("S")
+    assert bank.size("S", "normal") == 0
+    bank.close()
+
+
+def test_tutor_avoids_questions_from_recent_attempts(bank, tmp_path):
+    drawn = []
+
+    def quiz_engine(quiz, section, user_id):
+        drawn.append({question_key(q["question"]) for q in quiz["questions"]})
+        answers = [
+            {"question": q["question"], "answer": q["correct_answer"],
+             "correct_answer": q["correct_answer"], "is_correct": True}
+            for q in quiz["questions"]
+        ]
+        return len(answers), len(answers), answers
+
+    bank.fill("S", "content", "normal", target=20)
+    registry = StoreRegistry(data_root=str(tmp_path))
+    for _ in range(2):
+        # A new session each time: only the stored attempt is known
+        tutor = Tutor(llm=bank.llm, quiz_engine=quiz_engine, registry=registry, question_bank=bank)
+        tutor._resolve_quiz_difficulty = lambda section_title: "normal"
+        tutor.run_quiz_for_section("S", "content")
+    assert not drawn[0] & drawn[1]
@@ -0,0 +1,58 @@
+# tests/test_question_table.py
+import json
+
+import data_layout
+from persistence import read_json
+from question_table import QuestionTable, question_id
+from quiz_store import QuizStore
+
+QUIZ = {"questions": [
+    {"question": "Q1?", "correct_answer": "a"},
+    {"question": "Q2?", "correct_answer": "b"},
+]}
+
+
+def test_question_ids_are_content_hashes():
+    assert question_id({"question": "Q1?", "correct_answer": "a"}) == question_id({"correct_answer": " a", "question": "Q1? "})
+    assert question_id({"question": "Q1?", "correct_answer": "a"}) != question_id({"question": "Q1?", "correct_answer": "b"})
+
+    table = QuestionTable()
+    qid = table.add({"question": "Q1?", "correct_answer": "a"})
+    assert table.add({"question": "Q1?", "correct_answer": "a"}) == qid and len(table) == 1
+    assert table.take_unsaved() == {qid: {"question": "Q1?", "correct_answer": "a"}}
+    assert table.take_unsaved() == {}
+
+
+def test_retakes_store_each_question_once(tmp_path):
+    root = str(tmp_path)
+    store = QuizStore(user_id="u", data_root=root)
+    for _ in range(3):
+        store.save_quiz_attempt("S", QUIZ, 1, 2, ["a", "x"])
+
+    assert len(read_json(data_layout.user_path("u", data_layout.QUESTIONS_FILE, root))) == 2
+    fresh = QuizStore(user_id="u", data_root=root)
+    attempt = fresh.get_latest_attempt("S")
+    assert attempt["questions"] == QUIZ["questions"]
+    assert [a["is_correct"] for a in attempt["user_answers"]] == [True, False]
+    assert fresh.get_incorrect_questions("S") == [{"question": "Q2?", "your_answer": "x", "correct_answer": "b"}]
+
+
+def test_full_layout_history_is_compacted(tmp_path):
+    root = str(tmp_path)
+    legacy = {"S": [{
+        "timestamp": "2026-01-01T00:00:00",
+        "score": 1,
+        "total": 2,
+        "questions": QUIZ["questions"],
+        "user_answers": [
+            {"question": "Q1?", "answer": "a", "correct_answer": "a", "is_correct": True},
+            {"question": "Q2?", "answer": "x", "correct_answer": "b", "is_correct": False},
+        ],
+    }]}
+    with open(data_layout.user_path("u", data_layout.QUIZZES_FILE, root), "w", encoding="utf-8") as f:
+        json.dump(legacy, f)
+
+    store = QuizStore(user_id="u", data_root=root)
+    [stored] = store.iter_stored_attempts("S")
+    assert stored.correct == "10" and len(stored.question_ids) == 2
+    assert store.get_quizzes_for_section("S")[0]["questions"] == QUIZ["questions"]
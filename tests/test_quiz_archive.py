@@ -0,0 +1,69 @@
+# tests/test_quiz_archive.py
+from types import SimpleNamespace
+
+import pytest
+
+import quiz_store
+from quiz_review import QuizReview
+from quiz_store import QuizStore
+from store_registry import StoreRegistry
+
+QUIZ = {"questions": [
+    {"question": "Q1?", "correct_answer": "a"},
+    {"question": "Q2?", "correct_answer": "b"},
+]}
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_700_000_000)
+    monkeypatch.setattr(quiz_store, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def _store_with_archive(tmp_path, clock) -> QuizStore:
+    store = QuizStore(user_id="u", data_root=str(tmp_path))
+    store.save_quiz_attempt("S", QUIZ, 1, 2, ["a", "x"])
+    clock.now += 60
+    store.save_quiz_attempt("S", QUIZ, 2, 2, ["a", "b"])
+    clock.now += 2 * DAY
+    assert store.archive_older_than(days=1) == 2
+    store.save_quiz_attempt("S", QUIZ, 0, 2, ["x", "y"])
+    return store
+
+
+def test_archived_attempts_are_read_transparently(tmp_path, clock):
+    _store_with_archive(tmp_path, clock)
+
+    fresh = QuizStore(user_id="u", data_root=str(tmp_path))
+    assert [a["score"] for a in fresh.get_quizzes_for_section("S")] == [1, 2, 0]
+    assert [a["score"] for a in fresh.get_quizzes_for_section("S", include_archived=False)] == [0]
+    assert fresh.get_attempt_count("S") == 3
+    assert fresh.get_latest_attempt("S")["score"] == 0
+
+
+def test_review_section_returns_every_attempt(tmp_path, clock):
+    _store_with_archive(tmp_path, clock)
+    review = QuizReview(user_id="u", registry=StoreRegistry(data_root=str(tmp_path)))
+
+    quizzes = review.review_section("S")
+    assert [a["score"] for a in quizzes] == [1, 2, 0]
+    assert review.review_section("missing") == []
+
+
+def test_explain_missed_batches_distinct_questions(tmp_path, clock):
+    class FakeLLM:
+        batches = []
+
+        def explain_mistakes(self, batch):
+            self.batches.append(batch)
+            return [f"because {answer}" for _, answer in batch]
+
+    _store_with_archive(tmp_path, clock)
+    llm = FakeLLM()
+    review = QuizReview(user_id="u", registry=StoreRegistry(data_root=str(tmp_path)), llm=llm)
+
+    assert review.explain_missed("S") == [("Q2?", "b"), ("Q1?", "a")]
+    assert len(llm.batches) == 1
+    assert QuizReview(user_id="u", registry=StoreRegistry(data_root=str(tmp_path))).explain_missed("S") == []
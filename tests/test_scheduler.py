@@ -0,0 +1,49 @@
+# tests/test_scheduler.py
+import pytest
+
+import scheduler
+from scheduler import DAY_SECONDS, MIN_EASE_FACTOR, review_cards, schedule_card, sm2_batch
+
+NOW = 1_700_000_000
+
+
+def test_intervals_grow_one_six_then_by_ease():
+    card = {}
+    intervals = [schedule_card(card, 5, now=NOW)["interval"] for _ in range(4)]
+    assert intervals[:2] == [1, 6]
+    assert intervals[2] == round(6 * 2.7)
+    assert card["due_ts"] == NOW + intervals[-1] * DAY_SECONDS
+
+
+def test_lapse_resets_and_ease_has_a_floor():
+    card = {"repetitions": 5, "interval": 40, "ease_factor": 1.35}
+    schedule_card(card, 0, now=NOW)
+    assert (card["repetitions"], card["interval"]) == (0, 1)
+    assert card["ease_factor"] == MIN_EASE_FACTOR
+
+
+def test_quality_is_validated():
+    with pytest.raises(ValueError):
+        sm2_batch([2.5], [0], [1], [6], now=NOW)
+
+
+def test_batch_matches_per_card_reviews():
+    qualities = [0, 3, 4, 5, 2, 5]
+    cards = [{"id": str(i), "repetitions": i % 4, "interval": 1 + i * 3, "ease_factor": 2.5 - i / 10} for i in range(6)]
+    singles = [schedule_card(dict(card), q, now=NOW, max_interval=10) for card, q in zip(cards, qualities)]
+
+    batched = review_cards([dict(card) for card in cards], qualities, now=NOW, max_interval=10)
+
+    for single, card in zip(singles, batched):
+        for key in ("ease_factor", "repetitions", "interval", "due_ts"):
+            assert card[key] == pytest.approx(single[key])
+
+
+@pytest.mark.skipif(scheduler.np is None, reason="NumPy not installed")
+def test_numpy_path_matches_python():
+    ease, reps, interval = [2.5, 1.3, 2.0] * 30, [0, 3, 5] * 30, [1, 6, 20] * 30
+    quality = [5, 1, 3] * 30
+    vectorized = scheduler._sm2_numpy(ease, reps, interval, quality, NOW, None)
+    plain = scheduler._sm2_python(ease, reps, interval, quality, NOW, None)
+    for column, expected in zip(vectorized, plain):
+        assert list(column) == pytest.approx(expected)
@@ -0,0 +1,72 @@
+# tests/test_serialization.py
+import pytest
+
+import data_layout
+from flashcard_store import FlashcardStore
+from models import Flashcard, QuizAttempt
+from quiz_store import QuizStore
+from serialization import MAGIC, convert_file, detect_format, dumps, loads, state_files
+
+
+def test_binary_round_trip_of_records():
+    cards = [
+        Flashcard(id="a", front="Élan?", back="vital", created_ts=1, due_ts=None, ease_factor=2.5),
+        Flashcard(id="b", front="Q", back="", created_ts=2 ** 40, due_ts=5, extra={"tag": ["x"]}),
+    ]
+    payload = dumps(cards, "binary")
+
+    assert payload.startswith(MAGIC + b"R")
+    assert loads(payload) == cards
+
+    attempts = [QuizAttempt(ts=1, score=1, total=2, question_ids=["q1", "q2"], answers=["a", None], correct="10")]
+    assert loads(dumps(attempts, "binary")) == attempts
+
+
+def test_mixed_int_and_float_column_keeps_its_types():
+    cards = [
+        Flashcard(id="a", ease_factor=2.5, interval_days=6),
+        Flashcard(id="b", ease_factor=3, interval_days=6.0),
+        Flashcard(id="c", ease_factor=None, interval_days=None),
+    ]
+    loaded = loads(dumps(cards, "binary"))
+    assert loaded == cards
+    assert [type(card.ease_factor) for card in loaded] == [float, int, type(None)]
+    assert [type(card.interval_days) for card in loaded] == [int, float, type(None)]
+    assert loaded == loads(dumps(cards, "json"))
+
+
+@pytest.mark.parametrize("data", [{"a": [1, 2]}, [], [{"plain": "dict"}], "text"])
+def test_binary_round_trip_of_other_values(data):
+    payload = dumps(data, "binary")
+    assert payload.startswith(MAGIC + b"J")
+    assert loads(payload) == data
+
+
+def test_detect_format():
+    assert detect_format(dumps({"a": 1}, "binary")) == "binary"
+    assert detect_format(dumps({"a": 1}, "json")) == "json"
+    assert detect_format(dumps({"a": 1}, "json-compact")) == "json-compact"
+    assert detect_format(b'{"a": ' + b" " * 80 + b"1}") == "json"  # no early newline
+
+
+def test_convert_file_writes_record_tables(tmp_path):
+    root = str(tmp_path)
+    FlashcardStore(user_id="u", data_root=root).add_flashcard("S", "front", "back")
+    QuizStore(user_id="u", data_root=root).save_quiz_attempt(
+        "S", {"questions": [{"question": "Q?", "correct_answer": "a"}]}, 1, 1, ["a"]
+    )
+    files = list(state_files(data_layout.user_dir("u", root)))
+
+    assert sum(convert_file(path, "binary") for path in files) == len(files)
+    assert sum(convert_file(path, "binary") for path in files) == 0
+    for path in files:
+        with open(path, "rb") as f:
+            kind = f.read()[len(MAGIC):len(MAGIC) + 1]
+        is_shard = not path.endswith(("manifest.json", data_layout.QUESTIONS_FILE))
+        assert kind == (b"R" if is_shard else b"J"), path
+
+    assert FlashcardStore(user_id="u", data_root=root).get_flashcards_for_section("S")[0]["front"] == "front"
+    assert QuizStore(user_id="u", data_root=root).get_quizzes_for_section("S")[0]["score"] == 1
+
+    assert sum(convert_file(path, "json") for path in files) == len(files)
+    assert QuizStore(user_id="u", data_root=root).get_attempt_count("S") == 1
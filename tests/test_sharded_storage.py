@@ -0,0 +1,79 @@
+# tests/test_sharded_storage.py
+import threading
+
+import pytest
+
+import sharded_storage
+from flashcard_store import FlashcardStore
+from persistence import WriteBehindQueue, read_json
+from quiz_store import QuizStore
+
+QUIZ = {"questions": [{"question": "Q?", "correct_answer": "a"}]}
+
+
+def test_sections_load_lazily(tmp_path):
+    store = FlashcardStore(user_id="u", data_root=str(tmp_path))
+    store.add_flashcard("A", "a", "1")
+    store.add_flashcard("B", "b", "2")
+
+    sections = FlashcardStore(user_id="u", data_root=str(tmp_path)).data["sections"]
+    assert sorted(sections) == ["A", "B"]
+    assert sections.count("B") == 1  # from the manifest
+    assert not sections.is_loaded("A") and not sections.is_loaded("B")
+
+    assert sections["A"][0]["front"] == "a"
+    assert sections.is_loaded("A") and not sections.is_loaded("B")
+
+
+def test_change_made_while_write_behind_saves_is_kept(tmp_path, monkeypatch):
+    """A section marked dirty during the background write stays dirty."""
+    write = sharded_storage.atomic_write
+    paused, resume = threading.Event(), threading.Event()
+
+    def slow_write(path, payload, *args, **kwargs):
+        if threading.current_thread().name == "write-behind" and not paused.is_set():
+            paused.set()
+            resume.wait(5)
+        return write(path, payload, *args, **kwargs)
+
+    monkeypatch.setattr(sharded_storage, "atomic_write", slow_write)
+    queue = WriteBehindQueue(max_staleness=0.01)
+    store = FlashcardStore(user_id="u", data_root=str(tmp_path), write_behind=queue)
+
+    store.add_flashcard("S", "first", "a")
+    assert paused.wait(5)
+    store.add_flashcard("S", "second", "b")  # while "first" is being written
+    resume.set()
+    queue.close()
+
+    fresh = FlashcardStore(user_id="u", data_root=str(tmp_path))
+    assert [card["front"] for card in fresh.get_flashcards_for_section("S")] == ["first", "second"]
+
+
+def test_failed_save_restores_dirty_marks(tmp_path, monkeypatch):
+    sections = sharded_storage.ShardedSections(str(tmp_path))
+    sections["S"] = [1, 2]
+
+    def failing_write(path, payload, *args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(sharded_storage, "atomic_write", failing_write)
+        with pytest.raises(OSError):
+            sections.save()
+
+    sections.save()
+    shard = tmp_path / sections.meta("S")["file"]
+    assert read_json(shard) == [1, 2]
+    assert sharded_storage.ShardedSections(str(tmp_path)).count("S") == 2
+
+
+def test_quiz_attempts_from_two_processes_are_merged(tmp_path):
+    first = QuizStore(user_id="u", data_root=str(tmp_path))
+    second = QuizStore(user_id="u", data_root=str(tmp_path))
+
+    first.save_quiz_attempt("S", QUIZ, 1, 1, ["a"])
+    second.save_quiz_attempt("S", QUIZ, 0, 1, ["b"])
+
+    fresh = QuizStore(user_id="u", data_root=str(tmp_path))
+    assert sorted(attempt["score"] for attempt in fresh.get_quizzes_for_section("S")) == [0, 1]
@@ -0,0 +1,54 @@
+# tests/test_store_registry.py
+from flashcard_review import FlashcardReview
+from flashcard_store import FlashcardStore
+from learning_stats import LearningStats
+from quiz_store import QuizStore
+from store_registry import StoreRegistry
+from tutor import Tutor
+
+QUIZ = {"questions": [{"question": "Q?", "correct_answer": "a"}]}
+
+
+class FakeLLM:
+    model = "fake"
+
+    def generate_quiz(self, section_title, section_content, difficulty=None, num_questions=None):
+        return QUIZ
+
+
+def test_one_instance_per_store_and_user(tmp_path):
+    registry = StoreRegistry(data_root=str(tmp_path))
+    assert registry.get(QuizStore, "u") is registry.get(QuizStore, "u")
+    assert registry.get(QuizStore, "u") is not registry.get(QuizStore, "v")
+
+    tutor = Tutor(llm=FakeLLM(), user_id="u", registry=registry)
+    review = FlashcardReview(user_id="u", registry=registry)
+    assert tutor.flashcard_store is review.store is registry.get(FlashcardStore, "u")
+
+
+def test_injected_quiz_engine_keeps_the_baseline_signature(tmp_path):
+    calls = []
+
+    def quiz_engine(quiz, section, user_id):
+        calls.append((section, user_id))
+        answers = [
+            {"question": q["question"], "answer": q["correct_answer"],
+             "correct_answer": q["correct_answer"], "is_correct": True}
+            for q in quiz["questions"]
+        ]
+        return len(answers), len(answers), answers
+
+    registry = StoreRegistry(data_root=str(tmp_path))
+    tutor = Tutor(llm=FakeLLM(), quiz_engine=quiz_engine, user_id="u", registry=registry)
+    assert tutor.run_quiz_for_section("S", "content")["passed"]
+    assert calls == [("S", "u")]
+    assert registry.get(QuizStore, "u").get_attempt_count("S") == 1
+
+
+def test_default_quiz_engine_records_into_the_tutors_stats(tmp_path, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt="": "a")
+    registry = StoreRegistry(data_root=str(tmp_path))
+    tutor = Tutor(llm=FakeLLM(), user_id="u", registry=registry)
+
+    assert tutor.run_quiz_for_section("S", "content")["passed"]
+    assert registry.get(LearningStats, "u").stats["S"]["quiz_attempts"] == 1
@@ -0,0 +1,69 @@
+# tests/test_streaming.py
+import threading
+
+from llm import UNAVAILABLE_MESSAGE, OpenAIClient
+from llm_backends import FakeTransport
+from llm_cache import LLMCache
+from llm_guard import CircuitBreaker, LLMGuard, RateLimiter
+from prefetch import Prefetcher
+from store_registry import StoreRegistry
+from tutor import Tutor
+
+
+def _client(transport, cache=None, breaker=None) -> OpenAIClient:
+    return OpenAIClient(client=transport, cache=cache,
+                        guard=LLMGuard(RateLimiter(1e9, 1e12), breaker or CircuitBreaker()))
+
+
+def _tutor(llm, tmp_path, prefetcher=None) -> Tutor:
+    return Tutor(llm=llm, registry=StoreRegistry(data_root=str(tmp_path)), prefetcher=prefetcher)
+
+
+def test_stream_yields_chunks_of_the_full_text():
+    client = _client(FakeTransport())
+    chunks = list(client.generate("Recursion", stream=True))
+    assert len(chunks) > 1
+    assert "".join(chunks) == client.generate("Recursion")
+
+
+def test_streamed_response_is_cached_once_read():
+    transport = FakeTransport()
+    client = _client(transport, cache=LLMCache(None))
+    text = "".join(client.generate("Recursion", stream=True))
+
+    assert list(client.generate("Recursion", stream=True)) == [text]
+    assert client.generate("Recursion") == text
+    assert transport.calls == 1
+
+
+def test_stream_falls_back_when_the_llm_is_unavailable():
+    breaker = CircuitBreaker(failure_threshold=1)
+    breaker.record_failure()
+    assert list(_client(FakeTransport(), breaker=breaker).generate("Recursion", stream=True)) == [UNAVAILABLE_MESSAGE]
+
+
+def test_explain_section_prints_as_it_streams_and_returns_the_text(tmp_path, capsys):
+    transport = FakeTransport()
+    tutor = _tutor(_client(transport), tmp_path)
+    text = tutor.explain_section("Recursion", "A function calling itself.")
+
+    assert transport.calls == 1
+    assert len(text) > 100
+    assert capsys.readouterr().out == text + "\n"
+
+
+def test_explain_section_streams_instead_of_waiting_for_a_prefetch(tmp_path):
+    release = threading.Event()
+    prefetcher = Prefetcher()
+    try:
+        tutor = _tutor(_client(FakeTransport()), tmp_path, prefetcher)
+        key = ("explain", "Recursion", "...")
+        prefetcher.submit(key, release.wait)
+        prefetcher.submit(("quiz", "Recursion"), lambda: None)
+
+        assert "explained: Point 1" in tutor.explain_section("Recursion", "...")
+        assert prefetcher.counters["discarded"] == 1
+        assert prefetcher.pending() == [("quiz", "Recursion")]
+    finally:
+        release.set()
+        prefetcher.close()
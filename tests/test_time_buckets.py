@@ -0,0 +1,37 @@
+# tests/test_time_buckets.py
+import random
+
+from time_buckets import DAY_SECONDS, BucketedCounters
+
+
+def _summed(counters: BucketedCounters, days: int, now: float) -> int:
+    """The same window from a copy that keeps no running totals."""
+    plain = BucketedCounters.from_dict(counters.to_dict(), counters.fields, size=counters.size)
+    return plain.window("answers", days, now=now)
+
+
+def test_running_window_matches_summing_the_buckets():
+    rng = random.Random(7)
+    counters = BucketedCounters(("answers",), size=30, windows=(7,))
+    ts = 20_000 * DAY_SECONDS
+
+    for _ in range(2000):
+        ts += rng.choice([0, 0.2, 1, 3, 40]) * DAY_SECONDS * rng.random()
+        counters.add(ts - rng.random() * 10 * DAY_SECONDS, answers=1)  # some arrive late
+        now = ts + rng.choice([0, 1, 8]) * DAY_SECONDS
+        assert counters.window("answers", 7, now=now) == _summed(counters, 7, now)
+        assert counters.window("answers", now=now) == _summed(counters, 30, now)
+
+    restored = BucketedCounters.from_dict(counters.to_dict(), ("answers",), size=30, windows=(7,))
+    assert restored.running == counters.running
+
+
+def test_window_forgets_old_days_and_decay_halves():
+    counters = BucketedCounters(("answers",), size=30, half_life_seconds=7 * DAY_SECONDS, windows=(7,))
+    day = 20_000 * DAY_SECONDS
+    counters.add(day, answers=4)
+
+    assert counters.window("answers", 7, now=day + 6 * DAY_SECONDS) == 4
+    assert counters.window("answers", 7, now=day + 7 * DAY_SECONDS) == 0
+    assert counters.window("answers", now=day + 7 * DAY_SECONDS) == 4
+    assert counters.decayed("answers", now=day + 7 * DAY_SECONDS) == 2.0
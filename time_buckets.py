@@ -0,0 +1,179 @@
+# time_buckets.py
+import time
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+class BucketedCounters:
+    """
+    Named counters split into fixed-size time buckets (one per day by
+    default) held in a ring buffer, plus exponentially decayed totals.
+
+    - add() is O(1) (amortized over the buckets it advances past).
+    - window(field) over the whole ring, or over one of the `windows`
+      lengths given at construction, is O(1): a running total is kept
+      for each as buckets enter and leave it. Reading one on a later
+      day first advances the ring to today, which is the work the next
+      add() would do anyway. Other windows sum at most `size` buckets
+      and never modify the ring.
+    - decayed(field) is O(1): each counter is scaled by
+      0.5 ** (elapsed / half_life) before new counts are added.
+
+    Events older than the ring are ignored for windows but still count
+    toward the decayed totals.
+    """
+
+    def __init__(
+        self,
+        fields: tuple,
+        size: int = 30,
+        bucket_seconds: int = DAY_SECONDS,
+        half_life_seconds: float | None = 7 * DAY_SECONDS,
+        windows: tuple = ()
+    ):
+        self.fields = tuple(fields)
+        self.size = size
+        self.bucket_seconds = bucket_seconds
+        self.half_life_seconds = half_life_seconds
+
+        self.head = None  # bucket number of the newest slot
+        self.buckets = {field: [0] * size for field in self.fields}
+        self.totals = {field: 0 for field in self.fields}
+        # window length -> running totals of its last `length` buckets
+        self.running = {
+            length: {field: 0 for field in self.fields}
+            for length in windows if 0 < length < size
+        }
+        self.decay = {field: 0.0 for field in self.fields}
+        self.decay_ts = None
+
+    # -------------------------
+    # Internal helpers
+    # -------------------------
+
+    def _advance(self, bucket: int):
+        """
+        Move the head forward to `bucket`, clearing the slots that expire.
+        """
+        if self.head is None or bucket - self.head >= self.size:
+            for field in self.fields:
+                self.buckets[field] = [0] * self.size
+                self.totals[field] = 0
+                for running in self.running.values():
+                    running[field] = 0
+            self.head = bucket
+            return
+
+        while self.head < bucket:
+            self.head += 1
+            slot = self.head % self.size
+            for field in self.fields:
+                column = self.buckets[field]
+                for length, running in self.running.items():
+                    running[field] -= column[(self.head - length) % self.size]
+                self.totals[field] -= column[slot]
+                column[slot] = 0
+
+    def _recount_windows(self):
+        for length, running in self.running.items():
+            for field in self.fields:
+                column = self.buckets[field]
+                running[field] = sum(column[b % self.size] for b in range(self.head - length + 1, self.head + 1))
+
+    def _decay_factor(self, ts: float) -> float:
+        if self.half_life_seconds is None or self.decay_ts is None or ts <= self.decay_ts:
+            return 1.0
+        return 0.5 ** ((ts - self.decay_ts) / self.half_life_seconds)
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def add(self, ts: float | None = None, **deltas):
+        """
+        Count deltas at time `ts` (epoch seconds, default: now).
+        """
+        ts = time.time() if ts is None else ts
+        bucket = int(ts // self.bucket_seconds)
+
+        if self.head is None or bucket > self.head:
+            self._advance(bucket)
+        if bucket > self.head - self.size:
+            slot = bucket % self.size
+            for field, delta in deltas.items():
+                self.buckets[field][slot] += delta
+                self.totals[field] += delta
+                for length, running in self.running.items():
+                    if bucket > self.head - length:
+                        running[field] += delta
+
+        if self.half_life_seconds is not None:
+            if self.decay_ts is None or ts >= self.decay_ts:
+                factor = self._decay_factor(ts)
+                for field in self.fields:
+                    self.decay[field] *= factor
+                self.decay_ts = ts
+                age_factor = 1.0
+            else:  # late event: weight it by its age instead
+                age_factor = 0.5 ** ((self.decay_ts - ts) / self.half_life_seconds)
+            for field, delta in deltas.items():
+                self.decay[field] += delta * age_factor
+
+    def window(self, field: str, buckets: int | None = None, now: float | None = None) -> int:
+        """
+        Sum of `field` over the last `buckets` buckets including the current
+        one (default: the whole ring).
+        """
+        now = time.time() if now is None else now
+        current = int(now // self.bucket_seconds)
+        buckets = self.size if buckets is None else min(buckets, self.size)
+        if self.head is None:
+            return 0
+        if current > self.head and (buckets == self.size or buckets in self.running):
+            self._advance(current)
+        if current == self.head:
+            if buckets == self.size:
+                return self.totals[field]
+            if buckets in self.running:
+                return self.running[buckets][field]
+
+        # Read-only: slots after the head are empty, slots before the ring are gone
+        first = max(current - buckets + 1, self.head - self.size + 1)
+        last = min(current, self.head)
+        column = self.buckets[field]
+        return sum(column[b % self.size] for b in range(first, last + 1))
+
+    def decayed(self, field: str, now: float | None = None) -> float:
+        """
+        Exponentially decayed count of `field` as of `now`.
+        """
+        now = time.time() if now is None else now
+        return self.decay[field] * self._decay_factor(now)
+
+    # -------------------------
+    # Serialization
+    # -------------------------
+
+    def to_dict(self) -> dict:
+        return {
+            "head": self.head,
+            "buckets": self.buckets,
+            "totals": self.totals,
+            "decay": self.decay,
+            "decay_ts": self.decay_ts,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, fields: tuple, **options) -> "BucketedCounters":
+        counters = cls(fields, **options)
+        if len(next(iter(data["buckets"].values()), ())) != counters.size:
+            return counters  # ring size changed; start over
+        counters.head = data["head"]
+        for field in counters.fields:
+            counters.buckets[field] = list(data["buckets"].get(field, [0] * counters.size))
+            counters.totals[field] = data["totals"].get(field, 0)
+            counters.decay[field] = data["decay"].get(field, 0.0)
+        counters.decay_ts = data["decay_ts"]
+        if counters.head is not None:
+            counters._recount_windows()
+        return counters
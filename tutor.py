@@ -5,8 +5,16 @@ from flashcard_store import FlashcardStore
 from flashcard_engine import FlashcardEngine
 from flashcard_review import FlashcardReview
 from learning_stats import LearningStats
-from datetime import datetime, timedelta
+from store_registry import StoreRegistry, default_registry
+from due_index import card_due_ts, iso_from_epoch
+from scheduler import MIN_EASE_FACTOR, schedule_card
+from llm import bounded_tasks
+from llm_pool import get_default_factory
+from question_bank import question_key
+from quiz_engine import run_quiz
 from typing import List, Dict
+import asyncio
+import time
 
 
 class Tutor:
@@ -19,26 +27,111 @@ class Tutor:
     """
 
     MIN_PASS_RATIO = 0.7  # 70%
-    MIN_EASE_FACTOR = 1.3
+    MIN_EASE_FACTOR = MIN_EASE_FACTOR
+    MAX_CONCURRENT_EXPLANATIONS = 4
+    BATCH_EXPLANATIONS = True  # one request for all mistakes (see explain_mistakes)
+    STREAM_EXPLANATIONS = True  # print section explanations as they are generated
+    RECENT_QUIZ_ATTEMPTS = 3  # questions of this many stored attempts count as recently seen
+
+    def __init__(
+        self,
+        llm=None,
+        quiz_engine=None,
+        user_id="default",
+        registry=None,
+        db=None,
+        event_log=None,
+        write_behind=None,
+        data_root=None,
+        async_llm=None,
+        prefetcher=None,
+        llm_factory=None,
+        question_bank=None
+    ):
+        """
+        Stores come from `registry` (the process-wide default_registry
+        unless given) and are loaded on first use. The db / event_log /
+        write_behind / data_root shortcuts build a private registry for
+        those backends.
+
+        async_llm: optional llm.AsyncOpenAIClient used to explain quiz
+        mistakes concurrently; without it the same requests go to `llm`
+        from worker threads.
+
+        prefetcher: optional prefetch.Prefetcher; see prefetch_section.
+
+        llm_factory: llm_pool.LLMClientFactory the clients come from when
+        `llm` is not given (get_default_factory()) or, for async_llm, when the
+        factory is given explicitly. Clients from one factory share its
+        HTTP connection pool.
 
-    def __init__(self, llm, quiz_engine, user_id="default"):
-        self.llm = llm
-        self.quiz_engine = quiz_engine
+        question_bank: optional question_bank.QuestionBank quizzes are
+        drawn from instead of being generated per attempt.
+
+        quiz_engine: function that asks the questions, called as
+        quiz_engine(quiz, section=..., user_id=...) (quiz_engine.run_quiz
+        on this Tutor's stats unless given).
+        """
+        self.llm = llm or (llm_factory or get_default_factory()).client()
+        if async_llm is None and llm_factory is not None:
+            async_llm = llm_factory.async_client(self.llm.model)
+        self.async_llm = async_llm
+        self.prefetcher = prefetcher
+        self.question_bank = question_bank
+        self._served_questions = {}  # section -> keys of questions drawn this session
+        self.quiz_engine = quiz_engine or self._run_quiz
         self.user_id = user_id
 
-        self.progress_manager = ProgressManager(user_id=user_id)
-        self.quiz_store = QuizStore(user_id=user_id)
-        self.flashcard_store = FlashcardStore(user_id=user_id)
-        self.flashcard_engine = FlashcardEngine()
+        if registry is None and (db, event_log, write_behind, data_root) != (None, None, None, None):
+            registry = StoreRegistry(db=db, write_behind=write_behind, data_root=data_root)
+            if event_log is not None:
+                registry.register_event_log(event_log)
+        self.registry = registry or default_registry
 
-        self.stats = LearningStats(user_id=user_id)
-        self.flashcard_review = FlashcardReview(user_id=user_id)
-        self.learning_stats = LearningStats(user_id=user_id)
+        self.flashcard_engine = FlashcardEngine(llm=self.llm)
+        self._flashcard_review = None
+
+    # -------------------------
+    # Stores (shared, lazily loaded)
+    # -------------------------
+
+    @property
+    def progress_manager(self) -> ProgressManager:
+        return self.registry.get(ProgressManager, self.user_id)
+
+    @property
+    def quiz_store(self) -> QuizStore:
+        return self.registry.get(QuizStore, self.user_id)
+
+    @property
+    def flashcard_store(self) -> FlashcardStore:
+        return self.registry.get(FlashcardStore, self.user_id)
+
+    @property
+    def stats(self) -> LearningStats:
+        return self.registry.get(LearningStats, self.user_id)
+
+    # Kept as an alias: both names always referred to the user's stats
+    learning_stats = stats
+
+    @property
+    def flashcard_review(self) -> FlashcardReview:
+        if self._flashcard_review is None:
+            self._flashcard_review = FlashcardReview(
+                user_id=self.user_id, registry=self.registry
+            )
+        return self._flashcard_review
 
     # -------------------------
     # Session helpers
     # -------------------------
 
+    def flush(self):
+        """
+        Write pending store changes to disk (end of quiz / session).
+        """
+        self.registry.flush()
+
     def has_completed_section(self, section_title: str) -> bool:
         return self.progress_manager.is_section_completed(section_title)
 
@@ -49,20 +142,57 @@ class Tutor:
     # Teaching
     # -------------------------
 
-    def explain_section(self, title: str, content: str):
-        explanation = self.llm.generate(
+    @staticmethod
+    def _explain_prompt(title: str, content: str) -> str:
+        return (
             f"Explain the following topic clearly and simply:\n\n"
             f"Title: {title}\n"
             f"Content: {content}"
         )
-        print(explanation)
-        return explanation
 
-    def resume_or_explain_section(self, title: str, content: str):
+    def explain_section(self, title: str, content: str):
+        """
+        Print the explanation as it is generated (STREAM_EXPLANATIONS), so
+        the wait is the time to the first chunk; returns the full text.
+        A prefetched explanation is printed at once if it is ready; one
+        still being generated is dropped in favour of streaming.
+        """
+        key = ("explain", title, content)
+        if self.STREAM_EXPLANATIONS and self.prefetcher is not None and not self.prefetcher.done(key):
+            self.prefetcher.retain(lambda pending: pending != key)
+        explanation = self._prefetched(
+            key, self._explanation_chunks, self._explain_prompt(title, content)
+        )
+        if isinstance(explanation, str):
+            print(explanation)
+            return explanation
+
+        parts = []
+        for chunk in explanation:
+            print(chunk, end="", flush=True)
+            parts.append(chunk)
+        print()
+        return "".join(parts)
+
+    def _explanation_chunks(self, prompt: str):
+        if self.STREAM_EXPLANATIONS:
+            return self.llm.generate(prompt, stream=True)
+        return self.llm.generate(prompt)
+
+    def resume_or_explain_section(self, title: str, content: str, next_section=None):
+        """
+        next_section: optional (title, content) of the section the learner
+        will see next. With a prefetcher, this section's quiz is generated
+        alongside its explanation, and its flashcards plus the next
+        section's explanation and quiz while the learner answers.
+        """
         if self.has_completed_section(title):
             print(f"Skipping '{title}' (already completed).")
             return
 
+        if self.prefetcher is not None:
+            self._prefetch_route(title, content, next_section)
+
         self.explain_section(title, content)
 
         result = self.run_quiz_for_section(title, content)
@@ -82,20 +212,26 @@ class Tutor:
         config = self.get_quiz_config(section_title)
         difficulty = self._resolve_quiz_difficulty(section_title)
 
-        quiz = self.llm.generate_quiz(
-            section_title,
-            section_content,
-            difficulty=difficulty,
-            num_questions=config["num_questions"]
-        )
+        if self.question_bank is not None:
+            quiz = self._draw_quiz(section_title, section_content, difficulty, config["num_questions"])
+        else:
+            quiz = self._prefetched(
+                ("quiz", section_title, section_content, difficulty, config["num_questions"]),
+                self.llm.generate_quiz,
+                section_title,
+                section_content,
+                difficulty=difficulty,
+                num_questions=config["num_questions"]
+            )
         difficulty = self._resolve_quiz_difficulty(section_title)
 
         self.MIN_PASS_RATIO = config["pass_ratio"]
 
         score, total, user_answers = self.quiz_engine(
             quiz,
-            section = section_title,
-            user_id = self.user_id)
+            section=section_title,
+            user_id=self.user_id
+        )
 
         print("\n--- Quiz Results ---")
         for r in user_answers:
@@ -108,17 +244,9 @@ class Tutor:
 
         if not passed:
             print("\n--- Let's review what you missed ---")
-            for r in user_answers:
-                if not r["is_correct"]:
-                    try:
-                        explanation = self.llm.explain_mistake(
-                            r["question"],
-                            r["correct_answer"]
-                        )
-                        print("\n" + explanation)
-                    except Exception:
-                        print("Review unavailable (LLM offline). Please revisit the section content.")
+            self.explain_mistakes([r for r in user_answers if not r["is_correct"]])
 
+            self.flush()
             return {
                 "passed": False,
                 "score": score,
@@ -140,6 +268,7 @@ class Tutor:
             quiz_total=total
         )
 
+        self.flush()
         print(f"\nProgress saved for '{section_title}'.")
 
         return {
@@ -148,6 +277,146 @@ class Tutor:
             "total": total
         }
 
+    def _run_quiz(self, quiz: dict, *, section: str, user_id: str):
+        # run_quiz resolves stats through default_registry; ours may differ
+        return run_quiz(quiz, section=section, user_id=user_id, stats=self.stats)
+
+    # -------------------------
+    # Question bank
+    # -------------------------
+
+    def _draw_quiz(self, section_title: str, section_content: str, difficulty: str, num_questions: int) -> dict:
+        """
+        A quiz from the question bank, avoiding the questions of the
+        learner's last RECENT_QUIZ_ATTEMPTS stored attempts and those
+        already drawn this session (failed attempts are not stored).
+        """
+        served = self._served_questions.setdefault(section_title, set())
+        recent = {
+            question_key(question["question"])
+            for question in self.quiz_store.recent_questions(section_title, self.RECENT_QUIZ_ATTEMPTS)
+            if question.get("question")
+        }
+        quiz = self.question_bank.draw(
+            section_title,
+            section_content,
+            difficulty=difficulty,
+            num_questions=num_questions,
+            exclude=recent | served
+        )
+        served.update(question_key(question["question"]) for question in quiz["questions"])
+        return quiz
+
+    # -------------------------
+    # Prefetching
+    # -------------------------
+
+    def prefetch_section(self, title: str, content: str, explain: bool = True):
+        """
+        Start generating a section's quiz and (unless explain=False) its
+        explanation in the background. The quiz is keyed by the
+        difficulty and length chosen now; if the learner's stats change
+        them before it is used, it is regenerated instead.
+        """
+        if self.prefetcher is None or self.has_completed_section(title):
+            return
+
+        if explain:
+            self.prefetcher.submit(
+                ("explain", title, content),
+                self.llm.generate, self._explain_prompt(title, content)
+            )
+
+        config = self.get_quiz_config(title)
+        difficulty = self._resolve_quiz_difficulty(title)
+        if self.question_bank is not None:
+            # Quizzes are drawn from the bank: just keep its pool topped up
+            self.question_bank.ensure(title, content, difficulty, config["num_questions"])
+            return
+        self.prefetcher.submit(
+            ("quiz", title, content, difficulty, config["num_questions"]),
+            self.llm.generate_quiz,
+            title,
+            content,
+            difficulty=difficulty,
+            num_questions=config["num_questions"]
+        )
+
+    def _prefetch_route(self, title: str, content: str, next_section):
+        route = {title}
+        if next_section is not None:
+            route.add(next_section[0])
+        # Anything prefetched for a section that is no longer current or next
+        self.prefetcher.retain(lambda key: key[1] in route)
+
+        # The current section's explanation is about to be shown: stream it
+        self.prefetch_section(title, content, explain=not self.STREAM_EXPLANATIONS)
+        if not self.flashcard_store.get_flashcards_for_section(title):
+            self.prefetcher.submit(
+                ("flashcards", title, content),
+                self.flashcard_engine.generate_flashcards, title, content
+            )
+        if next_section is not None:
+            self.prefetch_section(*next_section)
+
+    def _prefetched(self, key, fn, *args, **kwargs):
+        if self.prefetcher is None:
+            return fn(*args, **kwargs)
+        return self.prefetcher.result(key, fn, *args, **kwargs)
+
+    # -------------------------
+    # Mistake explanations
+    # -------------------------
+
+    def explain_mistakes(self, mistakes: list):
+        """
+        Explain each wrong answer.
+
+        With BATCH_EXPLANATIONS (and a client that has explain_mistakes)
+        all of them come from one request. Otherwise the requests run
+        concurrently (at most MAX_CONCURRENT_EXPLANATIONS at once), so the
+        wait is about the slowest call rather than the sum; explanations
+        are printed in question order as soon as each one and those
+        before it are ready.
+        """
+        if not mistakes:
+            return
+        if self.BATCH_EXPLANATIONS and len(mistakes) > 1:
+            llm = self.async_llm or self.llm
+            if hasattr(llm, "explain_mistakes"):
+                self._explain_mistakes_batched(llm, mistakes)
+                return
+        asyncio.run(self._explain_mistakes(mistakes))
+
+    def _explain_mistakes_batched(self, llm, mistakes: list):
+        batch = [(r["question"], r["correct_answer"]) for r in mistakes]
+        try:
+            explanations = llm.explain_mistakes(batch)
+            if asyncio.iscoroutine(explanations):
+                explanations = asyncio.run(explanations)
+        except Exception:
+            print("Review unavailable (LLM offline). Please revisit the section content.")
+            return
+        for explanation in explanations:
+            print("\n" + explanation)
+
+    async def _explain_mistakes(self, mistakes: list):
+        tasks = bounded_tasks(
+            (self._explain_mistake(r) for r in mistakes),
+            self.MAX_CONCURRENT_EXPLANATIONS
+        )
+        for task in tasks:
+            try:
+                explanation = await task
+                print("\n" + explanation)
+            except Exception:
+                print("Review unavailable (LLM offline). Please revisit the section content.")
+
+    async def _explain_mistake(self, r) -> str:
+        if self.async_llm is not None:
+            return await self.async_llm.explain_mistake(r["question"], r["correct_answer"])
+        return await asyncio.to_thread(self.llm.explain_mistake, r["question"], r["correct_answer"])
+
     # -------------------------
     # Flashcards
     # -------------------------
@@ -157,14 +426,13 @@ class Tutor:
         if existing:
             return  # prevent duplicates
 
-        flashcards = self.flashcard_engine.generate_flashcards(title, content)
+        flashcards = self._prefetched(
+            ("flashcards", title, content),
+            self.flashcard_engine.generate_flashcards, title, content
+        )
 
-        for card in flashcards:
-            self.flashcard_store.add_flashcard(
-                section=title,
-                front=card["front"],
-                back=card["back"]
-            )
+        # One save for the whole batch
+        self.flashcard_store.add_flashcards(title, flashcards)
 
     # -------------------------
     # Progress reporting
@@ -215,14 +483,14 @@ class Tutor:
         """
 
         completed = set(self.get_completed_sections())
-        weak_sections = set(self.stats.get_weak_sections())
 
-        # Remove completed sections
-        weak_sections = [s for s in weak_sections if s not in completed]
+        # Remove completed sections (weakest first)
+        weak_sections = [s for s in self.stats.get_weak_sections() if s not in completed]
+        weak = set(weak_sections)
 
         remaining = [
             s for s in all_sections
-            if s not in completed and s not in weak_sections
+            if s not in completed and s not in weak
         ]
 
         ordered = weak_sections + remaining
@@ -234,12 +502,7 @@ class Tutor:
     # -------------------------
 
     def get_quiz_config(self, section_title: str) -> dict:
-        stats = self.stats.get_section_stats(section_title)
-
-        attempts = stats.get("quiz_attempts", 0)
-        correct = stats.get("quiz_correct", 0)
-
-        accuracy = (correct / attempts) if attempts > 0 else 1.0
+        accuracy = self.stats.get_recent_quiz_accuracy(section_title)
 
         if accuracy < 0.5:
             return {"num_questions": 5, "pass_ratio": 0.8}
@@ -249,6 +512,7 @@ class Tutor:
             return {"num_questions": 3, "pass_ratio": 0.7}
 
     def session_summary(self):
+        self.flush()  # end of session
         progress = self.progress_manager.get_overall_progress()
         weak_sections = self.learning_stats.get_weak_sections()
 
@@ -272,9 +536,9 @@ class Tutor:
 
     def _resolve_quiz_difficulty(self, section_title: str) -> str:
             """
-            Determines quiz difficulty based on historical quiz accuracy.
+            Determines quiz difficulty based on recent quiz accuracy.
             """
-            accuracy = self.learning_stats.get_quiz_accuracy(section_title)
+            accuracy = self.learning_stats.get_recent_quiz_accuracy(section_title)
 
             if accuracy < 0.5:
                 return "easy"
@@ -298,29 +562,15 @@ class Tutor:
 
     def get_due_cards(self, cards: List[Dict]) -> List[Dict]:
         """
-        Returns cards that are due for review.
-        """
-        now = datetime.utcnow()
-
-        due_cards = []
-        for card in cards:
-            due = card.get("due")
+        Returns cards that are due for review (new cards included),
+        oldest first. Compares integer due times; no date parsing.
 
-            if not due:
-                # New cards are considered due
-                due_cards.append(card)
-                continue
-
-            due_dt = datetime.fromisoformat(due)
-
-            if due_dt <= now:
-                due_cards.append(card)
-
-        # Sort by due date (oldest first)
-        return sorted(
-            due_cards,
-            key=lambda c: c.get("due") or ""
-        )
+        For the user's own deck prefer flashcard_store.get_due_cards(),
+        which reads the maintained due-time index.
+        """
+        now = int(time.time())
+        due_cards = [card for card in cards if card_due_ts(card) <= now]
+        return sorted(due_cards, key=card_due_ts)
 
         # --------------------------------------------------
         # SM-2 Lite Core
@@ -328,46 +578,11 @@ class Tutor:
 
     def _apply_sm2(self, card: Dict, quality: int) -> Dict:
         """
-        Canonical SM-2 Lite implementation.
+        Canonical SM-2 Lite implementation
+        (a single-card call into scheduler.sm2_batch).
         """
-
-        if not 0 <= quality <= 5:
-            raise ValueError("Quality must be between 0 and 5")
-
-        ef = card.get("ease_factor", 2.5)
-        reps = card.get("repetitions", 0)
-        interval = card.get("interval", 1)
-
-        # ---------- Failure ----------
-        if quality < 3:
-            reps = 0
-            interval = 1
-        else:
-            # ---------- Success ----------
-            reps += 1
-
-            if reps == 1:
-                interval = 1
-            elif reps == 2:
-                interval = 6
-            else:
-                interval = round(interval * ef)
-
-        # ---------- Ease Factor Update ----------
-        ef = ef + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
-        ef = max(self.MIN_EASE_FACTOR, round(ef, 2))
-
-        # ---------- Due Date ----------
-        due_date = datetime.utcnow() + timedelta(days=interval)
-
-        # ---------- Persist ----------
-        card.update({
-            "repetitions": reps,
-            "interval": interval,
-            "ease_factor": ef,
-            "due": due_date.isoformat()
-        })
-
+        schedule_card(card, quality)
+        card["due"] = iso_from_epoch(card["due_ts"])
         return card
 
     def run_daily_review(self, max_cards: int = 15):
@@ -377,28 +592,23 @@ class Tutor:
 
         print("\n=== DAILY REVIEW SESSION ===")
 
-        # 1. Fetch all flashcards
-        all_cards = self.flashcard_store.get_all_flashcards()
-
-        if not all_cards:
+        # 1. Check for flashcards
+        if not self.flashcard_store.count_flashcards():
             print("No flashcards available.")
             return
 
-        # 2. Filter due cards
-        due_cards = self.get_due_cards(all_cards)
+        # 2-3. Next due cards from the due-time index, limited to session size
+        session_cards = self.flashcard_store.get_due_cards(limit=max_cards)
 
-        if not due_cards:
+        if not session_cards:
             print("No cards due for review today.")
             return
 
-        # 3. Limit session size
-        session_cards = due_cards[:max_cards]
-
         print(f"\nReviewing {len(session_cards)} card(s)...")
 
         reviewed = 0
 
-        for card in session_cards:
+        for section, card in session_cards:
             print("\n--------------------------------")
             print(f"Q: {card['front']}")
             input("Press Enter to reveal answer...")
@@ -434,11 +644,13 @@ class Tutor:
 
             # 6. Update learning stats
             self.learning_stats.record_flashcard_review(
-                section=card.get("section"),
+                section=section,
                 quality=quality
             )
 
             reviewed += 1
 
+        self.flush()
+
         print("\n=== SESSION COMPLETE ===")
         print(f"Reviewed {reviewed} card(s).")